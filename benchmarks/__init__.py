@@ -0,0 +1 @@
+"""Benchmarks for the kanban command line interface"""
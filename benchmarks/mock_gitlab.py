@@ -0,0 +1,507 @@
+######################################################################
+# Copyright 2022 John Rofrano. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the 'License');
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an 'AS IS' BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+######################################################################
+
+"""
+Mock GitLab Server
+
+This module runs a local, in memory stand in for the parts of the GitLab
+REST API that kanban uses. Payloads are built from tests/fixtures/*.json
+and the server can add latency, jitter, random errors, 429 throttling and
+pagination so that benchmarks and tests behave like a real GitLab.
+"""
+import copy
+import json
+import math
+import os
+import random
+import re
+import threading
+import time
+import urllib.parse
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "..", "tests", "fixtures")
+PROJECT_PATH = re.compile(r"^/api/v4/projects/(?P<project>[^/]+)(?P<path>/.*)?$")
+GROUP_PATH = re.compile(r"^/api/v4/groups/(?P<group>[^/]+)/projects$")
+
+
+def load_fixture(name: str):
+    """Loads a JSON fixture"""
+    with open(os.path.join(FIXTURES, name), encoding="utf-8") as fixture:
+        return json.load(fixture)
+
+
+def now() -> str:
+    """Returns the current time in GitLab's format"""
+    return datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.%f")[:-3] + "Z"
+
+
+class HttpError(Exception):
+    """An error response"""
+
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+######################################################################
+# M O C K   G I T L A B   S T A T E
+######################################################################
+class MockGitLab:
+    """An in memory GitLab project served over HTTP on localhost"""
+
+    # pylint: disable=too-many-instance-attributes
+
+    def __init__(
+        self,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        error_rate: float = 0.0,
+        rate_limit: float = None,
+        seed: int = 0,
+    ):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.rate_limit = rate_limit
+        self.random = random.Random(seed)
+        self.lock = threading.RLock()
+        self.issue_template = load_fixture("issue.json")
+        self.board_template = load_fixture("board.json")
+        self.labels = {}
+        # Labels of the project's groups, listed unless include_ancestor_groups is false
+        self.group_labels = {}
+        self.boards = {}
+        self.issues = {}
+        self.next_id = 1000
+        self.requests = 0
+        self.throttled = 0
+        self.tokens = rate_limit or 0
+        self.refilled = time.monotonic()
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), _handler(self))
+        self.server.daemon_threads = True
+        self.thread = None
+
+    @property
+    def url(self) -> str:
+        """The base URL to pass to kanban with -u"""
+        return f"http://127.0.0.1:{self.server.server_address[1]}"
+
+    def start(self) -> "MockGitLab":
+        """Starts serving on a background thread"""
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self) -> None:
+        """Stops the server"""
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+    def _id(self) -> int:
+        with self.lock:
+            self.next_id += 1
+            return self.next_id
+
+    # -----------------------------------------------------------------
+    # Behaviour that makes the mock act like a real server
+    # -----------------------------------------------------------------
+    def delay(self) -> None:
+        """Sleeps for the configured latency and jitter"""
+        seconds = self.latency + self.random.uniform(-self.jitter, self.jitter)
+        if seconds > 0:
+            time.sleep(seconds)
+
+    def throttle(self) -> dict:
+        """Takes a rate limit token and returns the RateLimit headers
+
+        Raises a 429 HttpError when there are no tokens left
+        """
+        with self.lock:
+            self.requests += 1
+            if not self.rate_limit:
+                return {}
+            current = time.monotonic()
+            self.tokens = min(self.rate_limit, self.tokens + (current - self.refilled) * self.rate_limit)
+            self.refilled = current
+            reset = int(time.time()) + 1
+            if self.tokens < 1:
+                self.throttled += 1
+                wait = math.ceil((1 - self.tokens) / self.rate_limit)
+                raise HttpError(429, f"Retry later|{wait}|{reset}")
+            self.tokens -= 1
+            return {
+                "RateLimit-Limit": str(int(self.rate_limit)),
+                "RateLimit-Remaining": str(int(self.tokens)),
+                "RateLimit-Reset": str(reset),
+            }
+
+    def maybe_fail(self) -> None:
+        """Fails a request at random before it has any effect"""
+        if self.error_rate and self.random.random() < self.error_rate:
+            raise HttpError(503, "Service Unavailable")
+
+    # -----------------------------------------------------------------
+    # Labels
+    # -----------------------------------------------------------------
+    def find_label(self, key: str) -> dict:
+        """Finds a label by id or name"""
+        key = urllib.parse.unquote(key)
+        for label in self.labels.values():
+            if str(label["id"]) == key or label["name"] == key:
+                return label
+        raise HttpError(404, "404 Label Not Found")
+
+    def create_label(self, data: dict) -> dict:
+        """Creates a label"""
+        with self.lock:
+            if any(label["name"] == data.get("name") for label in self.labels.values()):
+                raise HttpError(409, "Label already exists")
+            label = {
+                "id": self._id(),
+                "name": data["name"],
+                "color": data.get("color", "#6699cc"),
+                "text_color": data.get("text_color", "#FFFFFF"),
+                "description": data.get("description") or None,
+                "is_project_label": True,
+            }
+            self.labels[label["id"]] = label
+            return label
+
+    def create_group_label(self, data: dict) -> dict:
+        """Creates a label in the project's group, which the project can use but not change"""
+        with self.lock:
+            label = dict(self.create_label(data), is_project_label=False)
+            del self.labels[label["id"]]
+            self.group_labels[label["id"]] = label
+            return label
+
+    def update_label(self, key: str, data: dict) -> dict:
+        """Updates a label"""
+        with self.lock:
+            label = self.find_label(key)
+            for field in ("color", "text_color", "description"):
+                if field in data:
+                    label[field] = data[field]
+            if data.get("new_name"):
+                label["name"] = data["new_name"]
+            return label
+
+    def delete_label(self, key: str) -> None:
+        """Deletes a label"""
+        with self.lock:
+            del self.labels[self.find_label(key)["id"]]
+
+    # -----------------------------------------------------------------
+    # Boards
+    # -----------------------------------------------------------------
+    def find_board(self, board_id: str) -> dict:
+        """Finds a board by id"""
+        board = self.boards.get(int(board_id))
+        if board is None:
+            raise HttpError(404, "404 Board Not Found")
+        return board
+
+    def create_board(self, data: dict) -> dict:
+        """Creates a board"""
+        with self.lock:
+            board = copy.deepcopy(self.board_template)
+            board.update({"id": self._id(), "name": data.get("name", "Development"), "lists": []})
+            self.boards[board["id"]] = board
+            return board
+
+    def create_list(self, board_id: str, data: dict) -> dict:
+        """Adds a list for a label to a board"""
+        with self.lock:
+            board = self.find_board(board_id)
+            label = self.find_label(str(data["label_id"]))
+            if any(item["label"]["id"] == label["id"] for item in board["lists"]):
+                raise HttpError(400, "List already exists")
+            item = {"id": self._id(), "label": dict(label), "position": len(board["lists"])}
+            board["lists"].append(item)
+            return item
+
+    def move_list(self, board_id: str, list_id: str, data: dict) -> dict:
+        """Moves a list to a new position"""
+        with self.lock:
+            board = self.find_board(board_id)
+            lists = board["lists"]
+            item = next((item for item in lists if item["id"] == int(list_id)), None)
+            if item is None:
+                raise HttpError(404, "404 List Not Found")
+            lists.remove(item)
+            lists.insert(int(data["position"]), item)
+            for position, entry in enumerate(lists):
+                entry["position"] = position
+            return item
+
+    # -----------------------------------------------------------------
+    # Issues
+    # -----------------------------------------------------------------
+    def find_issue(self, iid: str) -> dict:
+        """Finds an issue by iid"""
+        issue = self.issues.get(int(iid))
+        if issue is None:
+            raise HttpError(404, "404 Issue Not Found")
+        return issue
+
+    def create_issue(self, data: dict) -> dict:
+        """Creates an issue"""
+        if not data.get("title"):
+            raise HttpError(400, "title is missing")
+        with self.lock:
+            issue = copy.deepcopy(self.issue_template)
+            iid = len(self.issues) + 1
+            while iid in self.issues:
+                iid += 1
+            stamp = now()
+            issue.update(
+                {
+                    "id": self._id(),
+                    "iid": iid,
+                    "title": data["title"],
+                    "description": data.get("description"),
+                    "labels": _split(data.get("labels")),
+                    "state": "opened",
+                    "created_at": stamp,
+                    "updated_at": stamp,
+                }
+            )
+            self.issues[iid] = issue
+            return issue
+
+    def update_issue(self, iid: str, data: dict) -> dict:
+        """Updates the labels, title or state of an issue"""
+        with self.lock:
+            issue = self.find_issue(iid)
+            labels = _split(data["labels"]) if "labels" in data else list(issue["labels"])
+            labels += [name for name in _split(data.get("add_labels")) if name not in labels]
+            labels = [name for name in labels if name not in _split(data.get("remove_labels"))]
+            issue["labels"] = labels
+            for field in ("title", "description", "milestone_id", "weight"):
+                if field in data:
+                    issue[field] = data[field]
+            if data.get("state_event") == "close":
+                issue["state"] = "closed"
+            elif data.get("state_event") == "reopen":
+                issue["state"] = "opened"
+            issue["updated_at"] = now()
+            return issue
+
+    def delete_issue(self, iid: str) -> None:
+        """Deletes an issue"""
+        with self.lock:
+            del self.issues[self.find_issue(iid)["iid"]]
+
+    def list_issues(self, query: dict) -> list:
+        """Returns the issues that match the GitLab list filters"""
+        with self.lock:
+            issues = list(self.issues.values())
+        search = query.get("search")
+        if search:
+            issues = [issue for issue in issues if search.lower() in issue["title"].lower()]
+        for name in _split(query.get("labels")):
+            issues = [issue for issue in issues if name in issue["labels"]]
+        if query.get("state") in ("opened", "closed"):
+            issues = [issue for issue in issues if issue["state"] == query["state"]]
+        if query.get("assignee_username"):
+            issues = [
+                issue for issue in issues
+                if any(user["username"] == query["assignee_username"] for user in issue["assignees"])
+            ]
+        if query.get("milestone"):
+            issues = [issue for issue in issues if (issue.get("milestone") or {}).get("title") == query["milestone"]]
+        for field, key in (("updated_after", "updated_at"), ("created_after", "created_at")):
+            if query.get(field):
+                since = _parse_time(query[field])
+                issues = [issue for issue in issues if _parse_time(issue[key]) >= since]
+        if query.get("order_by") == "updated_at":
+            issues.sort(key=lambda issue: issue["updated_at"], reverse=query.get("sort") != "asc")
+        return issues
+
+    # -----------------------------------------------------------------
+    # Routing
+    # -----------------------------------------------------------------
+    def route(self, method: str, path: str, query: dict, data: dict):
+        """Returns (status, payload) for a request or raises HttpError"""
+        match = GROUP_PATH.match(path)
+        if match:
+            return 200, [{"id": 1}, {"id": 2}]
+        match = PROJECT_PATH.match(path)
+        if not match:
+            raise HttpError(404, "404 Not Found")
+        project = match.group("project")
+        segments = [segment for segment in (match.group("path") or "").split("/") if segment]
+        if not segments:
+            return 200, {"id": project, "path_with_namespace": f"mock/project-{project}"}
+        handler = {"labels": self._labels, "boards": self._boards, "issues": self._issues}.get(segments[0])
+        if handler is None:
+            raise HttpError(404, "404 Not Found")
+        return handler(method, segments[1:], query, data)
+
+    def _labels(self, method: str, segments: list, query: dict, data: dict):
+        if not segments:
+            if method == "POST":
+                return 201, self.create_label(data)
+            labels = list(self.labels.values())
+            if query.get("include_ancestor_groups", "true") != "false":
+                labels += list(self.group_labels.values())
+            if query.get("search"):
+                labels = [label for label in labels if query["search"].lower() in label["name"].lower()]
+            return 200, labels
+        if method == "PUT":
+            return 200, self.update_label(segments[0], data)
+        if method == "DELETE":
+            self.delete_label(segments[0])
+            return 204, None
+        return 200, self.find_label(segments[0])
+
+    def _boards(self, method: str, segments: list, query: dict, data: dict):
+        # pylint: disable=unused-argument,too-many-return-statements
+        if not segments:
+            if method == "POST":
+                return 201, self.create_board(data)
+            return 200, list(self.boards.values())
+        if len(segments) == 1:
+            if method == "DELETE":
+                with self.lock:
+                    del self.boards[self.find_board(segments[0])["id"]]
+                return 204, None
+            return 200, self.find_board(segments[0])
+        if len(segments) == 2:
+            if method == "POST":
+                return 201, self.create_list(segments[0], data)
+            return 200, list(self.find_board(segments[0])["lists"])
+        if method == "PUT":
+            return 200, self.move_list(segments[0], segments[2], data)
+        raise HttpError(405, "Method Not Allowed")
+
+    def _issues(self, method: str, segments: list, query: dict, data: dict):
+        if not segments:
+            if method == "POST":
+                return 201, self.create_issue(data)
+            return 200, self.list_issues(query)
+        if method == "PUT":
+            return 200, self.update_issue(segments[0], data)
+        if method == "DELETE":
+            self.delete_issue(segments[0])
+            return 204, None
+        return 200, self.find_issue(segments[0])
+
+
+def _split(value) -> list:
+    """Splits a comma separated label list"""
+    if not value:
+        return []
+    if isinstance(value, list):
+        return value
+    return [name.strip() for name in str(value).split(",") if name.strip()]
+
+
+def _parse_time(value: str) -> datetime:
+    """Parses an ISO 8601 time"""
+    return datetime.fromisoformat(value.replace("Z", "+00:00"))
+
+
+def _page(payload: list, query: dict, path: str, base: str) -> tuple:
+    """Returns one page of a list and the GitLab pagination headers"""
+    per_page = min(int(query.get("per_page", 20)), 100)
+    page = max(int(query.get("page", 1)), 1)
+    total_pages = max(math.ceil(len(payload) / per_page), 1)
+    headers = {
+        "X-Page": str(page),
+        "X-Per-Page": str(per_page),
+        "X-Total": str(len(payload)),
+        "X-Total-Pages": str(total_pages),
+        "X-Next-Page": str(page + 1) if page < total_pages else "",
+    }
+    if page < total_pages:
+        next_query = urllib.parse.urlencode(dict(query, page=page + 1))
+        headers["Link"] = f'<{base}{path}?{next_query}>; rel="next"'
+    return payload[(page - 1) * per_page: page * per_page], headers
+
+
+def _handler(mock: MockGitLab):
+    """Builds the request handler class bound to a mock"""
+
+    class Handler(BaseHTTPRequestHandler):
+        """Serves the mock GitLab API"""
+
+        protocol_version = "HTTP/1.1"
+        disable_nagle_algorithm = True
+
+        def log_message(self, *args):  # pylint: disable=arguments-differ
+            pass
+
+        def _send(self, status: int, payload=None, headers: dict = None):
+            body = b"" if payload is None else json.dumps(payload).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _handle(self, method: str):
+            parsed = urllib.parse.urlsplit(self.path)
+            query = dict(urllib.parse.parse_qsl(parsed.query))
+            length = int(self.headers.get("Content-Length") or 0)
+            data = json.loads(self.rfile.read(length) or b"{}") if length else {}
+            headers = {}
+            try:
+                headers = mock.throttle()
+                mock.delay()
+                mock.maybe_fail()
+                status, payload = mock.route(method, parsed.path, query, data)
+            except HttpError as error:
+                if error.status == 429:
+                    message, wait, reset = error.message.split("|")
+                    headers = {"Retry-After": wait, "RateLimit-Remaining": "0", "RateLimit-Reset": reset}
+                    return self._send(429, {"message": message}, headers)
+                return self._send(error.status, {"message": error.message}, headers)
+            except (KeyError, ValueError) as error:
+                return self._send(400, {"message": f"400 Bad request - {error}"}, headers)
+            if method == "GET" and isinstance(payload, list):
+                payload, page_headers = _page(payload, query, parsed.path, mock.url)
+                headers.update(page_headers)
+            return self._send(status, payload, headers)
+
+        def do_GET(self):  # pylint: disable=invalid-name
+            """Handles GET"""
+            self._handle("GET")
+
+        def do_POST(self):  # pylint: disable=invalid-name
+            """Handles POST"""
+            self._handle("POST")
+
+        def do_PUT(self):  # pylint: disable=invalid-name
+            """Handles PUT"""
+            self._handle("PUT")
+
+        def do_DELETE(self):  # pylint: disable=invalid-name
+            """Handles DELETE"""
+            self._handle("DELETE")
+
+    return Handler
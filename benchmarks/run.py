@@ -0,0 +1,221 @@
+######################################################################
+# Copyright 2022 John Rofrano. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the 'License');
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an 'AS IS' BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+######################################################################
+
+"""
+Benchmark Runner
+
+Runs the kanban commands against a local MockGitLab at several data sizes
+and writes throughput, latency percentiles and peak RSS to a JSON file.
+
+    python -m benchmarks.run --sizes 100,1000 --latency 0.01 --output results.json
+    python -m benchmarks.run --sizes 100,1000 --baseline results.json
+"""
+import argparse
+import csv
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.mock_gitlab import MockGitLab, load_fixture
+
+REGRESSION = 0.10
+
+
+def write_labels(path: str, size: int) -> None:
+    """Writes a labels CSV with size rows based on the label fixture"""
+    template = load_fixture("labels.json")
+    with open(path, "w", newline="", encoding="utf-8") as csv_file:
+        writer = csv.DictWriter(csv_file, fieldnames=["name", "color", "text_color", "description"])
+        writer.writeheader()
+        for number in range(size):
+            label = template[number % len(template)]
+            writer.writerow(dict(label, name=f"{label['name']} {number}"))
+
+
+def write_issues(path: str, size: int) -> None:
+    """Writes an issues CSV with size rows based on the issue fixture
+
+    The issues use the first two labels written by write_labels so that
+    they pass the check that every label exists
+    """
+    template = load_fixture("issue.json")
+    labels = [f"{label['name']} {number}" for number, label in enumerate(load_fixture("labels.json")[:2])]
+    with open(path, "w", newline="", encoding="utf-8") as csv_file:
+        writer = csv.DictWriter(csv_file, fieldnames=["title", "description", "labels"])
+        writer.writeheader()
+        for number in range(size):
+            writer.writerow(
+                {
+                    "title": f"{template['title']} {number}",
+                    "description": template["description"],
+                    "labels": ",".join(labels),
+                }
+            )
+
+
+def scenarios(directory: str, size: int, workers: int) -> list:
+    """Returns the (name, kanban arguments) to run for one size"""
+    labels = os.path.join(directory, f"labels-{size}.csv")
+    issues = os.path.join(directory, f"issues-{size}.csv")
+    write_labels(labels, size)
+    write_issues(issues, size)
+    jobs = ["--workers", str(workers)]
+    return [
+        ("labels create", ["labels", "create", "-i", labels] + jobs),
+        ("labels list", ["labels", "list"]),
+        ("boards create", ["boards", "create", "-n", "Benchmark", "-i", labels] + jobs),
+        ("boards list", ["boards", "list"]),
+        ("issues create", ["issues", "create", "-i", issues] + jobs),
+        ("issues list", ["issues", "list"]),
+        ("issues delete", ["issues", "delete", "-i", issues] + jobs),
+    ]
+
+
+def run_command(url: str, args: list, stats_path: str) -> dict:
+    """Runs one kanban command in a child process and measures it"""
+    command = [
+        sys.executable, "-m", "kanban", "-t", "benchmark", "-p", "1", "-u", url,
+        "--stats-json", stats_path,
+    ] + args
+    started = time.perf_counter()
+    with open(os.devnull, "w", encoding="utf-8") as devnull:
+        process = subprocess.Popen(command, stdout=devnull, stderr=subprocess.PIPE)  # pylint: disable=consider-using-with
+        stderr = process.stderr.read()
+        _, status, usage = os.wait4(process.pid, 0)
+        process.returncode = os.waitstatus_to_exitcode(status)
+    elapsed = time.perf_counter() - started
+    result = {
+        "exit_code": process.returncode,
+        "wall_seconds": round(elapsed, 3),
+        # ru_maxrss is in kilobytes on Linux and bytes on macOS
+        "peak_rss_kb": usage.ru_maxrss // 1024 if sys.platform == "darwin" else usage.ru_maxrss,
+    }
+    if process.returncode:
+        result["error"] = stderr.decode("utf-8", "replace").strip().splitlines()[-1:]
+    if os.path.exists(stats_path):
+        with open(stats_path, encoding="utf-8") as stats_file:
+            stats = json.load(stats_file)
+        result.update(
+            {
+                "requests": stats["requests"],
+                "requests_per_second": round(stats["requests"] / elapsed, 1) if elapsed else 0.0,
+                "latency_ms": {key: round(value * 1000, 2) for key, value in stats["latency"].items() if key != "count"},
+                "retries": stats["retries"],
+                "status_codes": stats["status_codes"],
+            }
+        )
+        os.remove(stats_path)
+    return result
+
+
+def run(options: argparse.Namespace) -> dict:
+    """Runs every scenario at every size, each against a fresh server"""
+    results = {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "settings": {
+            "latency": options.latency,
+            "jitter": options.jitter,
+            "error_rate": options.error_rate,
+            "rate_limit": options.rate_limit,
+            "workers": options.workers,
+            "seed": options.seed,
+        },
+        "results": [],
+    }
+    with tempfile.TemporaryDirectory() as directory:
+        stats_path = os.path.join(directory, "stats.json")
+        for size in options.sizes:
+            mock = MockGitLab(options.latency, options.jitter, options.error_rate, options.rate_limit, options.seed)
+            with mock:
+                for name, args in scenarios(directory, size, options.workers):
+                    result = dict(run_command(mock.url, args, stats_path), scenario=name, size=size)
+                    results["results"].append(result)
+                    if result["exit_code"]:
+                        print(f"{name:<15} {size:>6} rows  FAILED with exit code {result['exit_code']}: {result.get('error')}")
+                        continue
+                    print(
+                        f"{name:<15} {size:>6} rows  {result['wall_seconds']:>8.2f}s  "
+                        f"{result.get('requests_per_second', 0):>8.1f} req/s  "
+                        f"p95 {result.get('latency_ms', {}).get('p95', 0):>7.1f} ms  "
+                        f"{result['peak_rss_kb'] / 1024:>6.1f} MB"
+                    )
+    return results
+
+
+def failures(results: dict) -> list:
+    """Returns the results of the scenarios whose command failed"""
+    return [item for item in results["results"] if item.get("exit_code")]
+
+
+def compare(results: dict, baseline: dict, threshold: float = REGRESSION) -> list:
+    """Returns a description of each scenario that got slower than the baseline
+
+    Scenarios that failed in either run are left out since their times mean nothing
+    """
+    previous = {(item["scenario"], item["size"]): item for item in baseline["results"] if not item.get("exit_code")}
+    regressions = []
+    for item in results["results"]:
+        before = previous.get((item["scenario"], item["size"]))
+        if item.get("exit_code") or not before or not before.get("wall_seconds"):
+            continue
+        change = item["wall_seconds"] / before["wall_seconds"] - 1
+        if change > threshold:
+            regressions.append(
+                f"{item['scenario']} at {item['size']} rows: "
+                f"{before['wall_seconds']:.2f}s -> {item['wall_seconds']:.2f}s ({change:+.0%})"
+            )
+    return regressions
+
+
+def main(argv: list = None) -> int:
+    """Parses the arguments and runs the benchmarks"""
+    parser = argparse.ArgumentParser(description="Benchmark kanban against a mock GitLab server")
+    parser.add_argument("--sizes", default="100,1000,10000", type=lambda value: [int(n) for n in value.split(",")])
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds added to every response")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Random seconds added or removed")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests that return 503")
+    parser.add_argument("--rate-limit", type=float, default=None, help="Requests per second before 429s")
+    parser.add_argument("--workers", type=int, default=8, help="--workers passed to the commands")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for jitter and errors")
+    parser.add_argument("--output", default="benchmark-results.json", help="Where to write the results")
+    parser.add_argument("--baseline", default=None, help="Results file to compare against")
+    parser.add_argument("--threshold", type=float, default=REGRESSION, help="Slowdown that counts as a regression")
+    options = parser.parse_args(argv)
+
+    results = run(options)
+    with open(options.output, "w", encoding="utf-8") as output:
+        json.dump(results, output, indent=2)
+    print(f"Results written to {options.output}")
+
+    failed = failures(results)
+    for item in failed:
+        print(f"FAILED {item['scenario']} at {item['size']} rows (exit code {item['exit_code']})")
+    regressions = []
+    if options.baseline:
+        with open(options.baseline, encoding="utf-8") as baseline:
+            regressions = compare(results, json.load(baseline), options.threshold)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+    return 1 if failed or regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,4 @@
+"""Runs the kanban command line interface with python -m kanban"""
+from kanban.cli import cli
+
+cli()  # pylint: disable=no-value-for-parameter
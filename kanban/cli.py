@@ -23,11 +23,123 @@ create labels as well. Finally it can create Issues to populate a Kanban board
 from a Comma Separated Value (CSV) file.
 """
 import csv
+import json
+from typing import TYPE_CHECKING, Callable, Iterable, Iterator, Optional
 import click
-from tqdm import tqdm
 
-from kanban.models.board import Board
-from .models import GitLab, Label, Issue
+from . import workers as pool
+from .projects import echo, fan_out, is_multi_project
+
+# The models pull in requests, so they are imported by the commands that
+# use them to keep --help and argument errors fast
+# pylint: disable=import-outside-toplevel
+if TYPE_CHECKING:
+    from .models import GitLab
+    from .models.metrics import Metrics
+    from .models.mirror import Mirror
+
+
+def worker_options(func):
+    """Adds the --workers and --ordered options to a bulk command"""
+    func = click.option(
+        "--ordered",
+        is_flag=True,
+        default=False,
+        help="Report results in the same order as the input rows",
+    )(func)
+    func = click.option(
+        "--workers",
+        "-w",
+        type=click.IntRange(min=1),
+        default=1,
+        show_default=True,
+        help="The number of rows to send to GitLab at the same time",
+    )(func)
+    return func
+
+
+def journal_options(func):
+    """Adds the --journal and --resume options to an import command"""
+    func = click.option(
+        "--resume",
+        is_flag=True,
+        default=False,
+        help="Skip the rows that the journal records as already sent",
+    )(func)
+    func = click.option(
+        "--journal",
+        "journal_path",
+        type=click.Path(dir_okay=False),
+        default=None,
+        help="SQLite file to record each row in [default with --resume: INFILE.journal]",
+    )(func)
+    return func
+
+
+def validate_option(func):
+    """Adds the --validate/--no-validate option to a create command"""
+    return click.option(
+        "--validate/--no-validate",
+        default=True,
+        show_default=True,
+        help="Check the whole CSV file before sending anything to GitLab",
+    )(func)
+
+
+def purge_options(func):
+    """Adds the --workers, --dry-run and --yes options to a purge command"""
+    func = click.option("--yes", "-y", is_flag=True, default=False, help="Do not ask before deleting")(func)
+    func = click.option(
+        "--dry-run", is_flag=True, default=False, help="Only count what would be deleted"
+    )(func)
+    func = click.option(
+        "--workers",
+        "-w",
+        type=click.IntRange(min=1),
+        default=1,
+        show_default=True,
+        help="The number of deletes to send to GitLab at the same time",
+    )(func)
+    return func
+
+
+def export_options(default_fields: str):
+    """Adds the output, format, fields and workers options to an export command"""
+
+    def decorator(func):
+        func = click.option(
+            "--workers",
+            "-w",
+            type=click.IntRange(min=1),
+            default=1,
+            show_default=True,
+            help="Pages to fetch at the same time when GitLab reports the page count",
+        )(func)
+        func = click.option(
+            "--fields",
+            "-f",
+            default=default_fields,
+            show_default=True,
+            help="Comma separated list of the fields to export",
+        )(func)
+        func = click.option(
+            "--format",
+            "output_format",
+            type=click.Choice(["csv", "ndjson"]),
+            default="csv",
+            show_default=True,
+            help="The output format",
+        )(func)
+        func = click.option(
+            "--outfile",
+            "-o",
+            type=click.Path(dir_okay=False, writable=True, allow_dash=True),
+            default="-",
+            help="The file to write to [default: standard output]",
+        )(func)
+        return func
+
+    return decorator
 
 
 @click.group()
@@ -43,7 +155,8 @@ from .models import GitLab, Label, Issue
     "--project",
     required=True,
     envvar="GITLAB_PROJECT",
-    help="The GitLab project ID or set env GITLAB_PROJECT",
+    help="The GitLab project ID or set env GITLAB_PROJECT. The labels and boards "
+    "commands also take a comma separated list, @FILE of ids, or group:ID",
 )
 @click.option(
     "-u",
@@ -53,13 +166,169 @@ from .models import GitLab, Label, Issue
     default="https://gitlab.com",
     help="GitLab URL [optional] defaults to https://gitlab.com",
 )
+@click.option(
+    "--rate-limit",
+    type=float,
+    envvar="GITLAB_RATE_LIMIT",
+    default=None,
+    help="Maximum requests per second to send [optional] or set env GITLAB_RATE_LIMIT",
+)
+@click.option(
+    "--rate-lock-file",
+    type=click.Path(dir_okay=False),
+    envvar="GITLAB_RATE_LOCK_FILE",
+    default=None,
+    help="File used to share the rate limit between processes [optional]",
+)
+@click.option(
+    "--retries",
+    type=click.IntRange(min=0),
+    envvar="GITLAB_RETRIES",
+    default=3,
+    show_default=True,
+    help="How many times to retry a request that failed for a transient reason",
+)
+@click.option(
+    "--timeout",
+    type=click.FloatRange(min=0, min_open=True),
+    envvar="GITLAB_TIMEOUT",
+    default=30.0,
+    show_default=True,
+    help="Seconds to wait for GitLab to respond before retrying a request",
+)
+@click.option(
+    "--cache-dir",
+    type=click.Path(file_okay=False),
+    envvar="GITLAB_CACHE_DIR",
+    default=None,
+    help="Directory to cache GET responses in [optional] or set env GITLAB_CACHE_DIR",
+)
+@click.option(
+    "--cache-ttl",
+    type=float,
+    default=86400,
+    show_default=True,
+    help="Seconds to keep cached responses",
+)
+@click.option(
+    "--mirror-dir",
+    type=click.Path(file_okay=False),
+    envvar="GITLAB_MIRROR_DIR",
+    default=None,
+    help="Directory of SQLite mirrors to answer lookups and lists from [optional] or set env GITLAB_MIRROR_DIR",
+)
+@click.option(
+    "--refresh",
+    is_flag=True,
+    default=False,
+    help="Fetch the changes since the last sync into the mirror before running",
+)
+@click.option(
+    "--full-refresh",
+    is_flag=True,
+    default=False,
+    help="Fetch everything into the mirror again before running, dropping issues deleted outside kanban",
+)
+@click.option(
+    "--project-workers",
+    type=click.IntRange(min=1),
+    default=4,
+    show_default=True,
+    help="The number of projects to work on at the same time",
+)
+@click.option(
+    "--stats", is_flag=True, default=False, help="Print request latency and throughput when done"
+)
+@click.option(
+    "--stats-json",
+    type=click.Path(dir_okay=False, writable=True),
+    default=None,
+    help="Write the raw request metrics to this JSON file when done",
+)
 @click.pass_context
-def cli(ctx, token, project, gitlab_url):
+def cli(
+    ctx, token, project, gitlab_url, rate_limit, rate_lock_file, retries, timeout, cache_dir, cache_ttl, mirror_dir,
+    refresh, full_refresh, project_workers, stats, stats_json
+):
     """GitLab Kanban Board Command Line Interface"""
+    # pylint: disable=too-many-arguments
     ctx.ensure_object(dict)
     ctx.obj["PROJECT"] = project
+    ctx.obj["PROJECT_WORKERS"] = project_workers
     ctx.obj["GITLAB_TOKEN"] = token
-    ctx.obj["GITLAB"] = GitLab(project, token, gitlab_url)
+    ctx.obj["GITLAB_OPTIONS"] = {
+        "url": gitlab_url,
+        "rate_limit": rate_limit,
+        "rate_lock_file": rate_lock_file,
+        "retries": retries,
+        "timeout": timeout,
+        "cache_dir": cache_dir,
+        "cache_ttl": cache_ttl,
+        "mirror_dir": mirror_dir,
+        "refresh": refresh,
+        "full_refresh": full_refresh,
+        "stats": stats,
+        "stats_json": stats_json,
+    }
+
+
+def get_gitlab(ctx) -> "GitLab":
+    """Returns the GitLab client of a command, building it on first use"""
+    if ctx.obj.get("GITLAB") is None:
+        from .models import GitLab
+        from .models.cache import ResponseCache
+        from .models.ratelimit import RateLimiter
+
+        root = ctx.find_root()
+        options = ctx.obj["GITLAB_OPTIONS"]
+        rate_limiter = RateLimiter(rate=options["rate_limit"], lock_file=options["rate_lock_file"])
+        cache = ResponseCache(options["cache_dir"], ttl=options["cache_ttl"]) if options["cache_dir"] else None
+        gitlab = GitLab(
+            ctx.obj["PROJECT"], ctx.obj["GITLAB_TOKEN"], options["url"], rate_limiter=rate_limiter,
+            retries=options["retries"], cache=cache, timeout=options["timeout"]
+        )
+        root.call_on_close(gitlab.close)
+        if options["stats"] or options["stats_json"]:
+            from .models.metrics import Metrics
+
+            metrics = Metrics()
+            gitlab.add_hook(metrics)
+            root.call_on_close(lambda: write_stats(metrics, options["stats"], options["stats_json"]))
+        # The command contexts share the group's obj so this caches it for all of them
+        ctx.obj["GITLAB"] = gitlab
+    return ctx.obj["GITLAB"]
+
+
+def get_mirror(ctx, read: bool = True) -> Optional["Mirror"]:
+    """Returns the mirror of the command's project when --mirror-dir is set, syncing it when needed
+
+    Commands that only write pass read=False so a mirror that was never
+    synced is not listed in full just to record their changes; the first
+    command that reads from it syncs it.
+    """
+    options = ctx.obj["GITLAB_OPTIONS"]
+    if not options["mirror_dir"]:
+        return None
+    mirror = ctx.obj.get("MIRROR")
+    if mirror is None or mirror.project != ctx.obj["PROJECT"]:
+        from .models.mirror import Mirror
+
+        mirror = Mirror(options["mirror_dir"], get_gitlab(ctx))
+        ctx.find_root().call_on_close(mirror.close)
+        ctx.obj["MIRROR"] = mirror
+        ctx.obj["MIRROR_CHECKED"] = False
+    if ctx.obj["MIRROR_CHECKED"]:
+        return mirror
+    refresh = options["refresh"] or options["full_refresh"]
+    if refresh or (read and mirror.synced is None):
+        counts = mirror.sync(full=options["full_refresh"])
+        echo(
+            f"Mirror synced: {counts['labels']} labels, {counts['boards']} boards, {counts['issues']} changed issues",
+            err=True,
+        )
+    if refresh or read:
+        ctx.obj["MIRROR_CHECKED"] = True
+    return mirror
 
 
 ######################################################################
@@ -83,31 +352,62 @@ def labels():
     required=True,
     help="The CSV file with labels",
 )
+@worker_options
+@journal_options
+@validate_option
+@fan_out
 @click.pass_context
-def create_labels(ctx, infile):
+def create_labels(ctx, infile, workers, ordered, journal_path, resume, validate):
     """Creates labels for a project from a CVS file"""
-    click.echo(f"Creating labels for project {ctx.obj['PROJECT']}...")
-    click.echo(f"Processing {infile}...")
-    label_data = csv_to_dict(infile)
-    click.echo(f"Found {len(label_data)} labels...")
-    click.echo("Sending to GitLab...")
-    label = Label(ctx.obj["GITLAB"])
-    for entry in tqdm(label_data, total=len(label_data)):
-        label.create(entry)
-    click.echo("Done")
+    from .models import Label
+
+    echo(f"Creating labels for project {ctx.obj['PROJECT']}...")
+    echo(f"Processing {infile}...")
+    total = count_csv_rows(infile)
+    echo(f"Found about {total} labels...")
+    if validate:
+        from .validation import validate_labels
+
+        preflight(ctx, validate_labels(iter_csv(infile)), infile)
+    echo("Sending to GitLab...")
+    label = Label(get_gitlab(ctx), get_mirror(ctx, read=False))
+    create = journaled(ctx, requires("name")(label.create), infile, journal_path, resume)
+    summary = pool.run(create, iter_csv(infile), workers, ordered, total)
+    report(ctx, summary, "name")
 
 
 # ---------------------------------------------------------------------
 # LIST LABELS
 # ---------------------------------------------------------------------
 @labels.command("list")
+@click.option(
+    "--limit", "-l", type=click.IntRange(min=0), default=None, help="The maximum number of labels to return"
+)
+@fan_out
 @click.pass_context
-def list_labels(ctx):
+def list_labels(ctx, limit):
     """Returns all of the labels for a project"""
-    click.echo(f"Getting labels for project {ctx.obj['PROJECT']}...")
-    label = Label(ctx.obj["GITLAB"])
-    results = label.all()
-    click.echo(results)
+    from .models import Label
+
+    echo(f"Getting labels for project {ctx.obj['PROJECT']}...")
+    label = Label(get_gitlab(ctx), get_mirror(ctx))
+    results = list(label.all(limit=limit))
+    echo(results)
+
+
+# ---------------------------------------------------------------------
+# EXPORT LABELS
+# ---------------------------------------------------------------------
+@labels.command("export")
+@export_options("name,color,text_color,description")
+@click.pass_context
+def export_labels(ctx, outfile, output_format, fields, workers):
+    """Exports the labels of a project in the labels create CSV format"""
+    from .models import Label
+
+    label = Label(get_gitlab(ctx))
+    count = write_export(label.all(workers=workers), outfile, output_format, fields.split(","))
+    echo(f"Exported {count} labels", err=True)
 
 
 # ---------------------------------------------------------------------
@@ -121,18 +421,104 @@ def list_labels(ctx):
     required=True,
     help="The CSV file with the labels to delete",
 )
+@worker_options
+@fan_out
 @click.pass_context
-def delete_labels(ctx, infile):
+def delete_labels(ctx, infile, workers, ordered):
     """Deletes labels for a project from a CVS file"""
-    click.echo(f"Deleting labels for project {ctx.obj['PROJECT']}...")
-    click.echo(f"Processing {infile}...")
-    label_data = csv_to_dict(infile)
-    click.echo(f"Found {len(label_data)} labels...")
-    click.echo("Sending to GitLab...")
-    label = Label(ctx.obj["GITLAB"])
-    for entry in tqdm(label_data, total=len(label_data)):
-        label.delete_by_name(entry["name"])
-    click.echo("Done")
+    from .models import Label
+
+    echo(f"Deleting labels for project {ctx.obj['PROJECT']}...")
+    echo(f"Processing {infile}...")
+    total = count_csv_rows(infile)
+    echo(f"Found about {total} labels...")
+    echo("Sending to GitLab...")
+    label = Label(get_gitlab(ctx), get_mirror(ctx, read=False))
+    summary = pool.run(
+        requires("name")(lambda entry: label.delete_by_name(entry["name"])),
+        iter_csv(infile),
+        workers,
+        ordered,
+        total,
+    )
+    report(ctx, summary, "name")
+
+
+# ---------------------------------------------------------------------
+# PURGE LABELS
+# ---------------------------------------------------------------------
+@labels.command("purge")
+@purge_options
+@fan_out
+@click.pass_context
+def purge_labels(ctx, workers, dry_run, yes):
+    """Deletes every label in a project"""
+    from .models import Label
+
+    purge(ctx, Label(get_gitlab(ctx), get_mirror(ctx, read=False)), "labels", workers, dry_run, yes)
+
+
+# ---------------------------------------------------------------------
+# SYNC LABELS
+# ---------------------------------------------------------------------
+@labels.command("sync")
+@click.option(
+    "--infile",
+    "-i",
+    type=click.Path(exists=True),
+    required=True,
+    help="The CSV file with the labels the project should have",
+)
+@click.option(
+    "--prune", is_flag=True, default=False, help="Delete labels that are not in the CSV file"
+)
+@click.option(
+    "--dry-run", is_flag=True, default=False, help="Only print the changes that would be made"
+)
+@click.option("--yes", "-y", is_flag=True, default=False, help="Do not ask before deleting labels")
+@worker_options
+@validate_option
+@fan_out
+@click.pass_context
+def sync_labels(ctx, infile, prune, dry_run, yes, workers, ordered, validate):
+    """Makes a project's labels match a CVS file, sending only the changes"""
+    from .models import Label
+
+    # pylint: disable=too-many-arguments
+    echo(f"Syncing labels for project {ctx.obj['PROJECT']}...")
+    echo(f"Processing {infile}...")
+    rows = csv_to_dict(infile)
+    if validate:
+        from .validation import validate_labels
+
+        # Labels that already exist are only updated so their color may be left out
+        preflight(ctx, validate_labels(rows, require_color=False), infile)
+    label = Label(get_gitlab(ctx), get_mirror(ctx, read=False))
+    plan = label.plan_sync(rows, prune)
+    echo_sync_plan(plan)
+    if dry_run:
+        return
+    if plan["delete"] and not yes:
+        if ctx.obj.get("FAN_OUT"):
+            raise click.UsageError("Use --yes to delete labels across several projects")
+        click.confirm(f"Delete {len(plan['delete'])} labels?", abort=True)
+    operations = (
+        [("create", row) for row in plan["create"]]
+        + [("update", change) for change in plan["update"]]
+        + [("delete", item) for item in plan["delete"]]
+    )
+
+    def apply(operation: tuple):
+        action, target = operation
+        if action == "create":
+            return label.create(target)
+        if action == "update":
+            return label.update(target[0]["id"], target[1])
+        return label.delete_by_id(target["id"])
+
+    echo("Sending to GitLab...")
+    summary = pool.run(apply, operations, workers, ordered, len(operations))
+    report(ctx, summary, "name")
 
 
 ######################################################################
@@ -149,16 +535,52 @@ def boards():
 # LIST BOARDS
 # ---------------------------------------------------------------------
 @boards.command("list")
+@click.option(
+    "--limit", "-l", type=click.IntRange(min=0), default=None, help="The maximum number of boards to return"
+)
+@fan_out
 @click.pass_context
-def list_boards(ctx):
+def list_boards(ctx, limit):
     """Returns all of the kanban boards for a project"""
-    click.echo(f"Getting kanban boards for project {ctx.obj['PROJECT']}...")
-    board = Board(ctx.obj["GITLAB"])
-    board_data = board.all()
+    from .models import Board
+
+    echo(f"Getting kanban boards for project {ctx.obj['PROJECT']}...")
+    board = Board(get_gitlab(ctx), get_mirror(ctx))
+    board_data = board.all(limit=limit)
     board_list = []
     for item in board_data:
         board_list.append(dict(id=item['id'], name=item['name']))
-    click.echo(board_list)
+    echo(board_list)
+
+
+# ---------------------------------------------------------------------
+# SHOW BOARDS
+# ---------------------------------------------------------------------
+@boards.command("show")
+@click.option("--board_id", "-b", required=True, help="The id of the kanban board")
+@click.option("--json", "as_json", is_flag=True, default=False, help="Print the board as JSON")
+@fan_out
+@click.pass_context
+def show_boards(ctx, board_id, as_json):
+    """Shows a kanban board with the issues in each of its lists"""
+    from .models import Board
+
+    board = Board(get_gitlab(ctx))
+    snapshot = board.snapshot(board_id)
+    if not snapshot:
+        echo(f"Board {board_id} not found")
+        record(ctx, board_id, "not found")
+        ctx.exit(1)
+    record(ctx, board_id)
+    if as_json:
+        echo(json.dumps(snapshot, indent=2))
+        return
+    echo(f"Board {snapshot['id']}: {snapshot['name']}")
+    for board_list in snapshot["lists"]:
+        echo(f"\n{board_list['title']} ({len(board_list['issues'])})")
+        for item in board_list["issues"]:
+            assignees = ", ".join(item["assignees"])
+            echo(f"  #{item['iid']} {item['title']}" + (f" [{assignees}]" if assignees else ""))
 
 
 # ---------------------------------------------------------------------
@@ -173,35 +595,66 @@ def list_boards(ctx):
     help="The CSV file with list labels",
 )
 @click.option("--name", "-n", required=True, help="The name of the kanban board")
+@click.option(
+    "--workers",
+    "-w",
+    type=click.IntRange(min=1),
+    default=1,
+    show_default=True,
+    help="The number of labels and lists to send to GitLab at the same time",
+)
+@validate_option
+@fan_out
 @click.pass_context
-def create_boards(ctx, infile, name):
+def create_boards(ctx, infile, name, workers, validate):
     """Creates kanban board for a project from a CVS file of labels"""
-    click.echo(f"Creating kanban board for project {ctx.obj['PROJECT']}...")
-    click.echo(f"Processing {infile}...")
-    board = Board(ctx.obj["GITLAB"])
-    # generate board
-    board_data = {"name": name}
-    click.echo("Sending to GitLab...")
-    results = board.create(board_data)
-    board_id = results["id"]
-    board_data["id"] = board_id
-    click.echo(f"Board {board_id} created")
-    click.echo(board)
+    from .models import Board
 
-    # Create the labels
-    click.echo("Creating labels...")
+    echo(f"Creating kanban board for project {ctx.obj['PROJECT']}...")
+    echo(f"Processing {infile}...")
+    board = Board(get_gitlab(ctx), get_mirror(ctx))
     label_data = csv_to_dict(infile)
-    click.echo(f"Found {len(label_data)} labels...")
-    label = Label(ctx.obj["GITLAB"])
-    for entry in tqdm(label_data, total=len(label_data)):
-        results = label.create(entry)
-        data = {"label_id": results["id"]}
-        results = board.create_list(board_id, data)
+    echo(f"Found {len(label_data)} labels...")
+    if validate:
+        from .validation import validate_labels
+
+        preflight(ctx, validate_labels(label_data, require_color=False), infile)
+    echo("Sending to GitLab...")
+
+    echo("Creating labels...")
+    label_ids, summary = create_board_labels(get_gitlab(ctx), label_data, workers, get_mirror(ctx))
+    if summary.failures:
+        # The board is only created once every list has a label, so a failure leaves no empty board
+        echo("Board was not created because some labels failed")
+        report(ctx, summary, "name")
+    results = board.create({"name": name})
+    if not results:
+        echo("Board was not created")
+        record(ctx, name, "board was not created")
+        ctx.exit(1)
+    board_id = results["id"]
+    echo(f"Board {board_id} created")
+
+    # Lists are positioned in the order they are created unless moved later
+    echo("Creating lists...")
+    summary = pool.run(
+        lambda label_id: board.create_list(board_id, {"label_id": label_id}),
+        label_ids,
+        workers,
+        total=len(label_ids),
+    )
+    # The lists are the rows that the projects table counts
+    ctx.obj["SUMMARY"] = summary
+    if summary.failures:
+        report(ctx, summary, "label_id")
+    if workers > 1:
+        moves = board.order_lists(board_id, label_ids)
+        echo(f"Moved {moves} lists into place")
 
     # Get the new board
     results = board.find(board_id)
-    click.echo(f"New board {name} created")
-    click.echo(results)
+    echo(f"New board {name} created")
+    echo(results)
 
 
 # ---------------------------------------------------------------------
@@ -209,15 +662,36 @@ def create_boards(ctx, infile, name):
 # ---------------------------------------------------------------------
 @boards.command("delete")
 @click.option("--board_id", "-b", required=True, help="The id of the kanban board")
+@fan_out
 @click.pass_context
 def delete_boards(ctx, board_id):
     """Deletes kanban board from a project"""
-    click.echo(f"Deleting kanban board for project {ctx.obj['PROJECT']}...")
+    from .models import Board
+
+    echo(f"Deleting kanban board for project {ctx.obj['PROJECT']}...")
     # Find the board
-    click.echo(f"Finding board with id {board_id}...")
-    board = Board(ctx.obj["GITLAB"])
-    board.delete_by_id(board_id)
-    click.echo(f"Board {board_id} deleted.")
+    echo(f"Finding board with id {board_id}...")
+    board = Board(get_gitlab(ctx), get_mirror(ctx, read=False))
+    if not board.delete_by_id(board_id):
+        echo(f"Board {board_id} was not deleted.")
+        record(ctx, board_id, "delete failed")
+        ctx.exit(1)
+    record(ctx, board_id)
+    echo(f"Board {board_id} deleted.")
+
+
+# ---------------------------------------------------------------------
+# PURGE BOARDS
+# ---------------------------------------------------------------------
+@boards.command("purge")
+@purge_options
+@fan_out
+@click.pass_context
+def purge_boards(ctx, workers, dry_run, yes):
+    """Deletes every board in a project"""
+    from .models import Board
+
+    purge(ctx, Board(get_gitlab(ctx), get_mirror(ctx, read=False)), "boards", workers, dry_run, yes)
 
 
 ######################################################################
@@ -226,8 +700,11 @@ def delete_boards(ctx, board_id):
 
 
 @cli.group()
-def issues():
+@click.pass_context
+def issues(ctx):
     """Create, list, update, delete Issues"""
+    if is_multi_project(ctx.obj["PROJECT"]):
+        raise click.UsageError("The issues commands work on one project at a time")
 
 
 # ---------------------------------------------------------------------
@@ -241,31 +718,62 @@ def issues():
     required=True,
     help="The CSV file with issues",
 )
+@worker_options
+@journal_options
+@validate_option
 @click.pass_context
-def create_issues(ctx, infile):
+def create_issues(ctx, infile, workers, ordered, journal_path, resume, validate):
     """Creates issues for a project from a CVS file"""
-    click.echo(f"Creating issues for project {ctx.obj['PROJECT']}...")
-    click.echo(f"Processing {infile}...")
-    issue_data = csv_to_dict(infile)
-    click.echo(f"Found {len(issue_data)} issues...")
-    click.echo("Sending to GitLab...")
-    issue = Issue(ctx.obj["GITLAB"])
-    for entry in tqdm(issue_data, total=len(issue_data)):
-        issue.create(entry)
-    click.echo("Done")
+    from .models import Issue, Label
+
+    echo(f"Creating issues for project {ctx.obj['PROJECT']}...")
+    echo(f"Processing {infile}...")
+    total = count_csv_rows(infile)
+    echo(f"Found about {total} issues...")
+    if validate:
+        from .validation import validate_issues
+
+        # One listing of the labels resolves the labels column of every row
+        label_names = Label(get_gitlab(ctx), get_mirror(ctx)).name_index()
+        preflight(ctx, validate_issues(iter_csv(infile), label_names), infile)
+    echo("Sending to GitLab...")
+    issue = Issue(get_gitlab(ctx), get_mirror(ctx, read=False))
+    create = journaled(ctx, requires("title")(issue.create), infile, journal_path, resume)
+    summary = pool.run(create, iter_csv(infile), workers, ordered, total)
+    report(ctx, summary, "title")
 
 
 # ---------------------------------------------------------------------
 # LIST ISSUES
 # ---------------------------------------------------------------------
 @issues.command("list")
+@click.option(
+    "--limit", "-l", type=click.IntRange(min=0), default=None, help="The maximum number of issues to return"
+)
 @click.pass_context
-def list_issues(ctx):
+def list_issues(ctx, limit):
     """Returns all of the issues for a project"""
-    click.echo(f"Getting issues for project {ctx.obj['PROJECT']}...")
-    issue = Issue(ctx.obj["GITLAB"])
-    results = issue.all()
-    click.echo(results)
+    from .models import Issue
+
+    echo(f"Getting issues for project {ctx.obj['PROJECT']}...")
+    issue = Issue(get_gitlab(ctx), get_mirror(ctx))
+    results = list(issue.all(limit=limit))
+    echo(results)
+
+
+# ---------------------------------------------------------------------
+# EXPORT ISSUES
+# ---------------------------------------------------------------------
+@issues.command("export")
+@export_options("title,description,labels")
+@click.pass_context
+def export_issues(ctx, outfile, output_format, fields, workers):
+    """Exports the issues of a project in the issues create CSV format"""
+    from .models import Issue
+
+    issue = Issue(get_gitlab(ctx))
+    count = write_export(issue.all(workers=workers), outfile, output_format, fields.split(","))
+    echo(f"Exported {count} issues", err=True)
 
 
 # ---------------------------------------------------------------------
@@ -279,23 +787,372 @@ def list_issues(ctx):
     required=True,
     help="The CSV file with the issues to delete",
 )
+@worker_options
 @click.pass_context
-def delete_issues(ctx, infile):
+def delete_issues(ctx, infile, workers, ordered):
     """Deletes issues for a project from a CVS file"""
-    click.echo(f"Deleting issues for project {ctx.obj['PROJECT']}...")
-    click.echo(f"Processing {infile}...")
-    issue_data = csv_to_dict(infile)
-    click.echo(f"Found {len(issue_data)} issues...")
-    click.echo("Sending to GitLab...")
-    issue = Issue(ctx.obj["GITLAB"])
-    for entry in tqdm(issue_data, total=len(issue_data)):
-        issue.delete(entry)
-    click.echo("Done")
+    from .models import Issue
+
+    echo(f"Deleting issues for project {ctx.obj['PROJECT']}...")
+    echo(f"Processing {infile}...")
+    total = count_csv_rows(infile)
+    echo(f"Found about {total} issues...")
+    echo("Sending to GitLab...")
+    issue = Issue(get_gitlab(ctx), get_mirror(ctx))
+    index = issue.title_index()
+    echo(f"Indexed {len(index)} issue titles...")
+    summary = pool.run(
+        requires("title")(lambda entry: issue.delete(entry, index)),
+        iter_csv(infile),
+        workers,
+        ordered,
+        total,
+    )
+    report(ctx, summary, "title")
+
+
+# ---------------------------------------------------------------------
+# PURGE ISSUES
+# ---------------------------------------------------------------------
+@issues.command("purge")
+@purge_options
+@click.pass_context
+def purge_issues(ctx, workers, dry_run, yes):
+    """Deletes every issue in a project"""
+    from .models import Issue
+
+    purge(ctx, Issue(get_gitlab(ctx), get_mirror(ctx, read=False)), "issues", workers, dry_run, yes)
+
+
+# ---------------------------------------------------------------------
+# WATCH ISSUES
+# ---------------------------------------------------------------------
+@issues.command("watch")
+@click.option(
+    "--interval", type=click.FloatRange(min=1), default=30, show_default=True, help="Seconds between polls"
+)
+@click.option("--board_id", "-b", default=None, help="Report moves between the lists of this board")
+@click.option("--polls", type=click.IntRange(min=1), default=None, help="Stop after this many polls")
+@click.option(
+    "--outfile",
+    "-o",
+    type=click.Path(dir_okay=False, writable=True, allow_dash=True),
+    default="-",
+    help="The file to write the events to [default: standard output]",
+)
+@click.pass_context
+def watch_issues(ctx, interval, board_id, polls, outfile):
+    """Writes an NDJSON event for every issue that changes, polling for updates"""
+    from .models import Board, Issue
+
+    gitlab = get_gitlab(ctx)
+    list_labels = None
+    if board_id:
+        lists = sorted(Board(gitlab).lists(board_id), key=lambda item: item["position"])
+        list_labels = [item["label"]["name"] for item in lists if item.get("label")]
+    echo(f"Watching issues for project {ctx.obj['PROJECT']}...", err=True)
+    with click.open_file(outfile, mode="w", encoding="utf-8") as events_file:
+        try:
+            for event in Issue(gitlab).watch(interval, list_labels, polls):
+                events_file.write(json.dumps(event) + "\n")
+                events_file.flush()
+        except KeyboardInterrupt:
+            echo("Stopped watching", err=True)
+
+
+# ---------------------------------------------------------------------
+# MOVE ISSUES
+# ---------------------------------------------------------------------
+@issues.command("move")
+@click.option(
+    "--infile",
+    "-i",
+    type=click.Path(exists=True),
+    default=None,
+    help="A CSV file of the issues to move by iid or title, with optional add_labels and remove_labels columns",
+)
+@click.option("--from-label", default=None, help="Move the issues in the board list for this label")
+@click.option("--to-label", default=None, help="The label of the board list to move the issues to")
+@click.option("--add-labels", default=None, help="Comma separated labels to add to each issue")
+@click.option("--remove-labels", default=None, help="Comma separated labels to remove from each issue")
+@click.option("--milestone", default=None, help="Only move issues in this milestone")
+@click.option("--assignee", default=None, help="Only move issues assigned to this username")
+@click.option(
+    "--state",
+    type=click.Choice(["opened", "closed", "all"]),
+    default="opened",
+    show_default=True,
+    help="Only move issues in this state",
+)
+@worker_options
+@click.pass_context
+def move_issues(
+    ctx, infile, from_label, to_label, add_labels, remove_labels, milestone, assignee, state, workers, ordered
+):
+    """Moves issues between board lists by adding and removing their labels"""
+    # pylint: disable=too-many-arguments,too-many-locals
+    from .models import Issue
+
+    filters = {"labels": from_label, "milestone": milestone, "assignee_username": assignee}
+    filters = {key: value for key, value in filters.items() if value}
+    if not infile and not filters:
+        raise click.UsageError("Give an --infile or at least one of --from-label, --milestone or --assignee")
+    changes = {
+        "add_labels": ",".join(name for name in (to_label, add_labels) if name),
+        "remove_labels": ",".join(name for name in (from_label, remove_labels) if name),
+    }
+    if not infile and not any(changes.values()):
+        raise click.UsageError("Give --to-label, --add-labels or --remove-labels")
+
+    echo(f"Moving issues for project {ctx.obj['PROJECT']}...")
+    issue = Issue(get_gitlab(ctx), get_mirror(ctx, read=False))
+    if infile:
+        echo(f"Processing {infile}...")
+        targets = move_targets(issue, csv_to_dict(infile), changes)
+    else:
+        params = dict(filters, state=state)
+        # Updating labels changes which page an issue is on, so collect them all first
+        targets = [
+            dict(changes, iid=record.iid, title=record.title)
+            for record in issue.records(fields=("iid", "title"), params=params)
+        ]
+    echo(f"Found {len(targets)} issues...")
+    echo("Sending to GitLab...")
+    with pool.progress_bar(total=len(targets)) as progress:
+        summary = issue.update_many(targets, workers, ordered, on_update=progress.update)
+    echo(f"Moved {summary.succeeded} issues")
+    report(ctx, summary, "title")
+
+
+######################################################################
+# A P P L Y   C O M M A N D
+######################################################################
+
+
+@cli.command("apply")
+@click.option(
+    "--manifest",
+    "-m",
+    type=click.File("r", encoding="utf-8"),
+    required=True,
+    help="The JSON manifest of labels, boards and issues",
+)
+@click.option(
+    "--workers",
+    "-w",
+    type=click.IntRange(min=1),
+    default=8,
+    show_default=True,
+    help="The number of operations to send to GitLab at the same time",
+)
+@click.option(
+    "--dry-run", is_flag=True, default=False, help="Only print the plan and its critical path"
+)
+@fan_out
+@click.pass_context
+def apply_manifest(ctx, manifest, workers, dry_run):
+    """Creates the labels, boards, lists and issues of a manifest in dependency order"""
+    from .planner import Plan
+
+    try:
+        plan = Plan.from_manifest(json.load(manifest))
+    except (ValueError, AttributeError, TypeError) as error:
+        raise click.UsageError(f"Invalid manifest: {error}") from error
+    echo(f"Applying {manifest.name} to project {ctx.obj['PROJECT']}...")
+    echo_plan(plan, verbose=dry_run)
+    if dry_run:
+        return
+    echo("Sending to GitLab...")
+    summary = plan.run(get_gitlab(ctx), workers, get_mirror(ctx))
+    report(ctx, summary, "key")
 
 
 ######################################################################
 # U T I L I T I E S
 ######################################################################
+def create_board_labels(gitlab: "GitLab", label_data: list, workers: int, mirror: Optional["Mirror"] = None) -> tuple:
+    """Creates the labels for board lists, reusing labels that already exist
+
+    Returns the label ids in the same order as label_data and the summary
+    """
+    from .models import Label
+
+    label = Label(gitlab, mirror)
+    index = label.name_index()
+    label_ids = []
+    summary = pool.Summary()
+    rows = pool.imap(lambda entry: label.find_or_create(entry, index), label_data, workers, ordered=True)
+    for position, entry, results, error in pool.progress_bar(rows, total=len(label_data)):
+        if error:
+            summary.failures.append(pool.Failure(position, entry, error))
+        else:
+            summary.succeeded += 1
+            label_ids.append(results["id"])
+    return label_ids, summary
+
+
+def echo_sync_plan(plan: dict) -> None:
+    """Prints the changes that labels sync will make"""
+    for row in plan["create"]:
+        echo(f"  + {row['name']}")
+    for label, changes in plan["update"]:
+        fields = ", ".join(f"{field}: {label.get(field)} -> {value}" for field, value in changes.items())
+        echo(f"  ~ {label['name']} ({fields})")
+    for label in plan["delete"]:
+        echo(f"  - {label['name']}")
+    echo(
+        f"Plan: {len(plan['create'])} to create, {len(plan['update'])} to update, "
+        f"{len(plan['delete'])} to delete, {len(plan['unchanged'])} unchanged"
+    )
+
+
+def echo_plan(plan, verbose: bool = False) -> None:
+    """Prints the waves of a plan and its critical path"""
+    waves = plan.waves()
+    for number, wave in enumerate(waves, start=1):
+        kinds = {}
+        for operation in wave:
+            kinds[operation.kind] = kinds.get(operation.kind, 0) + 1
+        counts = ", ".join(f"{count} {kind}s" for kind, count in kinds.items())
+        echo(f"Wave {number}: {len(wave)} operations ({counts})")
+        if verbose:
+            for operation in wave:
+                echo(f"  {operation}")
+    path = " -> ".join(str(operation) for operation in plan.critical_path())
+    echo(f"Plan: {len(plan)} operations in {len(waves)} waves, critical path length {len(waves)}")
+    if path:
+        echo(f"Critical path: {path}")
+
+
+def move_targets(issue, rows: list, changes: dict) -> list:
+    """Returns the issues named in CSV rows by iid or title with the label changes for each
+
+    Titles are looked up in one title index, and a title shared by several
+    issues moves all of them
+    """
+    index = issue.title_index() if any(not row.get("iid") for row in rows) else {}
+    targets = []
+    for row in rows:
+        target = {field: row.get(field) or value for field, value in changes.items()}
+        if row.get("iid"):
+            targets.append(dict(target, iid=row["iid"], title=row.get("title") or row["iid"]))
+            continue
+        for iid in index.get(row.get("title"), [None]):
+            targets.append(dict(target, iid=iid, title=row.get("title")))
+    return targets
+
+
+def purge(ctx, model, noun: str, workers: int, dry_run: bool, yes: bool) -> None:
+    """Deletes every object of a model in the project once confirmed"""
+    # pylint: disable=too-many-arguments
+    count = model.count()
+    echo(f"Found {count} {noun} in project {ctx.obj['PROJECT']}")
+    if dry_run or not count:
+        return
+    if not yes:
+        if ctx.obj.get("FAN_OUT"):
+            raise click.UsageError(f"Use --yes to purge {noun} across several projects")
+        click.confirm(f"Delete all {count} {noun}?", abort=True)
+    echo("Sending to GitLab...")
+    with pool.progress_bar(total=count) as progress:
+        deleted, failed = model.delete_all(workers, on_batch=progress.update)
+    if model.mirror:
+        # Whatever was not deleted is all that is left to list
+        model.mirror.sync(full=True)
+    summary = pool.Summary()
+    summary.succeeded = deleted
+    summary.failures = [pool.Failure(index, item_id, "delete failed") for index, item_id in enumerate(failed)]
+    echo(f"Deleted {deleted} {noun}")
+    report(ctx, summary, "id")
+
+
+def preflight(ctx, problems: list, infile: str) -> None:
+    """Prints the problems found in a CSV file and fails before anything is sent"""
+    if not problems:
+        return
+    echo(f"Found {len(problems)} problems in {infile}, nothing was sent to GitLab:")
+    for problem in problems:
+        echo(f"  {problem}")
+    ctx.exit(1)
+
+
+def journaled(ctx, func: Callable, infile: str, journal_path: str, resume: bool) -> Callable:
+    """Wraps a row function with a checkpoint journal when one is wanted"""
+    if not journal_path and not resume:
+        return func
+    from .journal import Journal
+
+    journal = Journal(journal_path or f"{infile}.journal", scope=ctx.obj["PROJECT"])
+    ctx.call_on_close(journal.close)
+    if resume:
+        counts = journal.counts()
+        echo(f"Resuming: {counts.get('done', 0)} rows done, {counts.get('failed', 0)} to retry")
+        ctx.call_on_close(lambda: echo(f"Skipped {journal.skipped} rows already sent"))
+    return journal.wrap(func, resume)
+
+
+def write_export(items: Iterable[dict], outfile: str, output_format: str, fields: list) -> int:
+    """Writes the fields of each item to outfile as CSV or NDJSON
+
+    Items are written as they arrive and the number written is returned
+    """
+    count = 0
+    with click.open_file(outfile, mode="w", encoding="utf-8") as export_file:
+        writer = None
+        if output_format == "csv":
+            writer = csv.DictWriter(export_file, fieldnames=fields, quoting=csv.QUOTE_ALL)
+            writer.writeheader()
+        for item in items:
+            row = {field: item.get(field) for field in fields}
+            if writer:
+                writer.writerow({field: csv_value(value) for field, value in row.items()})
+            else:
+                export_file.write(json.dumps(row) + "\n")
+            count += 1
+    return count
+
+
+def csv_value(value) -> str:
+    """Converts a GitLab value to the text used in the CSV files"""
+    if value is None:
+        return ""
+    if isinstance(value, list) and all(isinstance(entry, str) for entry in value):
+        return ",".join(value)
+    if isinstance(value, (list, dict)):
+        return json.dumps(value)
+    return value
+
+
+def write_stats(metrics: "Metrics", stats: bool, stats_json: str) -> None:
+    """Prints and saves the request metrics of a command"""
+    if stats:
+        echo(metrics.report(), err=True)
+    if stats_json:
+        with open(stats_json, mode="w", encoding="utf-8") as stats_file:
+            json.dump(metrics.summary(), stats_file, indent=2)
+
+
+def record(ctx, item, error: Optional[str] = None) -> None:
+    """Records the outcome of a command that works on one object for the projects table"""
+    summary = pool.Summary()
+    if error:
+        summary.failures.append(pool.Failure(0, item, error))
+    else:
+        summary.succeeded = 1
+    ctx.obj["SUMMARY"] = summary
+
+
+def report(ctx, summary: pool.Summary, key: str) -> None:
+    """Prints the summary of a bulk command and fails if any rows failed"""
+    ctx.obj["SUMMARY"] = summary
+    echo(f"Done: {summary.succeeded} succeeded, {summary.failed} failed")
+    for failure in summary.failures:
+        item = failure.item.get(key) if hasattr(failure.item, "get") else failure.item
+        echo(f"  row {failure.index + 1} ({item}): {failure.error}")
+    if summary.failures:
+        ctx.exit(1)
+
+
 def csv_to_dict(filename: str) -> list:
     """Converts a CSV file to a dictionary"""
     data = []
@@ -304,3 +1161,41 @@ def csv_to_dict(filename: str) -> list:
         for row in reader:
             data.append(row)
     return data
+
+
+def iter_csv(filename: str) -> Iterator[dict]:
+    """Yields the rows of a CSV file as dictionaries one at a time"""
+    with open(filename, mode="r", encoding="utf-8") as csv_file:
+        yield from csv.DictReader(csv_file)
+
+
+def count_csv_rows(filename: str) -> int:
+    """Counts the data lines of a CSV file without parsing it
+
+    Quoted values that span lines are counted more than once so this is
+    only an estimate for the progress bar
+    """
+    lines = 0
+    last = b"\n"
+    with open(filename, mode="rb") as csv_file:
+        for chunk in iter(lambda: csv_file.read(1024 * 1024), b""):
+            lines += chunk.count(b"\n")
+            last = chunk[-1:]
+    if last != b"\n":
+        lines += 1
+    return max(lines - 1, 0)
+
+
+def requires(*columns: str) -> Callable:
+    """Decorates a row function so rows missing a column fail before sending"""
+
+    def decorator(func: Callable) -> Callable:
+        def check(row: dict):
+            missing = [column for column in columns if not (row.get(column) or "").strip()]
+            if missing:
+                raise ValueError(f"missing {', '.join(missing)}")
+            return func(row)
+
+        return check
+
+    return decorator
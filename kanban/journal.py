@@ -0,0 +1,130 @@
+######################################################################
+# Copyright 2022 John Rofrano. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the 'License');
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an 'AS IS' BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+######################################################################
+
+"""
+Journal Module
+
+This module records the outcome of every row of a bulk import in a SQLite
+file so that an interrupted import can be resumed without asking GitLab
+which rows were already sent
+"""
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+import time
+from typing import Callable
+
+logger = logging.getLogger()
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS rows (
+    digest TEXT PRIMARY KEY,
+    status TEXT NOT NULL,
+    gitlab_id TEXT,
+    error TEXT,
+    updated REAL NOT NULL
+)
+"""
+
+
+######################################################################
+# J O U R N A L   C L A S S
+######################################################################
+class Journal:
+    """A checkpoint journal of the rows sent to GitLab
+
+    Rows are identified by a digest of their contents, and of the scope
+    such as the project they were sent to, so a row that was edited after
+    a failed run is sent again.
+    """
+
+    def __init__(self, path: str, scope: str = ""):
+        self.path = path
+        self.scope = scope
+        self.skipped = 0
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.execute(SCHEMA)
+        self._connection.commit()
+
+    def __repr__(self):
+        return f"<Journal {self.path}>"
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self) -> None:
+        """Closes the journal file"""
+        self._connection.close()
+
+    def digest(self, row: dict) -> str:
+        """Returns the key that identifies a row"""
+        text = json.dumps([self.scope, row], sort_keys=True)
+        return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+    def status(self, row: dict) -> str:
+        """Returns the recorded status of a row or None"""
+        with self._lock:
+            found = self._connection.execute(
+                "SELECT status FROM rows WHERE digest = ?", (self.digest(row),)
+            ).fetchone()
+        return found[0] if found else None
+
+    def record(self, row: dict, status: str, gitlab_id=None, error: str = None) -> None:
+        """Records the outcome of a row"""
+        with self._lock:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO rows VALUES (?, ?, ?, ?, ?)",
+                (self.digest(row), status, gitlab_id, error, time.time()),
+            )
+            self._connection.commit()
+
+    def counts(self) -> dict:
+        """Returns the number of rows recorded with each status"""
+        with self._lock:
+            return dict(self._connection.execute("SELECT status, COUNT(*) FROM rows GROUP BY status"))
+
+    def wrap(self, func: Callable, resume: bool = False) -> Callable:
+        """Wraps a row function to record its outcome
+
+        When resume is True rows that were already sent are skipped.
+        """
+
+        def journaled(row: dict):
+            if resume and self.status(row) == "done":
+                with self._lock:
+                    self.skipped += 1
+                return True
+            try:
+                result = func(row)
+            except Exception as error:
+                self.record(row, "failed", error=str(error))
+                raise
+            if result:
+                gitlab_id = result.get("iid", result.get("id")) if isinstance(result, dict) else None
+                self.record(row, "done", gitlab_id)
+            else:
+                self.record(row, "failed", error="GitLab request failed")
+            return result
+
+        return journaled
@@ -1,8 +1,31 @@
-"""Models of GitLab artifacts"""
+"""Models of GitLab artifacts
 
-from .gitlab import GitLab
-from .board import Board
-from .label import Label
-from .issue import Issue
+The models are imported on first use so that importing kanban.models does
+not load requests until a model is needed
+"""
+import importlib
 
-__all__ = ('GitLab', 'Board', 'Label', 'Issue')
+_MODULES = {
+    'GitLab': '.gitlab',
+    'Board': '.board',
+    'Label': '.label',
+    'Issue': '.issue',
+    'BoardRecord': '.records',
+    'IssueRecord': '.records',
+    'LabelRecord': '.records',
+    'Mirror': '.mirror',
+}
+
+__all__ = ('GitLab', 'Board', 'Label', 'Issue', 'BoardRecord', 'IssueRecord', 'LabelRecord', 'Mirror')
+
+
+def __getattr__(name: str):
+    if name not in _MODULES:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(_MODULES[name], __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(list(globals()) + list(__all__))
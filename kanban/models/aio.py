@@ -0,0 +1,302 @@
+######################################################################
+# Copyright 2022 John Rofrano. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the 'License');
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an 'AS IS' BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+######################################################################
+
+"""
+Asyncio GitLab Module
+
+This module contains asyncio counterparts of the GitLab, Label, Board and
+Issue classes. It needs the optional httpx dependency which is installed
+with: pip install gitlab-kanban[async]
+"""
+import asyncio
+import logging
+import urllib.parse
+from typing import AsyncIterator, Optional
+
+try:
+    import httpx
+except ImportError:  # pragma: no cover
+    httpx = None
+
+logger = logging.getLogger()
+
+
+######################################################################
+# A S Y N C   G I T L A B   W R A P P E R   C L A S S
+######################################################################
+class AsyncGitLab:
+    """An asyncio GitLab Wrapper
+
+    Every request goes through one shared httpx.AsyncClient connection pool
+    and at most concurrency requests are in flight at the same time.
+    """
+
+    def __init__(
+        self,
+        project: str,
+        token: str,
+        url: str = "https://gitlab.com",
+        pool_size: int = 20,
+        concurrency: int = 10,
+        transport=None,
+    ):
+        if httpx is None:
+            raise ImportError("AsyncGitLab needs httpx: pip install gitlab-kanban[async]")
+        self.project = project
+        self.token = token
+        self.url = url
+        self.headers = {"Authorization": f"Bearer {self.token}"}
+        self.client = httpx.AsyncClient(
+            headers=self.headers,
+            limits=httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size),
+            transport=transport,
+        )
+        self.concurrency = concurrency
+        # shared by every wrapper returned from for_project()
+        self._shared = {}
+
+    def __repr__(self):
+        return f"<AsyncGitLab {self.project}>"
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.close()
+
+    async def close(self) -> None:
+        """Closes the client and releases all pooled connections"""
+        await self.client.aclose()
+
+    def for_project(self, project: str) -> "AsyncGitLab":
+        """Returns a wrapper for another project sharing this pool and semaphore"""
+        other = self.__class__.__new__(self.__class__)
+        other.__dict__.update(self.__dict__)
+        other.project = project
+        return other
+
+    @property
+    def semaphore(self) -> asyncio.Semaphore:
+        """The semaphore is created lazily so it binds to the running loop"""
+        if "semaphore" not in self._shared:
+            self._shared["semaphore"] = asyncio.Semaphore(self.concurrency)
+        return self._shared["semaphore"]
+
+    async def _request(self, method: str, url: str, **kwargs) -> "httpx.Response":
+        async with self.semaphore:
+            return await self.client.request(method, url, **kwargs)
+
+    def _project_url(self, path: str) -> str:
+        return f"{self.url}/api/v4/projects/{self.project}/{path}"
+
+    async def get(self, path: str, params: dict = None) -> dict:
+        """GET the GitLab URL for the path"""
+        payload = []
+        result = await self._request("GET", self._project_url(path), params=params)
+        if result.status_code == 200:
+            payload = result.json()
+        else:
+            logger.error("GET failed: RC=%s message=%s", result.status_code, result)
+        return payload
+
+    async def get_all(
+        self, path: str, params: dict = None, per_page: int = 100, limit: Optional[int] = None
+    ) -> AsyncIterator[dict]:
+        """GET every page of the GitLab URL for the path"""
+        if limit is not None and limit <= 0:
+            return
+        params = dict(params or {}, per_page=per_page)
+        url = self._project_url(path)
+        count = 0
+        while url:
+            result = await self._request("GET", url, params=params)
+            if result.status_code != 200:
+                logger.error("GET failed: RC=%s message=%s", result.status_code, result)
+                return
+            for item in result.json():
+                yield item
+                count += 1
+                if limit is not None and count >= limit:
+                    return
+            url, params = _next_page(result, url, params)
+
+    async def post(self, path: str, data: dict) -> dict:
+        """POST to the GitLab URL for the path"""
+        payload = {}
+        result = await self._request("POST", self._project_url(path), json=data)
+        if result.status_code == 201:
+            payload = result.json()
+        else:
+            logger.error("POST failed: RC=%s message=%s", result.status_code, result.text)
+        return payload
+
+    async def put(self, path: str, data: dict) -> dict:
+        """PUT the GitLab URL for the path"""
+        payload = {}
+        result = await self._request("PUT", self._project_url(path), json=data)
+        if result.status_code == 200:
+            payload = result.json()
+        else:
+            logger.error("PUT failed: RC=%s message=%s", result.status_code, result)
+        return payload
+
+    async def delete(self, path: str) -> bool:
+        """DELETE from the GitLab URL for the path"""
+        result = await self._request("DELETE", self._project_url(path))
+        if result.status_code != 204:
+            logger.error("DELETE failed: RC=%s message=%s", result.status_code, result)
+            return False
+        return True
+
+
+def _next_page(result, url: str, params: dict) -> tuple:
+    """Returns the url and params of the page after result or (None, None)"""
+    link = result.links.get("next")
+    if link:
+        return link["url"], None
+    next_page = result.headers.get("X-Next-Page")
+    if next_page:
+        return url, dict(params or {}, page=next_page)
+    return None, None
+
+
+######################################################################
+# A S Y N C   M O D E L S
+######################################################################
+class AsyncLabel:
+    """Manipulates a Label in GitLab without blocking the event loop"""
+
+    gitlab: AsyncGitLab = None
+
+    def __init__(self, gitlab: AsyncGitLab):
+        """Constructor"""
+        self.gitlab = gitlab
+
+    async def create(self, data: dict) -> dict:
+        """Creates a label in GitLab"""
+        results = await self.gitlab.post("labels", data)
+        if not results:
+            logger.error("Create Label failed!")
+        return results
+
+    async def create_many(self, rows: list) -> list:
+        """Creates all of the labels concurrently"""
+        return await asyncio.gather(*(self.create(row) for row in rows))
+
+    async def delete_by_name(self, name: str) -> bool:
+        """Deletes a label in GitLab by name"""
+        return await self.gitlab.delete(f"labels/{urllib.parse.quote(name)}")
+
+    async def delete_many(self, names: list) -> list:
+        """Deletes all of the named labels concurrently"""
+        return await asyncio.gather(*(self.delete_by_name(name) for name in names))
+
+    def all(self, limit: Optional[int] = None) -> AsyncIterator[dict]:
+        """Returns all of the labels"""
+        return self.gitlab.get_all("labels", limit=limit)
+
+    async def find(self, label_id: str) -> dict:
+        """Find a label by it's id"""
+        return await self.gitlab.get(f"labels/{label_id}")
+
+    async def find_by_name(self, name: str) -> list:
+        """Find a label by it's name"""
+        return [label async for label in self.all() if label["name"] == name]
+
+
+class AsyncBoard:
+    """Manipulates a Board in GitLab without blocking the event loop"""
+
+    gitlab: AsyncGitLab = None
+
+    def __init__(self, gitlab: AsyncGitLab):
+        """Constructor"""
+        self.gitlab = gitlab
+
+    async def create(self, data: dict) -> dict:
+        """Creates a board in GitLab"""
+        results = await self.gitlab.post("boards", data)
+        if not results:
+            logger.error("Create board failed!")
+        return results
+
+    async def create_list(self, board_id: str, data: dict) -> dict:
+        """Creates a board list in GitLab"""
+        results = await self.gitlab.post(f"boards/{board_id}/lists", data)
+        if not results:
+            logger.error("Create board list failed!")
+        return results
+
+    async def create_lists(self, board_id: str, label_ids: list) -> list:
+        """Creates one board list per label, left to right in label order"""
+        return [await self.create_list(board_id, {"label_id": label_id}) for label_id in label_ids]
+
+    async def delete_by_id(self, board_id: str) -> bool:
+        """Deletes a board in GitLab by id"""
+        return await self.gitlab.delete(f"boards/{board_id}")
+
+    def all(self, limit: Optional[int] = None) -> AsyncIterator[dict]:
+        """Return all boards"""
+        return self.gitlab.get_all("boards", limit=limit)
+
+    async def find(self, board_id: str) -> dict:
+        """Find a board by it's id"""
+        return await self.gitlab.get(f"boards/{board_id}")
+
+    async def find_by_name(self, name: str) -> list:
+        """Find a board by it's name"""
+        return [board async for board in self.all() if board["name"] == name]
+
+
+class AsyncIssue:
+    """Manipulates a Issue in GitLab without blocking the event loop"""
+
+    gitlab: AsyncGitLab = None
+
+    def __init__(self, gitlab: AsyncGitLab):
+        """Constructor"""
+        self.gitlab = gitlab
+
+    async def create(self, data: dict) -> dict:
+        """Creates a issue in GitLab"""
+        results = await self.gitlab.post("issues", data)
+        if not results:
+            logger.error("Create Issue failed!")
+        return results
+
+    async def create_many(self, rows: list) -> list:
+        """Creates all of the issues concurrently"""
+        return await asyncio.gather(*(self.create(row) for row in rows))
+
+    async def delete_by_id(self, issue_id: str) -> bool:
+        """Deletes a issue in GitLab by id"""
+        return await self.gitlab.delete(f"issues/{issue_id}")
+
+    async def delete_many(self, issue_ids: list) -> list:
+        """Deletes all of the issues concurrently"""
+        return await asyncio.gather(*(self.delete_by_id(issue_id) for issue_id in issue_ids))
+
+    def all(self, limit: Optional[int] = None) -> AsyncIterator[dict]:
+        """Returns all of the issues"""
+        return self.gitlab.get_all("issues", limit=limit)
+
+    async def find(self, issue_id: str) -> dict:
+        """Find an issue by it's id"""
+        return await self.gitlab.get(f"issues/{issue_id}")
+
+    async def find_by_title(self, title: str) -> list:
+        """Find a issue by it's title"""
+        return [issue async for issue in self.all() if issue["title"] == title]
@@ -20,65 +20,257 @@ Board Class
 This model manipulates a Board in GitLab
 """
 import logging
+from typing import TYPE_CHECKING, Callable, Iterable, Iterator, Optional
 import urllib.parse
 from .gitlab import GitLab
+from .records import BoardRecord
+
+if TYPE_CHECKING:
+    from .mirror import Mirror
 
 logger = logging.getLogger()
 
+ISSUE_FIELDS = """
+    pageInfo { hasNextPage endCursor }
+    nodes {
+        iid
+        title
+        weight
+        assignees { nodes { username } }
+        labels { nodes { title } }
+    }
+"""
+
+BOARD_QUERY = """
+query($fullPath: ID!, $boardId: BoardID!, $first: Int!) {
+    project(fullPath: $fullPath) {
+        board(id: $boardId) {
+            id
+            name
+            lists {
+                nodes {
+                    id
+                    title
+                    position
+                    listType
+                    label { title }
+                    issues(first: $first) { %s }
+                }
+            }
+        }
+    }
+}
+""" % ISSUE_FIELDS
+
 
 class Board:
     """Manipulates a Board in GitLab"""
 
     gitlab: GitLab = None
 
-    def __init__(self, gitlab: GitLab):
-        """Constructor"""
+    def __init__(self, gitlab: GitLab, mirror: Optional["Mirror"] = None):
+        """Constructor
+
+        When a Mirror is given the boards are read from it instead of GitLab
+        """
         self.gitlab = gitlab
+        self.mirror = mirror
 
     def create(self, data: dict) -> dict:
         """Creates a board in GitLab"""
-        results = self.gitlab.post("boards", data)
+        # Board names are not unique, so a board that existed before the POST is not ours
+        existing = {board["id"] for board in self.gitlab.get_all("boards") if board["name"] == data["name"]}
+        results = self.gitlab.post(
+            "boards", data, lookup=lambda: self._lookup(data["name"], existing)
+        )
         if not results:
             logger.error("Create board failed!")
+        elif self.mirror:
+            self.mirror.upsert("boards", results)
         return results
 
     def create_list(self, board_id: str, data: dict):
         """Creates a board list in GitLab"""
-        results = self.gitlab.post(f"boards/{board_id}/lists", data)
+        results = self.gitlab.post(
+            f"boards/{board_id}/lists", data, lookup=lambda: self._lookup_list(board_id, data)
+        )
         if not results:
             logger.error("Create board list failed!")
+        elif self.mirror:
+            # The mirrored board's lists are out of date so find() reads it from GitLab again
+            self.mirror.discard("boards", board_id)
         return results
 
-    def delete_by_name(self, name: str):
+    def lists(self, board_id: str) -> list:
+        """Returns every list of a board, which GitLab pages like any other listing"""
+        return list(self.gitlab.get_all(f"boards/{board_id}/lists"))
+
+    def move_list(self, board_id: str, list_id: str, position: int) -> dict:
+        """Moves a board list to a position, shifting the lists after it"""
+        results = self.gitlab.put(f"boards/{board_id}/lists/{list_id}", {"position": position})
+        if results and self.mirror:
+            self.mirror.discard("boards", board_id)
+        return results
+
+    def order_lists(self, board_id: str, label_ids: list) -> int:
+        """Moves the lists of a board into label_ids order left to right
+
+        Only lists that are out of place are moved and the number of moves
+        is returned. Labels that have no list on the board are skipped.
+        """
+        lists = sorted(self.lists(board_id), key=lambda item: item["position"])
+        order = [(item.get("label") or {}).get("id") for item in lists]
+        list_ids = {label_id: item["id"] for label_id, item in zip(order, lists) if label_id is not None}
+        missing = [label_id for label_id in label_ids if label_id not in list_ids]
+        if missing:
+            logger.warning("Board %s has no lists for labels %s", board_id, missing)
+        moves = 0
+        for position, label_id in enumerate(label_id for label_id in label_ids if label_id in list_ids):
+            if order[position] == label_id:
+                continue
+            self.move_list(board_id, list_ids[label_id], position)
+            order.remove(label_id)
+            order.insert(position, label_id)
+            moves += 1
+        return moves
+
+    def snapshot(self, board_id: str, page_size: int = 100) -> dict:
+        """Returns a board with its lists and their issues using GraphQL
+
+        The board, its lists and the first page of issues of every list come
+        back in one query. Lists with more issues are then paged together in
+        one batched query per round.
+        """
+        data = self.gitlab.graphql(
+            BOARD_QUERY,
+            {
+                "fullPath": self.gitlab.project_path(),
+                "boardId": f"gid://gitlab/Board/{board_id}",
+                "first": page_size,
+            },
+        )
+        board = (data.get("project") or {}).get("board")
+        if not board:
+            logger.error("Board %s not found!", board_id)
+            return {}
+        lists = board["lists"]["nodes"]
+        pending = {}
+        for board_list in lists:
+            connection = board_list.pop("issues")
+            board_list["issues"] = [_issue(node) for node in connection["nodes"]]
+            if connection["pageInfo"]["hasNextPage"]:
+                pending[board_list["id"]] = (board_list, connection["pageInfo"]["endCursor"])
+        while pending:
+            pending = self._next_issue_pages(pending, page_size)
+        return {"id": board_id, "name": board["name"], "lists": lists}
+
+    def _next_issue_pages(self, pending: dict, page_size: int) -> dict:
+        """Fetches the next page of issues of every pending list in one query"""
+        aliases = {f"list{number}": list_id for number, list_id in enumerate(pending)}
+        arguments = ", ".join(f"${alias}: ListID!, ${alias}After: String" for alias in aliases)
+        fields = "\n".join(
+            f"{alias}: boardList(id: ${alias}) {{ issues(first: $first, after: ${alias}After) {{ {ISSUE_FIELDS} }} }}"
+            for alias in aliases
+        )
+        variables = {"first": page_size}
+        for alias, list_id in aliases.items():
+            variables[alias] = list_id
+            variables[f"{alias}After"] = pending[list_id][1]
+        data = self.gitlab.graphql(f"query($first: Int!, {arguments}) {{ {fields} }}", variables)
+        still_pending = {}
+        for alias, list_id in aliases.items():
+            board_list = pending[list_id][0]
+            connection = (data.get(alias) or {}).get("issues")
+            if not connection:
+                logger.error("Could not page issues of list %s", board_list["title"])
+                continue
+            board_list["issues"].extend(_issue(node) for node in connection["nodes"])
+            if connection["pageInfo"]["hasNextPage"]:
+                still_pending[list_id] = (board_list, connection["pageInfo"]["endCursor"])
+        return still_pending
+
+    def delete_by_name(self, name: str) -> bool:
         """Deletes a board in GitLab by name"""
         name = urllib.parse.quote(name)
-        self.gitlab.delete(f"boards/{name}")
+        return self.gitlab.delete(f"boards/{name}")
 
-    def delete_by_id(self, board_id: str):
+    def delete_by_id(self, board_id: str) -> bool:
         """Deletes a board in GitLab by id"""
-        self.gitlab.delete(f"boards/{board_id}")
+        result = self.gitlab.delete(f"boards/{board_id}")
+        if result and self.mirror:
+            self.mirror.discard("boards", board_id)
+        return result
 
-    def delete(self, data: dict):
+    def delete(self, data: dict) -> bool:
         """Deletes a board in GitLab"""
-        self.delete_by_name(data["id"])
+        return self.delete_by_name(data["id"])
+
+    def delete_all(self, workers: int = 1, on_batch: Optional[Callable[[int], None]] = None) -> tuple:
+        """Deletes all boards in the Project, returning the number deleted and the ids that failed"""
+        return self.gitlab.purge("boards", "id", workers=workers, on_batch=on_batch)
+
+    def count(self) -> int:
+        """Returns the number of boards in the Project"""
+        return self.gitlab.count("boards")
 
-    def delete_all(self):
-        """Deletes all board in the Project"""
-        boards = self.all()
-        for board in boards:
-            self.delete_by_id(board["id"])
+    def all(self, limit: Optional[int] = None) -> Iterator[dict]:
+        """Return all boards (paged lazily, capped at limit)"""
+        if self.mirror:
+            return iter(self.mirror.boards(limit=limit))
+        return self.gitlab.get_all("boards", limit=limit)
 
-    def all(self) -> list:
-        """Return all boards"""
-        return self.gitlab.get("boards")
+    def records(self, fields: Optional[Iterable[str]] = None, limit: Optional[int] = None) -> Iterator[BoardRecord]:
+        """Returns all of the boards as compact BoardRecords with only the given fields"""
+        fields = BoardRecord.projection(fields)
+        return (BoardRecord.from_json(board, fields) for board in self.all(limit))
 
     def find(self, board_id: str) -> dict:
         """Find a board by it's id"""
+        if self.mirror:
+            mirrored = self.mirror.board(board_id)
+            if mirrored:
+                return mirrored
         result = self.gitlab.get(f"boards/{board_id}")
+        if result and self.mirror:
+            self.mirror.upsert("boards", result)
         return result
 
-    def find_by_name(self, name: str) -> list:
-        """Find a board by it's name"""
-        boards = self.all()
-        result = [board for board in boards if board["name"] == name]
+    def name_index(self) -> dict:
+        """Returns a name -> [BoardRecord] index of every board in the project"""
+        index = {}
+        for board in self.records():
+            index.setdefault(board.name, []).append(board)
+        return index
+
+    def find_by_name(self, name: str, index: Optional[dict] = None) -> list:
+        """Find BoardRecords by name, using the name_index() if one is given"""
+        if index is not None:
+            return index.get(name, [])
+        if self.mirror:
+            return [BoardRecord.from_json(board) for board in self.mirror.boards(name)]
+        boards = self.records()
+        result = [board for board in boards if board.name == name]
         return result
+
+    def _lookup(self, name: str, existing: Iterable[int] = ()) -> Optional[dict]:
+        """Returns a board with this name from GitLab, other than the existing ids, or None"""
+        return next(
+            (board for board in self.gitlab.get_all("boards") if board["name"] == name and board["id"] not in existing),
+            None,
+        )
+
+    def _lookup_list(self, board_id: str, data: dict) -> Optional[dict]:
+        """Returns the list of the board for the label in data or None"""
+        label_id = int(data["label_id"])
+        return next((item for item in self.lists(board_id) if (item.get("label") or {}).get("id") == label_id), None)
+
+
+def _issue(node: dict) -> dict:
+    """Flattens an issue node of a GraphQL board query"""
+    return {
+        "iid": node["iid"],
+        "title": node["title"],
+        "weight": node.get("weight"),
+        "assignees": [assignee["username"] for assignee in node["assignees"]["nodes"]],
+        "labels": [label["title"] for label in node["labels"]["nodes"]],
+    }
@@ -0,0 +1,136 @@
+######################################################################
+# Copyright 2022 John Rofrano. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the 'License');
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an 'AS IS' BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+######################################################################
+
+"""
+Response Cache Module
+
+This module contains the ResponseCache class which keeps GET responses and
+their ETags on disk so that unchanged results can be revalidated with
+If-None-Match instead of being downloaded again
+"""
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import time
+from typing import Optional
+import requests
+from requests.structures import CaseInsensitiveDict
+
+logger = logging.getLogger()
+
+# Response headers that are needed to replay a cached page
+KEPT_HEADERS = ("ETag", "Link", "X-Next-Page", "X-Page", "X-Per-Page", "X-Total", "X-Total-Pages")
+
+
+######################################################################
+# R E S P O N S E   C A C H E   C L A S S
+######################################################################
+class ResponseCache:
+    """A size bounded LRU cache of GET responses stored in a directory
+
+    Entries older than ttl seconds are discarded and the least recently
+    used entries are evicted once the directory grows past max_size bytes.
+    """
+
+    def __init__(self, directory: str, ttl: float = 86400, max_size: int = 50 * 1024 * 1024):
+        self.directory = directory
+        self.ttl = ttl
+        self.max_size = max_size
+        os.makedirs(directory, exist_ok=True)
+
+    def __repr__(self):
+        return f"<ResponseCache {self.directory}>"
+
+    def _path(self, key: str) -> str:
+        digest = hashlib.sha256(key.encode("utf-8")).hexdigest()
+        return os.path.join(self.directory, f"{digest}.json")
+
+    def load(self, key: str) -> Optional[dict]:
+        """Returns the cached entry for key or None"""
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as cache_file:
+                entry = json.load(cache_file)
+        except (OSError, ValueError):
+            return None
+        if entry["key"] != key or time.time() - entry["stored"] > self.ttl:
+            self._remove(path)
+            return None
+        # the modification time records the last use for LRU eviction
+        try:
+            os.utime(path)
+        except OSError:
+            logger.debug("Cache entry %s was evicted while in use", path)
+        return entry
+
+    def store(self, key: str, result: requests.Response) -> None:
+        """Saves a response that carries an ETag"""
+        entry = {
+            "key": key,
+            "url": result.url,
+            "stored": time.time(),
+            "headers": {name: result.headers[name] for name in KEPT_HEADERS if name in result.headers},
+            "body": result.text,
+        }
+        handle, temp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        with os.fdopen(handle, "w", encoding="utf-8") as cache_file:
+            json.dump(entry, cache_file)
+        os.replace(temp_path, self._path(key))
+        self.evict()
+
+    def response(self, entry: dict) -> requests.Response:
+        """Rebuilds a 200 response from a cached entry"""
+        result = requests.Response()
+        result.status_code = 200
+        result.url = entry["url"]
+        result.encoding = "utf-8"
+        result.headers = CaseInsensitiveDict(entry["headers"])
+        result._content = entry["body"].encode("utf-8")  # pylint: disable=protected-access
+        return result
+
+    def evict(self) -> None:
+        """Removes the least recently used entries until under max_size"""
+        entries = []
+        for name in os.listdir(self.directory):
+            if not name.endswith(".json"):
+                continue
+            try:
+                stat = os.stat(os.path.join(self.directory, name))
+            except OSError:
+                # another thread removed it after it was listed
+                continue
+            entries.append((stat.st_mtime, stat.st_size, name))
+        total = sum(size for _, size, _ in entries)
+        for _, size, name in sorted(entries):
+            if total <= self.max_size:
+                break
+            self._remove(os.path.join(self.directory, name))
+            total -= size
+
+    def clear(self) -> None:
+        """Removes every entry from the cache"""
+        for name in os.listdir(self.directory):
+            if name.endswith(".json"):
+                self._remove(os.path.join(self.directory, name))
+
+    @staticmethod
+    def _remove(path: str) -> None:
+        try:
+            os.remove(path)
+        except OSError:
+            logger.debug("Cache entry %s already removed", path)
@@ -20,62 +20,414 @@ GitLab Module
 This module contains the GitLab class which implements
 the HTTP calls GET, POST, PUT, and DELETE to GitLab
 """
+import hashlib
 import logging
+import random
+import time
+import urllib.parse
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Iterator, Optional
 import requests
+from requests.adapters import HTTPAdapter
+from .cache import ResponseCache
+from .ratelimit import RateLimiter
 
 logger = logging.getLogger()
 
+# Methods that can be sent again without creating anything twice
+IDEMPOTENT_METHODS = ("GET", "HEAD", "PUT", "DELETE")
+# Status codes that mean GitLab or a proxy in front of it had a transient problem
+RETRY_STATUS_CODES = (500, 502, 503, 504)
+# Seconds to wait for GitLab to connect or send data before the request is retried
+DEFAULT_TIMEOUT = 30.0
+
 
 ######################################################################
 # G I T L A B   W R A P P E R   C L A S S
 ######################################################################
 class GitLab:
-    """A GitLab Wrapper"""
+    """A GitLab Wrapper
+
+    All requests are sent through one long-lived requests.Session so that
+    TCP and TLS connections are kept alive and reused across calls.
+    """
 
-    def __init__(self, project: str, token: str, url: str = "https://gitlab.com"):
+    def __init__(
+        self,
+        project: str,
+        token: str,
+        url: str = "https://gitlab.com",
+        pool_size: int = 20,
+        rate_limiter: Optional[RateLimiter] = None,
+        max_throttle_retries: int = 5,
+        retries: int = 3,
+        backoff: float = 0.5,
+        max_backoff: float = 30.0,
+        cache: Optional[ResponseCache] = None,
+        timeout: float = DEFAULT_TIMEOUT,
+    ):
         self.project = project
         self.token = token
         self.url = url
         self.headers = {"Authorization": f"Bearer {self.token}"}
+        self.session = requests.Session()
+        self.session.headers.update(self.headers)
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.rate_limiter = rate_limiter or RateLimiter()
+        self.max_throttle_retries = max_throttle_retries
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.cache = cache
+        self.timeout = timeout
+        self.hooks = []
 
     def __repr__(self):
         return f"<GitLab {self.project}>"
 
-    def get(self, path: str) -> dict:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self) -> None:
+        """Closes the session and releases all pooled connections"""
+        self.session.close()
+
+    def for_project(self, project: str) -> "GitLab":
+        """Returns a wrapper for another project
+
+        The new wrapper shares this one's session, rate limiter, cache and
+        hooks, so closing this wrapper also closes it.
+        """
+        other = self.__class__.__new__(self.__class__)
+        other.__dict__.update(self.__dict__)
+        other.__dict__.pop("_project_path", None)
+        other.project = project
+        return other
+
+    def group_projects(self, group: str) -> list:
+        """Returns the ids of the projects in a group and its subgroups"""
+        url = f"{self.url}/api/v4/groups/{urllib.parse.quote(str(group), safe='')}/projects"
+        params = {"include_subgroups": "true", "archived": "false", "simple": "true", "per_page": 100}
+        return [str(project["id"]) for page in self._pages(url, params, False, 1) for project in page]
+
+    def _send(self, method: str, url: str, **kwargs) -> requests.Response:
+        """Sends a request when the rate limiter allows it
+
+        A 429 response means GitLab did not process the request so it is
+        sent again once the wait that GitLab asked for has passed.
+        """
+        attempt = 0
+        while True:
+            waited = self.rate_limiter.acquire()
+            if waited and self.hooks:
+                self._emit("throttle", seconds=waited)
+            started = time.monotonic()
+            result = self.session.request(method, url, **dict({"timeout": self.timeout}, **kwargs))
+            if self.hooks:
+                self._emit_request(method, url, result, time.monotonic() - started)
+            self.rate_limiter.update(result.headers, result.status_code)
+            if result.status_code != 429 or attempt >= self.max_throttle_retries:
+                return result
+            attempt += 1
+            self._emit("retry", method=method, url=url)
+
+    def add_hook(self, hook: Callable) -> None:
+        """Registers hook(event, **data) to be called for every request event
+
+        The events are "request" with the method, url, status, elapsed
+        seconds and bytes in and out, "retry" with the method and url, and
+        "throttle" with the seconds spent waiting for the rate limiter.
+        """
+        self.hooks.append(hook)
+
+    def _emit(self, event: str, **data) -> None:
+        for hook in self.hooks:
+            hook(event, **data)
+
+    def _emit_request(self, method: str, url: str, result: requests.Response, elapsed: float) -> None:
+        body = result.request.body if result.request is not None else None
+        self._emit(
+            "request",
+            method=method,
+            url=result.request.url if result.request is not None else url,
+            status=result.status_code,
+            elapsed=elapsed,
+            bytes_in=len(result.content or b""),
+            bytes_out=len(body or b""),
+        )
+
+    def _request(
+        self, method: str, url: str, can_replay: Callable[[], bool] = None, **kwargs
+    ) -> requests.Response:
+        """Sends a request and retries transient failures with backoff
+
+        Idempotent methods are always retried. Other methods are only sent
+        again when can_replay() confirms the failed attempt had no effect.
+        """
+        attempt = 0
+        while True:
+            try:
+                result = self._send(method, url, **kwargs)
+                if result.status_code not in RETRY_STATUS_CODES:
+                    return result
+                error = None
+            except (requests.ConnectionError, requests.Timeout) as exc:
+                result, error = None, exc
+            if attempt >= self.retries or not self._replayable(method, can_replay):
+                if error:
+                    raise error
+                return result
+            attempt += 1
+            self._emit("retry", method=method, url=url)
+            delay = random.uniform(0, min(self.max_backoff, self.backoff * 2**attempt))
+            logger.warning("%s %s failed, retry %s in %.1fs", method, url, attempt, delay)
+            time.sleep(delay)
+
+    @staticmethod
+    def _replayable(method: str, can_replay: Callable[[], bool] = None) -> bool:
+        """Returns True if a failed request may be sent again"""
+        if method in IDEMPOTENT_METHODS:
+            return True
+        return can_replay is not None and can_replay()
+
+    def _get(self, url: str, params: dict = None) -> requests.Response:
+        """Sends a GET, revalidating a cached copy with If-None-Match"""
+        if self.cache is None:
+            return self._request("GET", url, params=params)
+        url = requests.Request("GET", url, params=params).prepare().url
+        # a digest of the token is part of the key so users never share entries
+        key = f"{hashlib.sha256(self.token.encode('utf-8')).hexdigest()[:16]}:{url}"
+        entry = self.cache.load(key)
+        etag = entry and entry["headers"].get("ETag")
+        result = self._request("GET", url, headers={"If-None-Match": etag} if etag else None)
+        if result.status_code == 304 and entry:
+            return self.cache.response(entry)
+        if result.status_code == 200 and result.headers.get("ETag"):
+            self.cache.store(key, result)
+        return result
+
+    def get(self, path: str, params: dict = None) -> dict:
         """GET the GitLab URL for the path"""
         payload = []
-        result = requests.get(
-            f"{self.url}/api/v4/projects/{self.project}/{path}", headers=self.headers
-        )
+        result = self._get(f"{self.url}/api/v4/projects/{self.project}/{path}", params=params)
         if result.status_code == 200:
             payload = result.json()
         else:
             logger.error("GET failed: RC=%s message=%s", result.status_code, result)
         return payload
 
-    def post(self, path: str, data: dict) -> dict:
-        """POST to the GitLab URL for the path"""
+    def get_all(
+        self,
+        path: str,
+        params: dict = None,
+        per_page: int = 100,
+        limit: Optional[int] = None,
+        keyset: bool = False,
+        workers: int = 1,
+    ) -> Iterator[dict]:
+        """GET every page of the GitLab URL for the path
+
+        Items are yielded one at a time as each page arrives so callers can
+        stop early. The next page is found from the Link header, which also
+        covers keyset pagination, falling back to the X-Next-Page header.
+        """
+        if limit is not None and limit <= 0:
+            return
+        count = 0
+        for page in self.get_pages(path, params, per_page, keyset, workers):
+            for item in page:
+                yield item
+                count += 1
+                if limit is not None and count >= limit:
+                    return
+
+    def get_pages(
+        self,
+        path: str,
+        params: dict = None,
+        per_page: int = 100,
+        keyset: bool = False,
+        workers: int = 1,
+    ) -> Iterator[list]:
+        """GET the pages of the GitLab URL for the path in order
+
+        With more than one worker, and when GitLab reports X-Total-Pages,
+        the pages after the first are fetched that many at a time.
+        """
+        url = f"{self.url}/api/v4/projects/{self.project}/{path}"
+        return self._pages(url, dict(params or {}, per_page=per_page), keyset, workers)
+
+    def _pages(self, url: str, params: dict, keyset: bool, workers: int) -> Iterator[list]:
+        """GET the pages of any GitLab API URL in order"""
+        if keyset:
+            params = dict(params, pagination="keyset", order_by="id", sort="asc")
+        result = self._get(url, params=params)
+        while result.status_code == 200:
+            yield result.json()
+            total_pages = result.headers.get("X-Total-Pages")
+            if workers > 1 and total_pages and not keyset:
+                yield from self._get_pages_concurrently(url, params, int(total_pages), workers)
+                return
+            url, params = self._next_page(result, url, params)
+            if not url:
+                return
+            result = self._get(url, params=params)
+        logger.error("GET failed: RC=%s message=%s", result.status_code, result)
+
+    def _get_pages_concurrently(self, url: str, params: dict, total_pages: int, workers: int) -> Iterator[list]:
+        """GET pages 2 to total_pages, workers pages at a time, in order"""
+
+        def fetch(page: int) -> list:
+            result = self._get(url, params=dict(params, page=page))
+            if result.status_code != 200:
+                logger.error("GET failed: RC=%s message=%s", result.status_code, result)
+                return []
+            return result.json()
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            for first in range(2, total_pages + 1, workers):
+                last = min(first + workers, total_pages + 1)
+                yield from executor.map(fetch, range(first, last))
+
+    @staticmethod
+    def _next_page(result, url: str, params: dict) -> tuple:
+        """Returns the url and params of the page after result or (None, None)"""
+        link = result.headers.get("Link")
+        if link:
+            for entry in requests.utils.parse_header_links(link):
+                if entry.get("rel") == "next":
+                    # the next link already carries all of the query parameters
+                    return entry["url"], None
+        next_page = result.headers.get("X-Next-Page")
+        if next_page:
+            return url, dict(params or {}, page=next_page)
+        return None, None
+
+    def post(self, path: str, data: dict, lookup: Callable[[], dict] = None) -> dict:
+        """POST to the GitLab URL for the path
+
+        A failed POST is only sent again when lookup is given and it does not
+        find the object, so a retried create never makes a second copy.
+        """
         payload = {}
-        headers = self.headers | {"Content-Type": "application/json"}
-        result = requests.post(
-            f"{self.url}/api/v4/projects/{self.project}/{path}",
-            json=data,
-            headers=headers,
-        )
+        found = {}
+
+        def can_replay() -> bool:
+            found["payload"] = lookup()
+            return not found["payload"]
+
+        try:
+            result = self._request(
+                "POST",
+                f"{self.url}/api/v4/projects/{self.project}/{path}",
+                can_replay=can_replay if lookup else None,
+                json=data,
+            )
+        except (requests.ConnectionError, requests.Timeout):
+            if not found.get("payload"):
+                raise
+        if found.get("payload"):
+            logger.info("POST %s was already applied, not sending it again", path)
+            return found["payload"]
         if result.status_code == 201:
             payload = result.json()
         else:
             logger.error("POST failed: RC=%s message=%s", result.status_code, result.text)
         return payload
 
+    def count(self, path: str, params: dict = None) -> int:
+        """Returns how many items the GitLab URL for the path lists
+
+        GitLab leaves out X-Total for very large lists, so those are counted
+        page by page instead
+        """
+        url = f"{self.url}/api/v4/projects/{self.project}/{path}"
+        result = self._get(url, params=dict(params or {}, per_page=1, page=1))
+        if result.status_code != 200:
+            logger.error("GET failed: RC=%s message=%s", result.status_code, result)
+            return 0
+        if result.headers.get("X-Total"):
+            return int(result.headers["X-Total"])
+        return sum(len(page) for page in self.get_pages(path, params, 100, False, 1))
+
+    def purge(
+        self,
+        path: str,
+        id_field: str = "id",
+        params: dict = None,
+        workers: int = 1,
+        per_page: int = 100,
+        on_batch: Optional[Callable[[int], None]] = None,
+    ) -> tuple:
+        """Deletes every item listed at the GitLab URL for the path
+
+        Deleting shifts every later page, so the first page is fetched again
+        after each batch is deleted, workers at a time, until it comes back
+        empty. Items that fail to delete stay in the listing, so pages made up
+        only of failures are stepped over. Returns the number deleted and the
+        ids that could not be deleted.
+        """
+        deleted = 0
+        failed = []
+        skipped = set()
+        page_number = 1
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            while True:
+                page = self.get(path, params=dict(params or {}, per_page=per_page, page=page_number))
+                batch = [item[id_field] for item in page if item[id_field] not in skipped]
+                if not batch:
+                    if len(page) < per_page:
+                        break
+                    page_number += 1
+                    continue
+                results = executor.map(lambda item_id: self.delete(f"{path}/{item_id}"), batch)
+                for item_id, result in zip(batch, results):
+                    if result:
+                        deleted += 1
+                    else:
+                        failed.append(item_id)
+                        skipped.add(item_id)
+                if on_batch:
+                    on_batch(len(batch))
+        return deleted, failed
+
+    def project_path(self) -> str:
+        """Returns the full path of the project, which GraphQL needs"""
+        if "_project_path" not in self.__dict__:
+            result = self._get(f"{self.url}/api/v4/projects/{self.project}")
+            if result.status_code != 200:
+                logger.error("GET failed: RC=%s message=%s", result.status_code, result)
+                return None
+            self._project_path = result.json()["path_with_namespace"]
+        return self._project_path
+
+    def graphql(self, query: str, variables: dict = None) -> dict:
+        """POST a query to the GitLab GraphQL API and return its data"""
+        # queries never change anything so they can always be sent again
+        result = self._request(
+            "POST",
+            f"{self.url}/api/graphql",
+            can_replay=lambda: True,
+            json={"query": query, "variables": variables or {}},
+        )
+        if result.status_code != 200:
+            logger.error("GraphQL failed: RC=%s message=%s", result.status_code, result.text)
+            return {}
+        payload = result.json()
+        if payload.get("errors"):
+            logger.error("GraphQL errors: %s", payload["errors"])
+        return payload.get("data") or {}
+
     def put(self, path: str, data: dict) -> dict:
         """PUT the GitLab URL for the path"""
         payload = {}
-        headers = self.headers | {"Content-Type": "application/json"}
-        result = requests.put(
-            f"{self.url}/api/v4/projects/{self.project}/{path}",
-            json=data,
-            headers=headers,
+        result = self._request(
+            "PUT", f"{self.url}/api/v4/projects/{self.project}/{path}", json=data
         )
         if result.status_code == 200:
             payload = result.json()
@@ -83,10 +435,10 @@ class GitLab:
             logger.error("PUT failed: RC=%s message=%s", result.status_code, result)
         return payload
 
-    def delete(self, path: str) -> None:
+    def delete(self, path: str) -> bool:
         """DELETE from the GitLab URL for the path"""
-        result = requests.delete(
-            f"{self.url}/api/v4/projects/{self.project}/{path}", headers=self.headers
-        )
+        result = self._request("DELETE", f"{self.url}/api/v4/projects/{self.project}/{path}")
         if result.status_code != 204:
             logger.error("DELETE failed: RC=%s message=%s", result.status_code, result)
+            return False
+        return True
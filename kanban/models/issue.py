@@ -20,54 +20,265 @@ Issue Class
 This model manipulates a Issue in GitLab
 """
 import logging
+import time
+from datetime import datetime, timedelta, timezone
+from typing import TYPE_CHECKING, Callable, Iterable, Iterator, Optional
+from .. import workers as pool
 from .gitlab import GitLab
+from .records import IssueRecord
+
+if TYPE_CHECKING:
+    from .mirror import Mirror
 
 logger = logging.getLogger()
 
+# Allowance for clock differences when looking for issues this client created
+CLOCK_SKEW = timedelta(minutes=1)
+
+# The issue fields that watch() keeps for each issue
+WATCH_FIELDS = ("iid", "title", "state", "labels", "updated_at")
+
 
 class Issue:
     """Manipulates a Issue in GitLab"""
 
     gitlab: GitLab = None
 
-    def __init__(self, gitlab: GitLab):
-        """Constructor"""
+    def __init__(self, gitlab: GitLab, mirror: Optional["Mirror"] = None):
+        """Constructor
+
+        When a Mirror is given the issues are read from it instead of GitLab
+        """
         self.gitlab = gitlab
+        self.mirror = mirror
 
     def create(self, data: dict) -> dict:
         """Creates a issue in GitLab"""
-        results = self.gitlab.post("issues", data)
+        started = datetime.now(timezone.utc) - CLOCK_SKEW
+        results = self.gitlab.post(
+            "issues", data, lookup=lambda: self._lookup(data["title"], started)
+        )
         if not results:
             logger.error("Create Issue failed!")
+        elif self.mirror:
+            self.mirror.upsert("issues", results)
+        return results
+
+    def update(self, issue_id: str, data: dict) -> dict:
+        """Updates the fields in data of an issue in GitLab
+
+        GitLab applies add_labels and remove_labels itself so labels can be
+        changed without reading the issue first
+        """
+        results = self.gitlab.put(f"issues/{issue_id}", data)
+        if not results:
+            logger.error("Update Issue failed!")
+        elif self.mirror:
+            self.mirror.upsert("issues", results)
         return results
 
-    def delete_by_id(self, issue_id: str):
+    def update_many(
+        self,
+        updates: Iterable[dict],
+        workers: int = 1,
+        ordered: bool = False,
+        on_update: Optional[Callable[[int], None]] = None,
+    ) -> pool.Summary:
+        """Applies many updates, workers at a time, and summarizes the ones that failed
+
+        Each update is a dict with the iid of the issue, an optional title
+        used to report it, and the fields to change. Empty fields are not
+        sent. on_update(1) is called as each update finishes.
+        """
+        summary = pool.Summary()
+        for index, update, _, error in pool.imap(self._apply_update, updates, workers, ordered):
+            if error:
+                summary.failures.append(pool.Failure(index, update, error))
+            else:
+                summary.succeeded += 1
+            if on_update:
+                on_update(1)
+        return summary
+
+    def _apply_update(self, update: dict) -> dict:
+        """Sends one update of update_many"""
+        if update.get("iid") is None:
+            raise ValueError(f"No issue titled {update.get('title')}")
+        data = {field: value for field, value in update.items() if field not in ("iid", "title") and value}
+        if not data:
+            raise ValueError("Nothing to update")
+        return self.update(update["iid"], data)
+
+    def delete_by_id(self, issue_id: str) -> bool:
         """Deletes a issue in GitLab by id"""
-        self.gitlab.delete(f"issues/{issue_id}")
+        result = self.gitlab.delete(f"issues/{issue_id}")
+        if result and self.mirror:
+            self.mirror.discard("issues", issue_id)
+        return result
+
+    def delete(self, data: dict, index: Optional[dict] = None) -> bool:
+        """Deletes a issue in GitLab, returning False if none were deleted
+
+        When a title_index() is given the issue ids are taken from it, and
+        removed from it, instead of listing every issue in the project
+        """
+        if index is None:
+            iids = [issue["iid"] for issue in self.find_by_title(data["title"])]
+        else:
+            iids = index.pop(data["title"], [])
+        results = [self.delete_by_id(iid) for iid in iids]
+        return bool(results) and all(results)
 
-    def delete(self, data: dict):
-        """Deletes a issue in GitLab"""
-        issues = self.find_by_title(data["title"])
-        for issue in issues:
-            self.delete_by_id(issue["iid"])
+    def delete_many(self, rows: Iterable[dict]) -> list:
+        """Deletes the issues with the titles in rows, listing the project once"""
+        index = self.title_index()
+        return [self.delete(row, index) for row in rows]
 
-    def delete_all(self):
-        """Deletes all issue in the Project"""
-        issues = self.all()
-        for issue in issues:
-            self.delete_by_id(issue["iid"])
+    def delete_all(self, workers: int = 1, on_batch: Optional[Callable[[int], None]] = None) -> tuple:
+        """Deletes all issues in the Project, returning the number deleted and the ids that failed"""
+        return self.gitlab.purge("issues", "iid", workers=workers, on_batch=on_batch)
 
-    def all(self) -> list:
-        """Returns all of the issues"""
-        return self.gitlab.get("issues")
+    def count(self) -> int:
+        """Returns the number of issues in the Project"""
+        return self.gitlab.count("issues")
+
+    def all(self, limit: Optional[int] = None, workers: int = 1, params: Optional[dict] = None) -> Iterator[dict]:
+        """Returns all of the issues that match the GitLab filters in params (paged lazily, capped at limit)
+
+        A mirror answers when there are no filters since it cannot apply them
+        """
+        if self.mirror and not params:
+            return iter(self.mirror.issues(limit=limit))
+        return self.gitlab.get_all("issues", params=params, limit=limit, workers=workers)
+
+    def records(
+        self,
+        fields: Optional[Iterable[str]] = None,
+        limit: Optional[int] = None,
+        workers: int = 1,
+        params: Optional[dict] = None,
+    ) -> Iterator[IssueRecord]:
+        """Returns all of the issues as compact IssueRecords with only the given fields"""
+        fields = IssueRecord.projection(fields)
+        return (IssueRecord.from_json(issue, fields) for issue in self.all(limit, workers, params))
+
+    def title_index(self) -> dict:
+        """Returns a title -> [iid] index of every issue in the project"""
+        index = {}
+        for issue in self.records(fields=("iid", "title")):
+            index.setdefault(issue.title, []).append(issue.iid)
+        return index
 
     def find(self, issue_id: str) -> dict:
         """Find an issue by it's id"""
+        if self.mirror:
+            mirrored = self.mirror.issue(issue_id)
+            if mirrored:
+                return mirrored
         result = self.gitlab.get(f"issues/{issue_id}")
+        if result and self.mirror:
+            self.mirror.upsert("issues", result)
         return result
 
-    def find_by_title(self, title: str) -> list:
-        """Find a issue by it's title"""
-        issues = self.all()
-        result = [issue for issue in issues if issue["title"] == title]
+    def find_by_title(self, title: str, fields: Optional[Iterable[str]] = None) -> list:
+        """Find a issue by it's title, returning IssueRecords with the given fields"""
+        if self.mirror:
+            fields = IssueRecord.projection(fields)
+            return [IssueRecord.from_json(issue, fields) for issue in self.mirror.issues(title=title)]
+        issues = self.records(fields)
+        result = [issue for issue in issues if issue.title == title]
         return result
+
+    def watch(
+        self,
+        interval: float = 30.0,
+        list_labels: Optional[Iterable[str]] = None,
+        polls: Optional[int] = None,
+        sleep: Callable[[float], None] = time.sleep,
+    ) -> Iterator[dict]:
+        """Yields a change event for each issue that changes, polling every interval seconds
+
+        The first poll lists every issue and yields a snapshot event for each.
+        Later polls only ask GitLab for the issues updated since the newest
+        one seen, so they cost as much as the number of changes. Stops after
+        polls polls when it is given.
+        """
+        watcher = IssueWatcher(self, list_labels)
+        count = 0
+        while True:
+            yield from watcher.poll()
+            count += 1
+            if polls is not None and count >= polls:
+                return
+            sleep(interval)
+
+    def _lookup(self, title: str, created_after: datetime) -> Optional[dict]:
+        """Returns an issue with this title created after the time or None"""
+        params = {"search": title, "in": "title", "created_after": created_after.isoformat()}
+        issues = self.gitlab.get_all("issues", params=params)
+        return next((issue for issue in issues if issue["title"] == title), None)
+
+
+class IssueWatcher:
+    """Keeps the issues of a project up to date from their updated_after changes"""
+
+    def __init__(self, issue: Issue, list_labels: Optional[Iterable[str]] = None):
+        self.issue = issue
+        # The labels of the board lists, which decide what list an issue is in
+        self.list_labels = list(list_labels or [])
+        self.issues = {}
+        self.updated_after = None
+
+    def poll(self) -> list:
+        """Fetches the issues changed since the last poll and returns their change events"""
+        params = {"state": "all", "order_by": "updated_at", "sort": "asc"}
+        first = self.updated_after is None
+        if not first:
+            # updated_after includes the issues updated at that very moment
+            params["updated_after"] = self.updated_after
+        events = []
+        for record in self.issue.records(fields=WATCH_FIELDS, params=params):
+            previous = self.issues.get(record.iid)
+            self.issues[record.iid] = record
+            if self.updated_after is None or record.updated_at > self.updated_after:
+                self.updated_after = record.updated_at
+            if first:
+                events.append(self._event("snapshot", record))
+            elif previous is None:
+                events.append(self._event("created", record))
+            elif previous.updated_at != record.updated_at:
+                events.extend(self._changes(previous, record))
+        return events
+
+    def list_of(self, record: IssueRecord) -> Optional[str]:
+        """Returns the board list an issue is in, if list labels were given"""
+        if record.state == "closed":
+            return "Closed"
+        labels = set(record.labels or ())
+        return next((name for name in self.list_labels if name in labels), "Open")
+
+    def _changes(self, previous: IssueRecord, record: IssueRecord) -> list:
+        """Returns the events for the differences between two versions of an issue"""
+        events = []
+        if previous.state != record.state:
+            events.append(self._event("closed" if record.state == "closed" else "reopened", record))
+        if self.list_labels:
+            before, after = self.list_of(previous), self.list_of(record)
+            if before != after and previous.state == record.state:
+                events.append(self._event("moved", record, {"from": before, "to": after}))
+        elif set(previous.labels or ()) != set(record.labels or ()):
+            added = sorted(set(record.labels or ()) - set(previous.labels or ()))
+            removed = sorted(set(previous.labels or ()) - set(record.labels or ()))
+            events.append(self._event("relabeled", record, {"added": added, "removed": removed}))
+        if not events:
+            events.append(self._event("updated", record))
+        return events
+
+    def _event(self, name: str, record: IssueRecord, extra: Optional[dict] = None) -> dict:
+        event = {"event": name, "iid": record.iid, "title": record.title, "state": record.state}
+        event["labels"] = list(record.labels or ())
+        if self.list_labels:
+            event["list"] = self.list_of(record)
+        event["updated_at"] = record.updated_at
+        event.update(extra or {})
+        return event
@@ -20,29 +20,42 @@ Label Class
 This model manipulates a Label in GitLab
 """
 import logging
+from typing import TYPE_CHECKING, Callable, Iterable, Iterator, Optional
 import urllib.parse
 from .gitlab import GitLab
+from .records import LabelRecord
+
+if TYPE_CHECKING:
+    from .mirror import Mirror
 
 logger = logging.getLogger()
 
-HTML_COLORS = [
-    "black",
-    "silver",
-    "gray",
-    "white",
-    "maroon",
-    "red",
-    "purple",
-    "fuchsia",
-    "green",
-    "lime",
-    "olive",
-    "yellow",
-    "navy",
-    "blue",
-    "teal",
-    "aqua",
-]
+HTML_COLOR_CODES = {
+    "black": "#000000",
+    "silver": "#C0C0C0",
+    "gray": "#808080",
+    "white": "#FFFFFF",
+    "maroon": "#800000",
+    "red": "#FF0000",
+    "purple": "#800080",
+    "fuchsia": "#FF00FF",
+    "green": "#008000",
+    "lime": "#00FF00",
+    "olive": "#808000",
+    "yellow": "#FFFF00",
+    "navy": "#000080",
+    "blue": "#0000FF",
+    "teal": "#008080",
+    "aqua": "#00FFFF",
+}
+
+HTML_COLORS = list(HTML_COLOR_CODES)
+
+# Label fields that labels sync keeps in line with the CSV file
+SYNC_FIELDS = ("color", "text_color", "description")
+
+# Lists only the labels of the project itself and not those of its groups
+PROJECT_LABELS = {"include_ancestor_groups": "false"}
 
 
 class Label:
@@ -50,47 +63,161 @@ class Label:
 
     gitlab: GitLab = None
 
-    def __init__(self, gitlab: GitLab):
-        """Constructor"""
+    def __init__(self, gitlab: GitLab, mirror: Optional["Mirror"] = None):
+        """Constructor
+
+        When a Mirror is given the labels are read from it instead of GitLab
+        """
         self.gitlab = gitlab
+        self.mirror = mirror
 
     def create(self, data: dict) -> dict:
         """Creates a label in GitLab"""
-        results = self.gitlab.post("labels", data)
+        results = self.gitlab.post("labels", data, lookup=lambda: self._lookup(data["name"]))
         if not results:
             logger.error("Create Label failed!")
+        elif self.mirror:
+            self.mirror.upsert("labels", results)
         return results
 
-    def delete_by_name(self, name: str):
+    def find_or_create(self, data: dict, index: Optional[dict] = None) -> dict:
+        """Returns the label named in data, creating it if it does not exist"""
+        existing = self.find_by_name(data["name"], index)
+        if existing:
+            return existing[0]
+        return self.create(data)
+
+    def update(self, label_id: str, data: dict) -> dict:
+        """Updates the fields in data of a label in GitLab"""
+        results = self.gitlab.put(f"labels/{label_id}", data)
+        if not results:
+            logger.error("Update Label failed!")
+        elif self.mirror:
+            self.mirror.upsert("labels", results)
+        return results
+
+    def plan_sync(self, rows: Iterable[dict], prune: bool = False) -> dict:
+        """Compares the labels in rows with the project's labels
+
+        Returns a plan with the labels to create, the (label, changes) pairs
+        to update, the labels to delete when prune is True and the names of
+        the labels that are unchanged. Only the project's own labels are
+        compared, since group labels cannot be changed through the project.
+        Rows without a name and repeats of an earlier name are skipped.
+        """
+        current = {label.name: label for label in self.records(params=PROJECT_LABELS)}
+        plan = {"create": [], "update": [], "delete": [], "unchanged": []}
+        seen = set()
+        for row in rows:
+            name = (row.get("name") or "").strip()
+            if not name or name in seen:
+                logger.warning("Skipping label row without a name or with a repeated name: %s", row)
+                continue
+            seen.add(name)
+            label = current.pop(name, None)
+            if label is None:
+                plan["create"].append(row)
+                continue
+            changes = {
+                field: row[field]
+                for field in SYNC_FIELDS
+                if field in row and _normalize(field, row[field]) != _normalize(field, label.get(field))
+            }
+            if changes:
+                plan["update"].append((label, changes))
+            else:
+                plan["unchanged"].append(label["name"])
+        if prune:
+            plan["delete"] = list(current.values())
+        return plan
+
+    def delete_by_name(self, name: str) -> bool:
         """Deletes a label in GitLab by name"""
-        name = urllib.parse.quote(name)
-        self.gitlab.delete(f"labels/{name}")
+        result = self.gitlab.delete(f"labels/{urllib.parse.quote(name)}")
+        if result and self.mirror:
+            for label in self.mirror.labels(name):
+                self.mirror.discard("labels", label["id"])
+        return result
 
-    def delete_by_id(self, label_id: str):
+    def delete_by_id(self, label_id: str) -> bool:
         """Deletes a label in GitLab by id"""
-        self.gitlab.delete(f"labels/{label_id}")
+        result = self.gitlab.delete(f"labels/{label_id}")
+        if result and self.mirror:
+            self.mirror.discard("labels", label_id)
+        return result
 
-    def delete(self, data: dict):
+    def delete(self, data: dict) -> bool:
         """Deletes a label in GitLab"""
-        self.delete_by_name(data["name"])
-
-    def delete_all(self):
-        """Deletes all label in the Project"""
-        labels = self.all()
-        for label in labels:
-            self.delete_by_id(label["id"])
-
-    def all(self) -> list:
-        """Returns all of the labels"""
-        return self.gitlab.get("labels")
+        return self.delete_by_name(data["name"])
+
+    def delete_all(self, workers: int = 1, on_batch: Optional[Callable[[int], None]] = None) -> tuple:
+        """Deletes all labels in the Project, returning the number deleted and the ids that failed
+
+        Group labels are left alone since they cannot be deleted from a project
+        """
+        return self.gitlab.purge("labels", "id", params=PROJECT_LABELS, workers=workers, on_batch=on_batch)
+
+    def count(self) -> int:
+        """Returns the number of labels in the Project"""
+        return self.gitlab.count("labels", params=PROJECT_LABELS)
+
+    def all(self, limit: Optional[int] = None, workers: int = 1, params: Optional[dict] = None) -> Iterator[dict]:
+        """Returns all of the labels that match the GitLab filters in params (paged lazily, capped at limit)
+
+        A mirror answers when there are no filters since it cannot apply them
+        """
+        if self.mirror and not params:
+            return iter(self.mirror.labels(limit=limit))
+        return self.gitlab.get_all("labels", params=params, limit=limit, workers=workers)
+
+    def records(
+        self,
+        fields: Optional[Iterable[str]] = None,
+        limit: Optional[int] = None,
+        workers: int = 1,
+        params: Optional[dict] = None,
+    ) -> Iterator[LabelRecord]:
+        """Returns all of the labels as compact LabelRecords with only the given fields"""
+        fields = LabelRecord.projection(fields)
+        return (LabelRecord.from_json(label, fields) for label in self.all(limit, workers, params))
 
     def find(self, label_id: str) -> dict:
         """Find a label by it's id"""
+        if self.mirror:
+            mirrored = self.mirror.label(label_id)
+            if mirrored:
+                return mirrored
         result = self.gitlab.get(f"labels/{label_id}")
+        if result and self.mirror:
+            self.mirror.upsert("labels", result)
         return result
 
-    def find_by_name(self, name: str) -> list:
-        """Find a label by it's name"""
-        labels = self.all()
-        result = [label for label in labels if label["name"] == name]
+    def name_index(self) -> dict:
+        """Returns a name -> [LabelRecord] index of every label in the project"""
+        index = {}
+        for label in self.records():
+            index.setdefault(label.name, []).append(label)
+        return index
+
+    def find_by_name(self, name: str, index: Optional[dict] = None) -> list:
+        """Find LabelRecords by name, using the name_index() if one is given"""
+        if index is not None:
+            return index.get(name, [])
+        if self.mirror:
+            return [LabelRecord.from_json(label) for label in self.mirror.labels(name)]
+        labels = self.records()
+        result = [label for label in labels if label.name == name]
         return result
+
+    def _lookup(self, name: str) -> Optional[dict]:
+        """Returns the label with exactly this name or None"""
+        labels = self.gitlab.get_all("labels", params={"search": name})
+        return next((label for label in labels if label["name"] == name), None)
+
+
+def _normalize(field: str, value) -> str:
+    """Normalizes a label field so equal values compare equal"""
+    value = (value or "").strip()
+    if field.endswith("color"):
+        value = HTML_COLOR_CODES.get(value.lower(), value).upper()
+    return value
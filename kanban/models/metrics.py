@@ -0,0 +1,139 @@
+######################################################################
+# Copyright 2022 John Rofrano. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the 'License');
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an 'AS IS' BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+######################################################################
+
+"""
+Metrics Module
+
+This module contains the Metrics class which is registered as a GitLab
+hook to time every request by method and endpoint template and to count
+status codes, retries, bytes and throttle waits
+"""
+import math
+import re
+import threading
+import time
+from collections import Counter
+
+# Collections whose next path segment is an id or a name
+COLLECTIONS = ("projects", "groups", "labels", "boards", "lists", "issues")
+API_PREFIX = re.compile(r"^https?://[^/]+/api/(v4/)?")
+
+
+def endpoint_template(url: str) -> str:
+    """Returns the endpoint of a URL with ids replaced, e.g. POST boards/:id/lists"""
+    path = API_PREFIX.sub("", url.split("?", 1)[0])
+    segments = path.strip("/").split("/")
+    if segments[:1] == ["projects"] and len(segments) > 2:
+        segments = segments[2:]
+    template = []
+    for segment in segments:
+        if template and template[-1] in COLLECTIONS:
+            template.append(":id")
+        else:
+            template.append(segment)
+    return "/".join(template)
+
+
+def percentile(values: list, fraction: float) -> float:
+    """Returns the nearest rank percentile of sorted values"""
+    if not values:
+        return 0.0
+    rank = max(math.ceil(fraction * len(values)) - 1, 0)
+    return values[min(rank, len(values) - 1)]
+
+
+######################################################################
+# M E T R I C S   C L A S S
+######################################################################
+class Metrics:
+    """Collects request measurements from GitLab hooks"""
+
+    def __init__(self):
+        self.started = time.monotonic()
+        self.latencies = {}
+        self.status_codes = Counter()
+        self.retries = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.throttle_waits = 0
+        self.throttle_seconds = 0.0
+        self._lock = threading.Lock()
+
+    def __repr__(self):
+        return f"<Metrics requests={sum(self.status_codes.values())}>"
+
+    def __call__(self, event: str, **data) -> None:
+        """Receives an event from a GitLab hook"""
+        with self._lock:
+            if event == "request":
+                key = f"{data['method']} {endpoint_template(data['url'])}"
+                self.latencies.setdefault(key, []).append(data["elapsed"])
+                self.status_codes[data["status"]] += 1
+                self.bytes_in += data["bytes_in"]
+                self.bytes_out += data["bytes_out"]
+            elif event == "retry":
+                self.retries += 1
+            elif event == "throttle":
+                self.throttle_waits += 1
+                self.throttle_seconds += data["seconds"]
+
+    def summary(self) -> dict:
+        """Returns the collected metrics as a dictionary"""
+        with self._lock:
+            elapsed = time.monotonic() - self.started
+            everything = sorted(value for values in self.latencies.values() for value in values)
+            endpoints = {key: _latency(sorted(values)) for key, values in sorted(self.latencies.items())}
+            return {
+                "elapsed": elapsed,
+                "requests": len(everything),
+                "requests_per_second": len(everything) / elapsed if elapsed else 0.0,
+                "latency": _latency(everything),
+                "endpoints": endpoints,
+                "status_codes": {str(code): count for code, count in sorted(self.status_codes.items())},
+                "retries": self.retries,
+                "bytes_in": self.bytes_in,
+                "bytes_out": self.bytes_out,
+                "throttle_waits": self.throttle_waits,
+                "throttle_seconds": self.throttle_seconds,
+            }
+
+    def report(self) -> str:
+        """Returns the metrics formatted as a table"""
+        summary = self.summary()
+        lines = [
+            f"{summary['requests']} requests in {summary['elapsed']:.1f}s "
+            f"({summary['requests_per_second']:.1f} req/s), {summary['retries']} retries, "
+            f"{summary['throttle_waits']} throttle waits ({summary['throttle_seconds']:.1f}s)",
+            f"{summary['bytes_out']} bytes sent, {summary['bytes_in']} bytes received",
+            "status codes: " + ", ".join(f"{code}={count}" for code, count in summary["status_codes"].items()),
+            f"{'endpoint':<40} {'count':>6} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}",
+        ]
+        for key, latency in list(summary["endpoints"].items()) + [("total", summary["latency"])]:
+            lines.append(
+                f"{key:<40} {latency['count']:>6} {latency['p50'] * 1000:>8.1f} "
+                f"{latency['p95'] * 1000:>8.1f} {latency['p99'] * 1000:>8.1f}"
+            )
+        return "\n".join(lines)
+
+
+def _latency(values: list) -> dict:
+    """Returns the count and percentiles of sorted latencies"""
+    return {
+        "count": len(values),
+        "p50": percentile(values, 0.50),
+        "p95": percentile(values, 0.95),
+        "p99": percentile(values, 0.99),
+    }
@@ -0,0 +1,265 @@
+######################################################################
+# Copyright 2022 John Rofrano. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the 'License');
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an 'AS IS' BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+######################################################################
+
+"""
+Mirror Module
+
+This module contains the Mirror class which keeps a copy of a project's
+labels, boards and issues in a SQLite file so that lookups by name, title,
+label or state are answered locally. Issues are synced incrementally with
+updated_after, while labels and boards, which GitLab cannot filter by
+update time and which are few, are listed again in full.
+"""
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import urllib.parse
+from typing import Optional
+from .gitlab import GitLab
+from .records import IssueRecord
+
+logger = logging.getLogger()
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS labels (id INTEGER PRIMARY KEY, name TEXT NOT NULL, data TEXT NOT NULL);
+CREATE INDEX IF NOT EXISTS labels_name ON labels (name);
+CREATE TABLE IF NOT EXISTS boards (id INTEGER PRIMARY KEY, name TEXT NOT NULL, data TEXT NOT NULL);
+CREATE INDEX IF NOT EXISTS boards_name ON boards (name);
+CREATE TABLE IF NOT EXISTS issues (
+    iid INTEGER PRIMARY KEY,
+    title TEXT NOT NULL,
+    state TEXT NOT NULL,
+    updated_at TEXT NOT NULL,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS issues_title ON issues (title);
+CREATE INDEX IF NOT EXISTS issues_state ON issues (state);
+CREATE TABLE IF NOT EXISTS issue_labels (iid INTEGER NOT NULL, label TEXT NOT NULL, PRIMARY KEY (label, iid));
+CREATE INDEX IF NOT EXISTS issue_labels_iid ON issue_labels (iid);
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+"""
+
+
+######################################################################
+# M I R R O R   C L A S S
+######################################################################
+class Mirror:
+    """A local SQLite copy of one project's labels, boards and issues
+
+    The file is named after the project in directory. Nothing is read from
+    GitLab until sync() is called, which happens on first use when the
+    mirror has never been synced.
+    """
+
+    def __init__(self, directory: str, gitlab: GitLab):
+        os.makedirs(directory, exist_ok=True)
+        self.gitlab = gitlab
+        self.project = gitlab.project
+        self.path = os.path.join(directory, f"{urllib.parse.quote(str(gitlab.project), safe='')}.sqlite")
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.executescript(SCHEMA)
+        self._connection.commit()
+
+    def __repr__(self):
+        return f"<Mirror {self.path}>"
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self) -> None:
+        """Closes the mirror file"""
+        self._connection.close()
+
+    ######################################################################
+    # S Y N C I N G
+    ######################################################################
+
+    @property
+    def synced(self) -> Optional[float]:
+        """The time of the last sync or None if the mirror was never synced"""
+        value = self._meta("synced")
+        return float(value) if value else None
+
+    def ensure_synced(self) -> None:
+        """Syncs the mirror if it has never been synced"""
+        if self.synced is None:
+            self.sync()
+
+    def sync(self, full: bool = False) -> dict:
+        """Brings the mirror up to date and returns how many of each kind were fetched
+
+        Issues updated since the newest one already mirrored are fetched,
+        or every issue when full is True, which also drops deleted issues.
+        Labels and boards are always listed in full.
+        """
+        counts = {
+            # The same labels as Label.all, so group labels are included
+            "labels": self._replace("labels", self.gitlab.get_all("labels")),
+            "boards": self._replace("boards", self.gitlab.get_all("boards")),
+            "issues": self._sync_issues(full),
+        }
+        self._set_meta("synced", str(time.time()))
+        logger.info("Mirror %s synced: %s", self.path, counts)
+        return counts
+
+    def _replace(self, table: str, items) -> int:
+        """Replaces every row of the labels or boards table"""
+        rows = [(item["id"], item["name"], json.dumps(item)) for item in items]
+        with self._lock, self._connection:
+            self._connection.execute(f"DELETE FROM {table}")
+            self._connection.executemany(f"INSERT INTO {table} VALUES (?, ?, ?)", rows)
+        return len(rows)
+
+    def _sync_issues(self, full: bool) -> int:
+        """Upserts the issues updated since the last sync, a page at a time"""
+        updated_after = None if full else self._meta("issues_updated_after")
+        params = {"state": "all", "order_by": "updated_at", "sort": "asc"}
+        if updated_after:
+            params["updated_after"] = updated_after
+        if full:
+            with self._lock, self._connection:
+                self._connection.execute("DELETE FROM issues")
+                self._connection.execute("DELETE FROM issue_labels")
+        count = 0
+        for page in self.gitlab.get_pages("issues", params):
+            issues = self._store_issues(page)
+            count += len(issues)
+            if issues:
+                newest = max(issue["updated_at"] for issue in issues)
+                if updated_after is None or newest > updated_after:
+                    updated_after = newest
+                # Saved per page so an interrupted sync carries on from here
+                self._set_meta("issues_updated_after", updated_after)
+        return count
+
+    def _store_issues(self, page: list) -> list:
+        """Upserts issues with their labels and returns what was stored"""
+        # Only the fields an IssueRecord can hold are kept
+        issues = [{field: issue[field] for field in IssueRecord.FIELDS if field in issue} for issue in page]
+        with self._lock, self._connection:
+            self._connection.executemany(
+                "INSERT OR REPLACE INTO issues VALUES (?, ?, ?, ?, ?)",
+                [
+                    (issue["iid"], issue["title"], issue["state"], issue["updated_at"], json.dumps(issue))
+                    for issue in issues
+                ],
+            )
+            self._connection.executemany(
+                "DELETE FROM issue_labels WHERE iid = ?", [(issue["iid"],) for issue in issues]
+            )
+            self._connection.executemany(
+                "INSERT OR IGNORE INTO issue_labels VALUES (?, ?)",
+                [(issue["iid"], label) for issue in issues for label in issue.get("labels") or []],
+            )
+        return issues
+
+    def upsert(self, table: str, item: dict) -> None:
+        """Adds or replaces a label, board or issue that kanban just created or changed in GitLab"""
+        if table == "issues":
+            self._store_issues([item])
+            return
+        if table not in ("labels", "boards"):
+            raise ValueError(f"Unknown mirror table {table}")
+        with self._lock, self._connection:
+            self._connection.execute(
+                f"INSERT OR REPLACE INTO {table} VALUES (?, ?, ?)", (item["id"], item["name"], json.dumps(item))
+            )
+
+    def discard(self, table: str, key) -> None:
+        """Removes a label or board by id, or an issue by iid, that was deleted from GitLab"""
+        column = {"labels": "id", "boards": "id", "issues": "iid"}[table]
+        with self._lock, self._connection:
+            self._connection.execute(f"DELETE FROM {table} WHERE {column} = ?", (int(key),))
+            if table == "issues":
+                self._connection.execute("DELETE FROM issue_labels WHERE iid = ?", (int(key),))
+
+    def _meta(self, key: str) -> Optional[str]:
+        with self._lock:
+            found = self._connection.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return found[0] if found else None
+
+    def _set_meta(self, key: str, value: str) -> None:
+        with self._lock, self._connection:
+            self._connection.execute("INSERT OR REPLACE INTO meta VALUES (?, ?)", (key, value))
+
+    ######################################################################
+    # L O O K U P S
+    ######################################################################
+
+    def _select(self, sql: str, params: tuple = (), limit: Optional[int] = None) -> list:
+        if limit is not None:
+            # A negative LIMIT means no limit to SQLite but nothing to get_all
+            sql += f" LIMIT {max(int(limit), 0)}"
+        with self._lock:
+            return [json.loads(row[0]) for row in self._connection.execute(sql, params)]
+
+    def labels(self, name: Optional[str] = None, limit: Optional[int] = None) -> list:
+        """Returns the mirrored labels, only those with this name if one is given"""
+        if name is None:
+            return self._select("SELECT data FROM labels ORDER BY name", limit=limit)
+        return self._select("SELECT data FROM labels WHERE name = ? ORDER BY id", (name,), limit)
+
+    def label(self, label_id) -> Optional[dict]:
+        """Returns a mirrored label by id"""
+        return next(iter(self._select("SELECT data FROM labels WHERE id = ?", (int(label_id),))), None)
+
+    def boards(self, name: Optional[str] = None, limit: Optional[int] = None) -> list:
+        """Returns the mirrored boards, only those with this name if one is given"""
+        if name is None:
+            return self._select("SELECT data FROM boards ORDER BY id", limit=limit)
+        return self._select("SELECT data FROM boards WHERE name = ? ORDER BY id", (name,), limit)
+
+    def board(self, board_id) -> Optional[dict]:
+        """Returns a mirrored board by id"""
+        return next(iter(self._select("SELECT data FROM boards WHERE id = ?", (int(board_id),))), None)
+
+    def issues(
+        self,
+        title: Optional[str] = None,
+        label: Optional[str] = None,
+        state: Optional[str] = None,
+        limit: Optional[int] = None,
+    ) -> list:
+        """Returns the mirrored issues that have this title, label and state, newest first"""
+        sql = "SELECT data FROM issues"
+        clauses = []
+        params = []
+        if label is not None:
+            sql += " JOIN issue_labels USING (iid)"
+            clauses.append("issue_labels.label = ?")
+            params.append(label)
+        if title is not None:
+            clauses.append("title = ?")
+            params.append(title)
+        if state is not None:
+            clauses.append("state = ?")
+            params.append(state)
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        return self._select(sql + " ORDER BY iid DESC", tuple(params), limit)
+
+    def issue(self, iid) -> Optional[dict]:
+        """Returns a mirrored issue by iid"""
+        return next(iter(self._select("SELECT data FROM issues WHERE iid = ?", (int(iid),))), None)
@@ -0,0 +1,156 @@
+######################################################################
+# Copyright 2022 John Rofrano. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the 'License');
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an 'AS IS' BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+######################################################################
+
+"""
+Rate Limit Module
+
+This module contains the RateLimiter class which schedules requests to
+GitLab with a token bucket that is tuned by the RateLimit-Remaining,
+RateLimit-Reset and Retry-After response headers
+"""
+import json
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Optional
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover
+    fcntl = None
+
+logger = logging.getLogger()
+
+
+######################################################################
+# R A T E   L I M I T E R   C L A S S
+######################################################################
+class RateLimiter:
+    """A thread safe token bucket shared by every request of a GitLab
+
+    When lock_file is given the bucket is kept in that file under an
+    exclusive lock so that several processes share the same budget.
+    """
+
+    def __init__(
+        self,
+        rate: Optional[float] = None,
+        burst: Optional[int] = None,
+        lock_file: Optional[str] = None,
+        clock: Callable[[], float] = time.time,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        self.rate = rate
+        self.burst = burst or max(1, int(rate or 1))
+        self.lock_file = lock_file
+        if lock_file and fcntl is None:  # pragma: no cover
+            logger.warning("File locking is not available, rate limit is per process")
+            self.lock_file = None
+        self.clock = clock
+        self.sleep = sleep
+        self._lock = threading.Lock()
+        self._state = {
+            "tokens": float(self.burst),
+            "updated": clock(),
+            "blocked_until": 0.0,
+            "pace": None,
+            "pace_until": 0.0,
+        }
+
+    def __repr__(self):
+        return f"<RateLimiter rate={self.rate} burst={self.burst}>"
+
+    @contextmanager
+    def _locked(self):
+        """Yields the bucket state while holding the thread and file locks"""
+        with self._lock:
+            if not self.lock_file:
+                yield self._state
+                return
+            with open(self.lock_file, "a+", encoding="utf-8") as handle:
+                fcntl.flock(handle, fcntl.LOCK_EX)
+                handle.seek(0)
+                text = handle.read()
+                state = json.loads(text) if text else dict(self._state)
+                yield state
+                handle.seek(0)
+                handle.truncate()
+                handle.write(json.dumps(state))
+
+    def _current_rate(self, state: dict, now: float) -> Optional[float]:
+        """Returns the configured rate or the slower pace set by GitLab"""
+        if state["pace"] is None or state["pace_until"] <= now:
+            return self.rate
+        if self.rate is None:
+            return state["pace"]
+        return min(self.rate, state["pace"])
+
+    def _reserve(self, state: dict, now: float) -> float:
+        """Takes a token and returns 0 or returns how long to wait for one"""
+        if state["blocked_until"] > now:
+            return state["blocked_until"] - now
+        rate = self._current_rate(state, now)
+        if not rate:
+            return 0.0
+        tokens = min(self.burst, state["tokens"] + (now - state["updated"]) * rate)
+        state["updated"] = now
+        if tokens >= 1:
+            state["tokens"] = tokens - 1
+            return 0.0
+        state["tokens"] = tokens
+        return (1 - tokens) / rate
+
+    def acquire(self) -> float:
+        """Blocks until a request may be sent and returns the seconds waited"""
+        waited = 0.0
+        while True:
+            with self._locked() as state:
+                wait = self._reserve(state, self.clock())
+            if wait <= 0:
+                return waited
+            self.sleep(wait)
+            waited += wait
+
+    def update(self, headers: dict, status_code: int) -> None:
+        """Adjusts the schedule from the rate limit headers of a response"""
+        now = self.clock()
+        retry_after = _number(headers.get("Retry-After"))
+        reset = _number(headers.get("RateLimit-Reset"))
+        remaining = _number(headers.get("RateLimit-Remaining"))
+        with self._locked() as state:
+            if status_code == 429:
+                if retry_after is not None:
+                    until = now + retry_after
+                else:
+                    until = reset if reset and reset > now else now + 1
+                logger.warning("GitLab rate limit hit, waiting %.1f seconds", until - now)
+                state["blocked_until"] = max(state["blocked_until"], until)
+            elif remaining is not None and reset is not None and reset > now:
+                if remaining <= 0:
+                    state["blocked_until"] = max(state["blocked_until"], reset)
+                else:
+                    # spread the remaining budget evenly until the window resets
+                    state["pace"] = remaining / (reset - now)
+                    state["pace_until"] = reset
+
+
+def _number(value) -> Optional[float]:
+    """Converts a header value to a float or None"""
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
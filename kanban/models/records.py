@@ -0,0 +1,162 @@
+######################################################################
+# Copyright 2022 John Rofrano. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the 'License');
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an 'AS IS' BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+######################################################################
+
+"""
+Record Classes
+
+Compact, read only copies of the labels, boards and issues listed from
+GitLab. Each record only keeps the fields it was asked for, in __slots__
+instead of a dict, and nested objects are reduced to the one value that
+kanban uses (e.g. an issue's author becomes the author's username).
+Records can be read like the JSON dicts they replace: record["name"],
+record.get("name") and record.name all work.
+"""
+import sys
+from typing import Iterable, Optional
+
+
+class Record:
+    """Base class for the compact records"""
+
+    __slots__ = ()
+
+    # Every field the record can hold, and the fields kept when none are asked for
+    FIELDS: tuple = ()
+    DEFAULT_FIELDS: tuple = ()
+    # Fields that are reduced from a nested object by a _compact_<field> method
+    NESTED: tuple = ()
+
+    @classmethod
+    def from_json(cls, data: dict, fields: Optional[Iterable[str]] = None) -> "Record":
+        """Creates a record with the projected fields of a GitLab JSON dict"""
+        record = cls()
+        nested = cls.NESTED
+        for field in cls.projection(fields):
+            if field not in data:
+                continue
+            value = data[field]
+            if field in nested and value is not None:
+                value = getattr(cls, f"_compact_{field}")(value)
+            setattr(record, field, value)
+        return record
+
+    @classmethod
+    def projection(cls, fields: Optional[Iterable[str]] = None) -> tuple:
+        """Returns the fields to keep, checking that the record has them"""
+        if fields is None:
+            return cls.DEFAULT_FIELDS
+        fields = tuple(fields)
+        unknown = [field for field in fields if field not in cls.FIELDS]
+        if unknown:
+            raise ValueError(f"{cls.__name__} has no field(s): {', '.join(unknown)}")
+        return fields
+
+    def __getitem__(self, key: str):
+        try:
+            return getattr(self, key)
+        except AttributeError:
+            raise KeyError(key) from None
+
+    def __contains__(self, key: str) -> bool:
+        return hasattr(self, key)
+
+    def get(self, key: str, default=None):
+        """Returns a field, or default if the field was not kept"""
+        return getattr(self, key, default)
+
+    def keys(self) -> list:
+        """Returns the names of the fields that were kept"""
+        return [field for field in self.FIELDS if hasattr(self, field)]
+
+    def to_dict(self) -> dict:
+        """Returns the kept fields as a dictionary"""
+        return {field: getattr(self, field) for field in self.keys()}
+
+    def __eq__(self, other):
+        if isinstance(other, Record):
+            return type(self) is type(other) and self.to_dict() == other.to_dict()
+        if isinstance(other, dict):
+            return self.to_dict() == other
+        return NotImplemented
+
+    __hash__ = None
+
+    def __repr__(self):
+        return f"<{type(self).__name__} {self.to_dict()!r}>"
+
+
+class LabelRecord(Record):
+    """A label listed from GitLab"""
+
+    __slots__ = ("id", "name", "color", "text_color", "description", "priority", "is_project_label")
+    FIELDS = __slots__
+    DEFAULT_FIELDS = ("id", "name", "color", "text_color", "description")
+
+
+class BoardRecord(Record):
+    """A board listed from GitLab"""
+
+    __slots__ = ("id", "name", "lists", "milestone", "labels", "assignee", "weight", "hide_backlog_list")
+    FIELDS = __slots__
+    DEFAULT_FIELDS = ("id", "name")
+    NESTED = ("lists", "milestone", "labels", "assignee")
+
+    @staticmethod
+    def _compact_lists(lists: list) -> tuple:
+        """Reduces the board lists to (list id, label name) pairs in position order"""
+        ordered = sorted(lists, key=lambda item: item.get("position") or 0)
+        return tuple((item["id"], (item.get("label") or {}).get("name")) for item in ordered)
+
+    @staticmethod
+    def _compact_milestone(milestone: dict) -> str:
+        return milestone.get("title")
+
+    @staticmethod
+    def _compact_labels(labels: list) -> tuple:
+        return tuple(sys.intern(label["name"]) for label in labels)
+
+    @staticmethod
+    def _compact_assignee(assignee: dict) -> str:
+        return assignee.get("username")
+
+
+class IssueRecord(Record):
+    """An issue listed from GitLab"""
+
+    __slots__ = (
+        "id", "iid", "title", "state", "labels", "description", "author", "assignees", "milestone",
+        "weight", "due_date", "web_url", "created_at", "updated_at", "closed_at",
+    )
+    FIELDS = __slots__
+    DEFAULT_FIELDS = ("iid", "title", "state", "labels")
+    NESTED = ("labels", "author", "assignees", "milestone")
+
+    @staticmethod
+    def _compact_labels(labels: list) -> tuple:
+        # The same few label names repeat across every issue so share the strings
+        return tuple(sys.intern(name) for name in labels)
+
+    @staticmethod
+    def _compact_author(author: dict) -> str:
+        return author.get("username")
+
+    @staticmethod
+    def _compact_assignees(assignees: list) -> tuple:
+        return tuple(assignee["username"] for assignee in assignees)
+
+    @staticmethod
+    def _compact_milestone(milestone: dict) -> str:
+        return milestone.get("title")
@@ -0,0 +1,300 @@
+######################################################################
+# Copyright 2022 John Rofrano. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the 'License');
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an 'AS IS' BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+######################################################################
+
+"""
+Planner Module
+
+This module turns a manifest of labels, boards with their lists, and
+issues into a graph of GitLab operations and runs it on a thread pool.
+An operation starts as soon as the operations it depends on have
+finished, so labels and boards are created together, each board's lists
+follow as their labels appear and are then put in order, and issues
+follow their labels.
+
+A manifest is a JSON document like:
+
+    {
+        "labels": [{"name": "Backlog", "color": "#F0F0F0"}],
+        "boards": [{"name": "Development", "lists": ["Backlog"]}],
+        "issues": [{"title": "Write docs", "labels": ["Backlog"]}]
+    }
+"""
+import logging
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import TYPE_CHECKING, Optional
+from . import workers as pool
+
+if TYPE_CHECKING:
+    from .models import GitLab, Mirror
+
+logger = logging.getLogger()
+
+
+class ManifestError(ValueError):
+    """A manifest that cannot be planned"""
+
+
+class Operation:
+    """One GitLab call in a plan and the operations it waits for"""
+
+    def __init__(self, key: str, kind: str, data: dict, depends: tuple = ()):
+        self.key = key
+        self.kind = kind
+        self.data = data
+        self.depends = tuple(depends)
+
+    def __repr__(self):
+        return f"<Operation {self.key}>"
+
+    def __str__(self):
+        return self.key
+
+
+class Plan:
+    """A graph of operations that provisions a project from a manifest"""
+
+    def __init__(self, operations: list):
+        self.operations = {operation.key: operation for operation in operations}
+        self.dependents = {key: [] for key in self.operations}
+        for operation in operations:
+            for key in operation.depends:
+                self.dependents[key].append(operation.key)
+
+    def __len__(self):
+        return len(self.operations)
+
+    @classmethod
+    def from_manifest(cls, manifest: dict) -> "Plan":
+        """Builds the plan for a manifest, checking that its references resolve"""
+        operations = []
+        labels = _plan_labels(manifest.get("labels", []), operations)
+        _plan_boards(manifest.get("boards", []), labels, operations)
+        _plan_issues(manifest.get("issues", []), labels, operations)
+        return cls(operations)
+
+    def waves(self) -> list:
+        """Returns the operations grouped by how many operations they wait on in a row
+
+        Every operation in a wave can run at the same time once the waves
+        before it are done, so the number of waves is the critical path length
+        """
+        depth = {}
+        for key in self._topological_order():
+            operation = self.operations[key]
+            depth[key] = max((depth[parent] + 1 for parent in operation.depends), default=0)
+        waves = [[] for _ in range(max(depth.values(), default=-1) + 1)]
+        for key, operation in self.operations.items():
+            waves[depth[key]].append(operation)
+        return waves
+
+    def critical_path(self) -> list:
+        """Returns the longest chain of operations that must run one after another"""
+        waves = self.waves()
+        if not waves:
+            return []
+        depth = {operation.key: level for level, wave in enumerate(waves) for operation in wave}
+        path = [waves[-1][0]]
+        while path[-1].depends:
+            path.append(self.operations[max(path[-1].depends, key=depth.get)])
+        return list(reversed(path))
+
+    def _topological_order(self) -> list:
+        """Returns the operation keys with every operation after its dependencies"""
+        remaining = {key: len(operation.depends) for key, operation in self.operations.items()}
+        ready = [key for key, count in remaining.items() if count == 0]
+        order = []
+        while ready:
+            key = ready.pop()
+            order.append(key)
+            for child in self.dependents[key]:
+                remaining[child] -= 1
+                if remaining[child] == 0:
+                    ready.append(child)
+        if len(order) != len(self.operations):
+            raise ManifestError("The manifest has a dependency cycle")
+        return order
+
+    def run(self, gitlab: "GitLab", workers: int = 4, mirror: Optional["Mirror"] = None) -> pool.Summary:
+        """Runs every operation as soon as the ones it depends on have succeeded
+
+        Operations whose dependencies failed are not run and are reported
+        as failures. The summary indexes failures by their order in the plan.
+        A mirror answers the lookups and is kept up to date with what is created.
+        """
+        executor = Executor(gitlab, self, mirror)
+        summary = pool.Summary()
+        index = {key: number for number, key in enumerate(self.operations)}
+        remaining = {key: len(operation.depends) for key, operation in self.operations.items()}
+        ready = [key for key, count in remaining.items() if count == 0]
+        with ThreadPoolExecutor(max_workers=workers) as threads, pool.progress_bar(total=len(self)) as progress:
+            running = {}
+            while ready or running:
+                for key in ready:
+                    running[threads.submit(executor.call, self.operations[key])] = key
+                ready = []
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    key = running.pop(future)
+                    error = future.result()
+                    progress.update(1)
+                    if error:
+                        summary.failures.append(pool.Failure(index[key], self.operations[key], error))
+                        for skipped in self._descendants(key):
+                            if remaining[skipped] < 0:
+                                continue
+                            remaining[skipped] = -1
+                            summary.failures.append(
+                                pool.Failure(index[skipped], self.operations[skipped], f"skipped because {key} failed")
+                            )
+                            progress.update(1)
+                        continue
+                    summary.succeeded += 1
+                    for child in self.dependents[key]:
+                        remaining[child] -= 1
+                        if remaining[child] == 0:
+                            ready.append(child)
+        summary.failures.sort(key=lambda failure: failure.index)
+        return summary
+
+    def _descendants(self, key: str) -> list:
+        """Returns every operation that waits on key, directly or not"""
+        found = []
+        stack = list(self.dependents[key])
+        seen = set()
+        while stack:
+            child = stack.pop()
+            if child in seen:
+                continue
+            seen.add(child)
+            found.append(child)
+            stack.extend(self.dependents[child])
+        return found
+
+
+class Executor:
+    """Sends the operations of a plan to GitLab, reusing what already exists"""
+
+    def __init__(self, gitlab: "GitLab", plan: Plan, mirror: Optional["Mirror"] = None):
+        # pylint: disable=import-outside-toplevel
+        from .models import Board, Issue, Label
+
+        self.label = Label(gitlab, mirror)
+        self.board = Board(gitlab, mirror)
+        self.issue = Issue(gitlab, mirror)
+        self.results = {}
+        kinds = {operation.kind for operation in plan.operations.values()}
+        # One listing of each kind up front lets apply be run again safely
+        self.labels = self.label.name_index() if "label" in kinds else {}
+        self.boards = self.board.name_index() if "board" in kinds else {}
+        self.titles = self.issue.title_index() if "issue" in kinds else {}
+
+    def call(self, operation: Operation) -> Optional[str]:
+        """Runs one operation and returns an error message if it failed"""
+        try:
+            result = getattr(self, f"_{operation.kind}")(operation.data)
+        except Exception as error:  # pylint: disable=broad-except
+            logger.exception("Operation failed: %s", operation)
+            return str(error) or error.__class__.__name__
+        if not result:
+            return "GitLab request failed"
+        self.results[operation.key] = result
+        return None
+
+    def _label(self, data: dict) -> dict:
+        return self.label.find_or_create(data, self.labels)
+
+    def _board(self, data: dict) -> dict:
+        existing = self.board.find_by_name(data["name"], self.boards)
+        if existing:
+            return self.board.find(existing[0]["id"])
+        return self.board.create(data)
+
+    def _list(self, data: dict) -> dict:
+        board = self.results[data["board"]]
+        label_id = self.results[f"label:{data['label']}"]["id"]
+        for item in board.get("lists") or []:
+            if (item.get("label") or {}).get("id") == label_id:
+                return item
+        return self.board.create_list(board["id"], {"label_id": label_id})
+
+    def _order(self, data: dict) -> dict:
+        board_id = self.results[data["board"]]["id"]
+        label_ids = [self.results[f"label:{name}"]["id"] for name in data["lists"]]
+        return {"moves": self.board.order_lists(board_id, label_ids)}
+
+    def _issue(self, data: dict) -> dict:
+        existing = self.titles.get(data["title"])
+        if existing:
+            return {"iid": existing[0]}
+        return self.issue.create(data)
+
+
+def _plan_labels(items: list, operations: list) -> dict:
+    """Adds an operation for each label and returns their keys by label name"""
+    labels = {}
+    for data in items:
+        if not data.get("name"):
+            raise ManifestError("Every label needs a name")
+        if data["name"] in labels:
+            raise ManifestError(f"Label {data['name']} is listed twice")
+        labels[data["name"]] = f"label:{data['name']}"
+        operations.append(Operation(labels[data["name"]], "label", data))
+    return labels
+
+
+def _plan_boards(items: list, labels: dict, operations: list) -> None:
+    """Adds an operation for each board, its lists and their ordering"""
+    boards = set()
+    for data in items:
+        if not data.get("name") or data["name"] in boards:
+            raise ManifestError(f"Boards need unique names: {data.get('name')!r}")
+        boards.add(data["name"])
+        board_key = f"board:{data['name']}"
+        operations.append(Operation(board_key, "board", {"name": data["name"]}))
+        lists = []
+        for name in data.get("lists", []):
+            if name not in labels:
+                raise ManifestError(f"Board {data['name']} has a list for label {name} that is not in labels")
+            key = f"list:{data['name']}:{name}"
+            if key in lists:
+                raise ManifestError(f"Board {data['name']} has two lists for label {name}")
+            lists.append(key)
+            operations.append(Operation(key, "list", {"board": board_key, "label": name}, (board_key, labels[name])))
+        # Lists are created at the same time so they are put in order once they all exist
+        if len(lists) > 1:
+            operations.append(
+                Operation(f"order:{data['name']}", "order", {"board": board_key, "lists": data["lists"]}, lists)
+            )
+
+
+def _plan_issues(items: list, labels: dict, operations: list) -> None:
+    """Adds an operation for each issue that waits for the issue's labels"""
+    for number, data in enumerate(items, start=1):
+        if not data.get("title"):
+            raise ManifestError(f"Issue {number} has no title")
+        names = _label_names(data.get("labels"))
+        depends = tuple(labels[name] for name in names if name in labels)
+        data = dict(data, labels=",".join(names))
+        operations.append(Operation(f"issue:{number}:{data['title']}", "issue", data, depends))
+
+
+def _label_names(labels) -> list:
+    """Returns the label names of an issue given as a list or comma separated text"""
+    if not labels:
+        return []
+    if isinstance(labels, str):
+        labels = labels.split(",")
+    return [name.strip() for name in labels if name.strip()]
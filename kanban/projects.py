@@ -0,0 +1,152 @@
+######################################################################
+# Copyright 2022 John Rofrano. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the 'License');
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an 'AS IS' BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+######################################################################
+
+"""
+Projects Module
+
+This module lets the labels and boards commands run across many projects
+in one process. The --project option may be a comma separated list of
+project ids, @FILE with one project per line, or group:ID for every
+project in a GitLab group.
+"""
+import functools
+import io
+from concurrent.futures import ThreadPoolExecutor
+import click
+from . import workers as pool
+
+# Characters that mean --project names more than one project
+MULTI_PROJECT_MARKERS = (",", "@", "group:")
+
+
+def is_multi_project(spec: str) -> bool:
+    """Returns True if a --project value may name more than one project"""
+    return any(marker in spec for marker in MULTI_PROJECT_MARKERS)
+
+
+def parse_projects(spec: str, gitlab) -> list:
+    """Expands a --project value into a list of project ids"""
+    projects = []
+    for part in spec.split(","):
+        part = part.strip()
+        if not part or part.startswith("#"):
+            continue
+        if part.startswith("@"):
+            with open(part[1:], mode="r", encoding="utf-8") as project_file:
+                for line in project_file:
+                    projects.extend(parse_projects(line, gitlab))
+        elif part.startswith("group:"):
+            projects.extend(gitlab.group_projects(part[len("group:"):]))
+        else:
+            projects.append(part)
+    # keep the first occurrence of every project
+    return list(dict.fromkeys(projects))
+
+
+def echo(message=None, **kwargs) -> None:
+    """Prints like click.echo, into the running project's output when there are several
+
+    Each project runs in its own context on its own thread, and click keeps
+    the current context per thread, so the context says where to write
+    """
+    ctx = click.get_current_context(silent=True)
+    output = ctx.obj.get("OUTPUT") if ctx and isinstance(ctx.obj, dict) else None
+    if output is not None:
+        kwargs["file"] = output
+    click.echo(message, **kwargs)
+
+
+class ProjectResult:
+    """The outcome of a command for one project"""
+
+    def __init__(self, project: str):
+        self.project = project
+        self.exit_code = 0
+        self.error = ""
+        self.output = ""
+        self.summary = None
+
+
+def fan_out(func):
+    """Runs a command once for every project named by --project
+
+    A single project runs the command as usual. Several projects run it on
+    a bounded thread pool, with wrappers that share one connection pool,
+    and print each project's output followed by a summary table.
+    """
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        ctx = click.get_current_context()
+        spec = ctx.obj["PROJECT"]
+        if not is_multi_project(spec):
+            return func(*args, **kwargs)
+        from .cli import get_gitlab  # pylint: disable=import-outside-toplevel,cyclic-import
+
+        projects = parse_projects(spec, get_gitlab(ctx))
+        if not projects:
+            raise click.UsageError(f"No projects found for {spec}")
+        with ThreadPoolExecutor(max_workers=ctx.obj["PROJECT_WORKERS"]) as executor:
+            results = list(executor.map(lambda project: _run_project(ctx, func, project, args, kwargs), projects))
+        echo_results(results)
+        if any(result.exit_code for result in results):
+            ctx.exit(1)
+        return None
+
+    return wrapper
+
+
+def _run_project(ctx, func, project: str, args, kwargs) -> ProjectResult:
+    """Runs the command for one project in its own context"""
+    result = ProjectResult(project)
+    buffer = io.StringIO()
+    pool.hide_progress()
+    obj = dict(ctx.obj, PROJECT=project, GITLAB=ctx.obj["GITLAB"].for_project(project), FAN_OUT=True, OUTPUT=buffer)
+    project_ctx = click.Context(ctx.command, parent=ctx.parent, info_name=ctx.info_name, obj=obj)
+    try:
+        with project_ctx:
+            func(*args, **kwargs)
+    except click.exceptions.Exit as error:
+        result.exit_code = error.exit_code
+    except (click.ClickException, click.Abort) as error:
+        result.exit_code = 1
+        result.error = str(error) or error.__class__.__name__
+    except Exception as error:  # pylint: disable=broad-except
+        result.exit_code = 1
+        result.error = str(error) or error.__class__.__name__
+    result.output = buffer.getvalue()
+    result.summary = obj.get("SUMMARY")
+    return result
+
+
+def echo_results(results: list) -> None:
+    """Prints each project's output and a table of the outcomes
+
+    Succeeded and Failed count the rows or objects a command worked on, and
+    are "-" for commands that list or export a whole table and for dry runs
+    """
+    for result in results:
+        click.echo(f"=== Project {result.project} ===")
+        click.echo(result.output.rstrip("\n"))
+    width = max(len("Project"), *(len(result.project) for result in results))
+    click.echo(f"\n{'Project':<{width}}  Status  Succeeded  Failed  Error")
+    for result in results:
+        status = "ok" if result.exit_code == 0 else "FAILED"
+        succeeded = result.summary.succeeded if result.summary else "-"
+        failed = result.summary.failed if result.summary else "-"
+        click.echo(f"{result.project:<{width}}  {status:<6}  {succeeded:>9}  {failed:>6}  {result.error}")
+    failures = sum(1 for result in results if result.exit_code)
+    click.echo(f"{len(results) - failures} projects succeeded, {failures} failed")
@@ -0,0 +1,132 @@
+######################################################################
+# Copyright 2022 John Rofrano. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the 'License');
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an 'AS IS' BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+######################################################################
+
+"""
+Validation Module
+
+This module checks the rows of a labels or issues CSV file before any of
+them are sent to GitLab, so that a misspelled color or a duplicate name
+is reported for the whole file at once instead of as a 400 error halfway
+through an import.
+"""
+import re
+from typing import Iterable, Optional
+from .models.label import HTML_COLOR_CODES
+
+HEX_COLOR = re.compile(r"^#(?:[0-9a-fA-F]{3}){1,2}$")
+
+# The longest values GitLab accepts
+LABEL_LIMITS = {"name": 255}
+ISSUE_LIMITS = {"title": 255, "description": 1048576}
+
+
+class Problem:
+    """Something wrong with one row of a CSV file
+
+    Row 0 is the header and data rows are counted from 1
+    """
+
+    def __init__(self, row: int, column: str, message: str):
+        self.row = row
+        self.column = column
+        self.message = message
+
+    def __repr__(self):
+        return f"<Problem row={self.row} column={self.column} message={self.message}>"
+
+    def __str__(self):
+        where = "header" if self.row == 0 else f"row {self.row}"
+        return f"{where} ({self.column}): {self.message}"
+
+
+def validate_labels(rows: Iterable[dict], require_color: bool = True) -> list:
+    """Returns the problems with the rows of a labels CSV file
+
+    Boards reuse labels that already exist, so their CSV files can leave
+    the color out with require_color False
+    """
+    required = ("name", "color") if require_color else ("name",)
+    problems = []
+    names = {}
+    for number, row in _rows(rows, required, problems):
+        name = (row.get("name") or "").strip()
+        if name in names:
+            problems.append(Problem(number, "name", f"duplicate of row {names[name]}"))
+        elif name:
+            names[name] = number
+        if "," in name:
+            problems.append(Problem(number, "name", "label names cannot contain commas"))
+        for column in ("color", "text_color"):
+            color = (row.get(column) or "").strip()
+            if color and not is_color(color):
+                problems.append(Problem(number, column, f"{color!r} is not a hex color or one of the HTML color names"))
+        problems.extend(_too_long(number, row, LABEL_LIMITS))
+    return problems
+
+
+def validate_issues(rows: Iterable[dict], label_names: Optional[Iterable[str]] = None) -> list:
+    """Returns the problems with the rows of an issues CSV file
+
+    When label_names is given every label in the labels column must be
+    one of them, otherwise GitLab would quietly create the misspelled ones
+    """
+    known = set(label_names) if label_names is not None else None
+    problems = []
+    titles = {}
+    for number, row in _rows(rows, ("title",), problems):
+        title = (row.get("title") or "").strip()
+        if title in titles:
+            problems.append(Problem(number, "title", f"duplicate of row {titles[title]}"))
+        elif title:
+            titles[title] = number
+        if known is not None:
+            for name in (row.get("labels") or "").split(","):
+                name = name.strip()
+                if name and name not in known:
+                    problems.append(Problem(number, "labels", f"label {name!r} does not exist"))
+        problems.extend(_too_long(number, row, ISSUE_LIMITS))
+    return problems
+
+
+def is_color(value: str) -> bool:
+    """Returns True if GitLab accepts value as a label color"""
+    return bool(HEX_COLOR.match(value)) or value.lower() in HTML_COLOR_CODES
+
+
+def _rows(rows: Iterable[dict], required: tuple, problems: list):
+    """Yields (row number, row) and adds a problem for each missing required value
+
+    A required column that is not in the header is reported once
+    """
+    missing_columns = None
+    for number, row in enumerate(rows, start=1):
+        if missing_columns is None:
+            missing_columns = [column for column in required if column not in row]
+            for column in missing_columns:
+                problems.append(Problem(0, column, "required column is missing"))
+        for column in required:
+            if column not in missing_columns and not (row.get(column) or "").strip():
+                problems.append(Problem(number, column, "missing"))
+        yield number, row
+
+
+def _too_long(number: int, row: dict, limits: dict) -> list:
+    """Returns a problem for each value longer than GitLab allows"""
+    return [
+        Problem(number, column, f"longer than {limit} characters")
+        for column, limit in limits.items()
+        if len(row.get(column) or "") > limit
+    ]
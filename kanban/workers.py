@@ -0,0 +1,144 @@
+######################################################################
+# Copyright 2022 John Rofrano. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the 'License');
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an 'AS IS' BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+######################################################################
+
+"""
+Workers Module
+
+This module runs a function over the rows of a bulk command on a bounded
+thread pool while keeping track of which rows failed
+"""
+import logging
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import TYPE_CHECKING, Callable, Iterable, Iterator, Optional
+
+if TYPE_CHECKING:
+    from tqdm import tqdm
+
+logger = logging.getLogger()
+
+# Progress bars are hidden on threads that run a command for one of many projects
+_local = threading.local()
+
+
+def hide_progress(hidden: bool = True) -> None:
+    """Hides the progress bars of run() on the calling thread"""
+    _local.hidden = hidden
+
+
+class Failure:
+    """A row that could not be sent to GitLab"""
+
+    def __init__(self, index: int, item, error: str):
+        self.index = index
+        self.item = item
+        self.error = error
+
+    def __repr__(self):
+        return f"<Failure row={self.index} error={self.error}>"
+
+
+class Summary:
+    """The outcome of running a function over a set of rows"""
+
+    def __init__(self):
+        self.succeeded = 0
+        self.failures = []
+
+    def __repr__(self):
+        return f"<Summary succeeded={self.succeeded} failed={len(self.failures)}>"
+
+    @property
+    def failed(self) -> int:
+        """The number of rows that failed"""
+        return len(self.failures)
+
+
+def _call(func: Callable, item) -> tuple:
+    """Calls func on item and returns a (result, error) tuple"""
+    try:
+        result = func(item)
+    except Exception as error:  # pylint: disable=broad-except
+        logger.exception("Row failed: %s", item)
+        return None, str(error) or error.__class__.__name__
+    if not result:
+        return result, "GitLab request failed"
+    return result, None
+
+
+def imap(
+    func: Callable, items: Iterable, workers: int = 1, ordered: bool = False
+) -> Iterator[tuple]:
+    """Calls func on every item using up to workers threads
+
+    Yields (index, item, result, error) tuples as each call finishes, or in
+    input order when ordered is True. Only a bounded number of items are
+    taken from the iterable at a time so it may be a lazy stream.
+    """
+    if workers <= 1:
+        for index, item in enumerate(items):
+            yield (index, item) + _call(func, item)
+        return
+
+    max_pending = workers * 2
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        pending = deque()
+        for index, item in enumerate(items):
+            pending.append((executor.submit(_call, func, item), index, item))
+            if len(pending) >= max_pending:
+                yield from _drain(pending, ordered, until=max_pending - 1)
+        yield from _drain(pending, ordered, until=0)
+
+
+def _drain(pending: deque, ordered: bool, until: int) -> Iterator[tuple]:
+    """Yields finished calls until no more than until calls are pending"""
+    while len(pending) > until:
+        if ordered:
+            future, index, item = pending.popleft()
+            yield (index, item) + future.result()
+            continue
+        wait([entry[0] for entry in pending], return_when=FIRST_COMPLETED)
+        for entry in [entry for entry in pending if entry[0].done()]:
+            pending.remove(entry)
+            future, index, item = entry
+            yield (index, item) + future.result()
+
+
+def progress_bar(iterable: Iterable = None, total: Optional[int] = None) -> "tqdm":
+    """Returns a progress bar unless they are hidden on this thread"""
+    from tqdm import tqdm  # pylint: disable=import-outside-toplevel,redefined-outer-name
+
+    return tqdm(iterable, total=total, disable=getattr(_local, "hidden", False))
+
+
+def run(
+    func: Callable,
+    items: Iterable,
+    workers: int = 1,
+    ordered: bool = False,
+    total: Optional[int] = None,
+) -> Summary:
+    """Runs func over items with a progress bar and summarizes the failures"""
+    summary = Summary()
+    with progress_bar(total=total) as progress:
+        for index, item, _, error in imap(func, items, workers, ordered):
+            if error:
+                summary.failures.append(Failure(index, item, error))
+            else:
+                summary.succeeded += 1
+            progress.update(1)
+    return summary
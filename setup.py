@@ -12,7 +12,7 @@ setup(
     keywords="gitlab kanban",
     license="Apache",
     python_requires=">=3.9.0",
-    packages=find_packages(exclude=["tests"]),
+    packages=find_packages(exclude=["tests", "benchmarks"]),
     include_package_data=True,
     install_requires=[
         'click==8.1.3',
@@ -30,6 +30,9 @@ setup(
         'Programming Language :: Python :: 3.9',
     ],
     extras_require = {
+        "async": [
+            "httpx==0.23.0"
+        ],
         "dev": [
             "nose==1.3.7",
             "pinocchio==0.4.3",
@@ -0,0 +1,87 @@
+######################################################################
+# Copyright 2022 John Rofrano. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the 'License');
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an 'AS IS' BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+######################################################################
+import asyncio
+import json
+from unittest import IsolatedAsyncioTestCase, skipIf
+from kanban.models import aio
+
+
+@skipIf(aio.httpx is None, "httpx is not installed")
+class TestAsyncGitLab(IsolatedAsyncioTestCase):
+    """Test the asyncio GitLab wrapper"""
+
+    async def asyncSetUp(self):
+        self.requests = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        transport = aio.httpx.MockTransport(self.handler)
+        self.gitlab = aio.AsyncGitLab("1", "token", "https://gitlab.example.com", concurrency=2, transport=transport)
+
+    async def asyncTearDown(self):
+        await self.gitlab.close()
+
+    def handler(self, request):
+        """Answers requests like GitLab would"""
+        self.requests.append(request)
+        if request.method == "POST":
+            return aio.httpx.Response(201, json=json.loads(request.content))
+        if request.method == "DELETE":
+            return aio.httpx.Response(204)
+        page = int(request.url.params.get("page", "1"))
+        headers = {"X-Next-Page": "2"} if page == 1 else {}
+        return aio.httpx.Response(200, json=[{"id": page, "name": f"label {page}"}], headers=headers)
+
+    async def test_get_all(self):
+        """It should follow pages asynchronously"""
+        labels = [label async for label in aio.AsyncLabel(self.gitlab).all()]
+        self.assertEqual([label["id"] for label in labels], [1, 2])
+        self.assertEqual(self.requests[0].headers["Authorization"], "Bearer token")
+
+    async def test_find_by_name(self):
+        """It should find a label by name"""
+        labels = await aio.AsyncLabel(self.gitlab).find_by_name("label 2")
+        self.assertEqual(len(labels), 1)
+
+    async def test_create_many(self):
+        """It should create labels concurrently"""
+        rows = [{"name": f"label {index}"} for index in range(5)]
+        results = await aio.AsyncLabel(self.gitlab).create_many(rows)
+        self.assertEqual(results, rows)
+
+    async def test_concurrency_limit(self):
+        """It should never have more than concurrency requests in flight"""
+        original = self.gitlab.client.request
+
+        async def tracking_request(*args, **kwargs):
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+            await asyncio.sleep(0.01)
+            try:
+                return await original(*args, **kwargs)
+            finally:
+                self.in_flight -= 1
+
+        self.gitlab.client.request = tracking_request
+        await aio.AsyncIssue(self.gitlab).delete_many(range(6))
+        self.assertEqual(self.max_in_flight, 2)
+
+    async def test_for_project(self):
+        """It should share the pool and semaphore across projects"""
+        other = self.gitlab.for_project("2")
+        self.assertIs(other.client, self.gitlab.client)
+        self.assertIs(other.semaphore, self.gitlab.semaphore)
+        await aio.AsyncBoard(other).create({"name": "Board"})
+        self.assertIn("/projects/2/boards", str(self.requests[-1].url))
@@ -0,0 +1,112 @@
+######################################################################
+# Copyright 2022 John Rofrano. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the 'License');
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an 'AS IS' BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+######################################################################
+import csv
+import os
+import tempfile
+from unittest import TestCase
+from unittest.mock import patch
+from click.testing import CliRunner
+from kanban.cli import cli
+from kanban.models import GitLab, Label
+from benchmarks.mock_gitlab import HttpError, MockGitLab
+from benchmarks.run import compare, failures, main, write_issues, write_labels
+
+
+class TestMockGitLab(TestCase):
+    """Test Cases for the benchmark mock server"""
+
+    def setUp(self):
+        self.mock = MockGitLab().start()
+        self.directory = tempfile.TemporaryDirectory()  # pylint: disable=consider-using-with
+        self.runner = CliRunner()
+
+    def tearDown(self):
+        self.mock.stop()
+        self.directory.cleanup()
+
+    def kanban(self, *args):
+        """Runs kanban against the mock server"""
+        return self.runner.invoke(cli, ["-t", "token", "-p", "1", "-u", self.mock.url] + list(args))
+
+    def test_create_and_delete(self):
+        """It should run the commands against the mock server"""
+        labels = os.path.join(self.directory.name, "labels.csv")
+        issues = os.path.join(self.directory.name, "issues.csv")
+        write_labels(labels, 5)
+        write_issues(issues, 30)
+        result = self.kanban("boards", "create", "-n", "Bench", "-i", labels, "--workers", "4")
+        self.assertEqual(result.exit_code, 0, result.output)
+        self.assertEqual(len(self.mock.labels), 5)
+        board = list(self.mock.boards.values())[0]
+        self.assertEqual([item["label"]["name"] for item in board["lists"]][:2], ["BLOCKED 0", "Lab 1"])
+        result = self.kanban("issues", "create", "-i", issues, "--workers", "4")
+        self.assertEqual(result.exit_code, 0, result.output)
+        self.assertEqual(len(self.mock.issues), 30)
+        result = self.kanban("issues", "delete", "-i", issues, "--workers", "4")
+        self.assertEqual(result.exit_code, 0, result.output)
+        self.assertEqual(len(self.mock.issues), 0)
+
+    def test_boards_create_many_lists(self):
+        """It should order boards with more lists than fit on one page"""
+        labels = os.path.join(self.directory.name, "labels.csv")
+        write_labels(labels, 30)
+        result = self.kanban("boards", "create", "-n", "Bench", "-i", labels, "--workers", "4")
+        self.assertEqual(result.exit_code, 0, result.output)
+        board = list(self.mock.boards.values())[0]
+        self.assertEqual(len(board["lists"]), 30)
+        with open(labels, encoding="utf-8") as csv_file:
+            names = [row["name"] for row in csv.DictReader(csv_file)]
+        self.assertEqual([item["label"]["name"] for item in board["lists"]], names)
+
+    def test_pagination(self):
+        """It should page through lists with the GitLab headers"""
+        for number in range(250):
+            self.mock.create_label({"name": f"label {number}"})
+        with GitLab("1", "token", self.mock.url) as gitlab:
+            self.assertEqual(len(list(Label(gitlab).all())), 250)
+
+    def test_errors_and_throttling(self):
+        """It should retry random errors and throttle with 429 responses"""
+        self.mock.stop()
+        self.mock = MockGitLab(error_rate=0.2, seed=1).start()
+        with GitLab("1", "token", self.mock.url, backoff=0.01, retries=10) as gitlab:
+            label = Label(gitlab)
+            for number in range(60):
+                self.assertTrue(label.create({"name": f"label {number}"}))
+        self.assertEqual(len(self.mock.labels), 60)
+        self.assertGreater(self.mock.requests, 60)
+        self.mock.rate_limit, self.mock.tokens = 1, 1
+        self.assertIn("RateLimit-Remaining", self.mock.throttle())
+        self.assertRaises(HttpError, self.mock.throttle)
+        self.assertEqual(self.mock.throttled, 1)
+
+    def test_compare(self):
+        """It should report scenarios slower than the baseline"""
+        baseline = {"results": [{"scenario": "labels create", "size": 100, "wall_seconds": 1.0}]}
+        results = {"results": [{"scenario": "labels create", "size": 100, "wall_seconds": 1.5}]}
+        self.assertEqual(len(compare(results, baseline)), 1)
+        self.assertEqual(compare(baseline, results), [])
+
+    def test_failed_scenarios(self):
+        """It should leave failed scenarios out of the comparison and fail the run"""
+        baseline = {"results": [{"scenario": "boards create", "size": 100, "wall_seconds": 1.0, "exit_code": 0}]}
+        results = {"results": [{"scenario": "boards create", "size": 100, "wall_seconds": 0.1, "exit_code": 1}]}
+        self.assertEqual(compare(results, baseline, threshold=-1), [])
+        self.assertEqual(compare(baseline, results, threshold=-1), [])
+        self.assertEqual(failures(results), results["results"])
+        output = os.path.join(self.directory.name, "results.json")
+        with patch("benchmarks.run.run", return_value=results):
+            self.assertEqual(main(["--output", output]), 1)
@@ -0,0 +1,96 @@
+######################################################################
+# Copyright 2022 John Rofrano. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the 'License');
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an 'AS IS' BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+######################################################################
+import os
+import tempfile
+import time
+from unittest import TestCase
+from unittest.mock import patch
+import requests
+from requests.structures import CaseInsensitiveDict
+from kanban.models import GitLab
+from kanban.models.cache import ResponseCache
+
+
+def make_response(status_code: int, body: str = "", headers: dict = None) -> requests.Response:
+    """Creates a real requests.Response"""
+    result = requests.Response()
+    result.status_code = status_code
+    result.url = "https://gitlab.example.com/api/v4/projects/1/labels?per_page=100"
+    result.encoding = "utf-8"
+    result.headers = CaseInsensitiveDict(headers or {})
+    result._content = body.encode("utf-8")  # pylint: disable=protected-access
+    return result
+
+
+class TestResponseCache(TestCase):
+    """Test the on disk response cache"""
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()  # pylint: disable=consider-using-with
+        self.cache = ResponseCache(self.tmpdir.name)
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_store_and_load(self):
+        """It should save and load an entry"""
+        self.cache.store("key", make_response(200, "[1]", {"ETag": "abc", "X-Next-Page": "2"}))
+        entry = self.cache.load("key")
+        self.assertEqual(entry["headers"]["ETag"], "abc")
+        result = self.cache.response(entry)
+        self.assertEqual(result.json(), [1])
+        self.assertEqual(result.headers["x-next-page"], "2")
+
+    def test_ttl(self):
+        """It should discard entries older than the ttl"""
+        self.cache.ttl = 10
+        self.cache.store("key", make_response(200, "[1]", {"ETag": "abc"}))
+        with patch("time.time", return_value=time.time() + 60):
+            self.assertIsNone(self.cache.load("key"))
+
+    def test_lru_eviction(self):
+        """It should evict the least recently used entries first"""
+        self.cache.store("old", make_response(200, "x" * 500, {"ETag": "1"}))
+        old_path = self.cache._path("old")  # pylint: disable=protected-access
+        os.utime(old_path, (1, 1))
+        self.cache.max_size = 1000
+        self.cache.store("new", make_response(200, "y" * 500, {"ETag": "2"}))
+        self.assertIsNone(self.cache.load("old"))
+        self.assertIsNotNone(self.cache.load("new"))
+
+    def test_entries_removed_by_other_threads(self):
+        """It should not fail when another thread evicts an entry it is using"""
+        self.cache.store("key", make_response(200, "[1]", {"ETag": "abc"}))
+        with patch("os.utime", side_effect=FileNotFoundError):
+            self.assertEqual(self.cache.load("key")["headers"]["ETag"], "abc")
+        with patch("os.stat", side_effect=FileNotFoundError):
+            self.cache.evict()
+
+    @patch("requests.Session.request")
+    def test_conditional_get(self, request_mock):
+        """It should send If-None-Match and serve a 304 from the cache"""
+        gitlab = GitLab("1", "token", "https://gitlab.example.com", cache=self.cache)
+        request_mock.side_effect = [
+            make_response(200, '[{"id": 1}]', {"ETag": "abc"}),
+            make_response(304),
+        ]
+        self.assertEqual(list(gitlab.get_all("labels")), [{"id": 1}])
+        self.assertEqual(list(gitlab.get_all("labels")), [{"id": 1}])
+        self.assertEqual(request_mock.call_args.kwargs["headers"], {"If-None-Match": "abc"})
+        for name in os.listdir(self.tmpdir.name):
+            with open(os.path.join(self.tmpdir.name, name), encoding="utf-8") as cache_file:
+                self.assertNotIn("token", cache_file.read())
+        gitlab.close()
@@ -0,0 +1,269 @@
+######################################################################
+# Copyright 2022 John Rofrano. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the 'License');
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an 'AS IS' BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+######################################################################
+import json
+from unittest import TestCase
+from unittest.mock import patch, MagicMock
+import requests
+from kanban.models import Board, GitLab, Issue, Label
+from benchmarks.mock_gitlab import HttpError, MockGitLab
+
+
+def mock_response(status_code: int = 200, payload=None, headers: dict = None):
+    """Creates a mock requests.Response"""
+    response = MagicMock()
+    response.status_code = status_code
+    response.json.return_value = payload
+    response.text = json.dumps(payload)
+    response.headers = headers or {}
+    return response
+
+
+class TestGitLab(TestCase):
+    """Test the GitLab wrapper"""
+
+    def setUp(self):
+        self.gitlab = GitLab("1", "token", "https://gitlab.example.com", backoff=0)
+
+    def tearDown(self):
+        self.gitlab.close()
+
+    def test_session_headers(self):
+        """It should set the authorization header once on the session"""
+        self.assertEqual(self.gitlab.session.headers["Authorization"], "Bearer token")
+
+    def test_pool_size(self):
+        """It should mount a connection pool of the requested size"""
+        gitlab = GitLab("1", "token", pool_size=4)
+        adapter = gitlab.session.get_adapter("https://gitlab.com")
+        self.assertEqual(adapter._pool_maxsize, 4)  # pylint: disable=protected-access
+        gitlab.close()
+
+    @patch("requests.Session.request")
+    def test_get_reuses_session(self, request_mock):
+        """It should send every request through the same session"""
+        request_mock.return_value = mock_response(200, [{"id": 1}])
+        self.assertEqual(self.gitlab.get("labels"), [{"id": 1}])
+        self.assertEqual(self.gitlab.get("labels"), [{"id": 1}])
+        self.assertEqual(request_mock.call_count, 2)
+
+    @patch("requests.Session.request")
+    def test_post(self, request_mock):
+        """It should POST json data"""
+        request_mock.return_value = mock_response(201, {"id": 1})
+        self.assertEqual(self.gitlab.post("labels", {"name": "foo"}), {"id": 1})
+        self.assertEqual(request_mock.call_args.kwargs["json"], {"name": "foo"})
+
+    @patch("requests.Session.request")
+    def test_timeout(self, request_mock):
+        """It should send every request with a timeout so a stalled connection is retried"""
+        request_mock.side_effect = [requests.Timeout("stalled"), mock_response(200, [{"id": 1}])]
+        gitlab = GitLab("1", "token", timeout=5)
+        self.assertEqual(gitlab.get("labels"), [{"id": 1}])
+        self.assertEqual(request_mock.call_count, 2)
+        self.assertEqual(request_mock.call_args.kwargs["timeout"], 5)
+        gitlab.close()
+
+    @patch("requests.Session.request")
+    def test_post_failed(self, request_mock):
+        """It should return an empty payload when a POST fails"""
+        request_mock.return_value = mock_response(400, {"message": "bad"})
+        self.assertEqual(self.gitlab.post("labels", {"name": "foo"}), {})
+
+    def test_context_manager(self):
+        """It should close the session when used as a context manager"""
+        gitlab = GitLab("1", "token")
+        with patch.object(gitlab.session, "close") as close_mock:
+            with gitlab:
+                pass
+        close_mock.assert_called_once()
+
+    ######################################################################
+    # Pagination test cases
+    ######################################################################
+
+    @patch("requests.Session.request")
+    def test_get_all_next_page(self, request_mock):
+        """It should follow the X-Next-Page header across pages"""
+        request_mock.side_effect = [
+            mock_response(200, [{"id": 1}, {"id": 2}], {"X-Next-Page": "2"}),
+            mock_response(200, [{"id": 3}], {"X-Next-Page": ""}),
+        ]
+        results = list(self.gitlab.get_all("issues"))
+        self.assertEqual([item["id"] for item in results], [1, 2, 3])
+        self.assertEqual(request_mock.call_args.kwargs["params"]["page"], "2")
+        self.assertEqual(request_mock.call_args.kwargs["params"]["per_page"], 100)
+
+    @patch("requests.Session.request")
+    def test_get_all_link_header(self, request_mock):
+        """It should follow the rel=next Link header"""
+        next_url = "https://gitlab.example.com/api/v4/projects/1/labels?id_after=2"
+        request_mock.side_effect = [
+            mock_response(200, [{"id": 1}, {"id": 2}], {"Link": f'<{next_url}>; rel="next"'}),
+            mock_response(200, [{"id": 3}]),
+        ]
+        results = list(self.gitlab.get_all("labels", keyset=True))
+        self.assertEqual(len(results), 3)
+        self.assertEqual(request_mock.call_args.args[1], next_url)
+        self.assertIsNone(request_mock.call_args.kwargs["params"])
+
+    @patch("requests.Session.request")
+    def test_get_all_limit(self, request_mock):
+        """It should stop fetching pages once the limit is reached"""
+        request_mock.return_value = mock_response(200, [{"id": 1}, {"id": 2}], {"X-Next-Page": "2"})
+        results = list(self.gitlab.get_all("issues", limit=2))
+        self.assertEqual(len(results), 2)
+        self.assertEqual(request_mock.call_count, 1)
+
+    @patch("requests.Session.request")
+    def test_get_all_no_limit_left(self, request_mock):
+        """It should return nothing without a request when the limit is zero or less"""
+        request_mock.return_value = mock_response(200, [{"id": 1}, {"id": 2}])
+        self.assertEqual(list(self.gitlab.get_all("issues", limit=0)), [])
+        self.assertEqual(list(self.gitlab.get_all("issues", limit=-1)), [])
+        request_mock.assert_not_called()
+
+    @patch("requests.Session.request")
+    def test_post_throttled(self, request_mock):
+        """It should send a POST again after a 429"""
+        request_mock.side_effect = [
+            mock_response(429, {"message": "slow down"}, {"Retry-After": "0"}),
+            mock_response(201, {"id": 1}),
+        ]
+        self.assertEqual(self.gitlab.post("labels", {"name": "foo"}), {"id": 1})
+        self.assertEqual(request_mock.call_count, 2)
+
+    @patch("requests.Session.request")
+    def test_get_pages_concurrently(self, request_mock):
+        """It should fetch the remaining pages concurrently and in order"""
+
+        def respond(method, url, params=None, **kwargs):  # pylint: disable=unused-argument
+            page = int(params.get("page", 1))
+            return mock_response(200, [{"id": page}], {"X-Total-Pages": "5", "X-Next-Page": str(page + 1)})
+
+        request_mock.side_effect = respond
+        pages = list(self.gitlab.get_pages("issues", workers=3))
+        self.assertEqual(pages, [[{"id": page}] for page in range(1, 6)])
+        self.assertEqual(request_mock.call_count, 5)
+
+    ######################################################################
+    # Retry test cases
+    ######################################################################
+
+    @patch("requests.Session.request")
+    def test_get_retry(self, request_mock):
+        """It should retry a GET after a transient failure"""
+        request_mock.side_effect = [
+            mock_response(502, {}),
+            requests.ConnectionError("reset"),
+            mock_response(200, [{"id": 1}]),
+        ]
+        self.assertEqual(self.gitlab.get("labels"), [{"id": 1}])
+        self.assertEqual(request_mock.call_count, 3)
+
+    @patch("requests.Session.request")
+    def test_get_retries_exhausted(self, request_mock):
+        """It should give up after the configured number of retries"""
+        request_mock.return_value = mock_response(503, {})
+        self.assertEqual(self.gitlab.get("labels"), [])
+        self.assertEqual(request_mock.call_count, 4)
+
+    @patch("requests.Session.request")
+    def test_post_not_replayed(self, request_mock):
+        """It should not send a POST again without a lookup"""
+        request_mock.return_value = mock_response(502, {})
+        self.assertEqual(self.gitlab.post("labels", {"name": "foo"}), {})
+        self.assertEqual(request_mock.call_count, 1)
+
+    @patch("requests.Session.request")
+    def test_post_replay_finds_existing(self, request_mock):
+        """It should return the existing object instead of creating it again"""
+        request_mock.side_effect = [
+            requests.ConnectionError("reset"),
+            mock_response(200, [{"id": 7, "name": "foo"}, {"id": 8, "name": "foobar"}]),
+        ]
+        result = Label(self.gitlab).create({"name": "foo"})
+        self.assertEqual(result["id"], 7)
+        self.assertEqual(request_mock.call_count, 2)
+        self.assertEqual(request_mock.call_args.args[0], "GET")
+
+    @patch("requests.Session.request")
+    def test_post_replay_when_missing(self, request_mock):
+        """It should send a POST again when the lookup finds nothing"""
+        request_mock.side_effect = [
+            mock_response(502, {}),
+            mock_response(200, []),
+            mock_response(201, {"id": 7, "name": "foo"}),
+        ]
+        result = Label(self.gitlab).create({"name": "foo"})
+        self.assertEqual(result["id"], 7)
+        self.assertEqual(request_mock.call_count, 3)
+
+
+    @patch("requests.Session.request")
+    def test_board_replay_ignores_older_boards(self, request_mock):
+        """It should not mistake an older board with the same name for the one it created"""
+        old_board = {"id": 3, "name": "Dev"}
+        request_mock.side_effect = [
+            mock_response(200, [old_board]),
+            mock_response(502, {}),
+            mock_response(200, [old_board]),
+            mock_response(201, {"id": 9, "name": "Dev"}),
+        ]
+        result = Board(self.gitlab).create({"name": "Dev"})
+        self.assertEqual(result["id"], 9)
+        self.assertEqual(request_mock.call_args.args[0], "POST")
+
+
+class TestPurge(TestCase):
+    """Test deleting everything in a listing"""
+
+    def setUp(self):
+        self.mock = MockGitLab().start()
+        self.gitlab = GitLab("1", "token", self.mock.url, backoff=0, retries=0)
+
+    def tearDown(self):
+        self.gitlab.close()
+        self.mock.stop()
+
+    def test_purge(self):
+        """It should delete every page, not only the first"""
+        for number in range(250):
+            self.mock.create_issue({"title": f"Issue {number}"})
+        batches = []
+        deleted, failed = Issue(self.gitlab).delete_all(workers=4, on_batch=batches.append)
+        self.assertEqual((deleted, failed), (250, []))
+        self.assertEqual(self.mock.issues, {})
+        self.assertEqual(batches, [100, 100, 50])
+
+    def test_purge_failures(self):
+        """It should step over items that cannot be deleted"""
+        for number in range(150):
+            self.mock.create_label({"name": f"Label {number}"})
+        protected = {label["id"] for label in list(self.mock.labels.values())[:120]}
+        delete_label = self.mock.delete_label
+
+        def refuse(key):
+            if int(key) in protected:
+                raise HttpError(403, "403 Forbidden")
+            return delete_label(key)
+
+        self.mock.delete_label = refuse
+        label = Label(self.gitlab)
+        self.assertEqual(label.count(), 150)
+        deleted, failed = label.delete_all(workers=4)
+        self.assertEqual(deleted, 30)
+        self.assertEqual(set(failed), protected)
+        self.assertEqual(label.count(), 120)
@@ -0,0 +1,118 @@
+######################################################################
+# Copyright 2022 John Rofrano. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the 'License');
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an 'AS IS' BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+######################################################################
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import TestCase
+from click.testing import CliRunner
+from kanban.cli import cli
+from kanban.models import GitLab, Board
+
+
+def issue_node(iid: int) -> dict:
+    """Returns a GraphQL issue node"""
+    return {
+        "iid": str(iid),
+        "title": f"Issue {iid}",
+        "weight": None,
+        "assignees": {"nodes": [{"username": "rofrano"}]},
+        "labels": {"nodes": [{"title": "In Progress"}]},
+    }
+
+
+def connection(iids: list, cursor: str = None) -> dict:
+    """Returns a GraphQL issue connection"""
+    return {
+        "pageInfo": {"hasNextPage": cursor is not None, "endCursor": cursor},
+        "nodes": [issue_node(iid) for iid in iids],
+    }
+
+
+class StubGraphQL(BaseHTTPRequestHandler):
+    """A local stand in for the GitLab REST and GraphQL endpoints"""
+
+    queries = []
+
+    def log_message(self, *args):  # pylint: disable=arguments-differ
+        pass
+
+    def reply(self, payload: dict):
+        """Sends a JSON response"""
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):  # pylint: disable=invalid-name
+        """Answers the project lookup"""
+        self.reply({"id": 1, "path_with_namespace": "team/project"})
+
+    def do_POST(self):  # pylint: disable=invalid-name
+        """Answers the board query and the follow up page query"""
+        request = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        StubGraphQL.queries.append(request)
+        variables = request["variables"]
+        if "project(" in request["query"]:
+            lists = [
+                {"id": "gid://gitlab/List/1", "title": "Open", "position": None, "listType": "backlog",
+                 "label": None, "issues": connection([1])},
+                {"id": "gid://gitlab/List/2", "title": "In Progress", "position": 0, "listType": "label",
+                 "label": {"title": "In Progress"}, "issues": connection([2, 3], "cursor-1")},
+            ]
+            self.reply({"data": {"project": {"board": {"id": variables["boardId"], "name": "Dev", "lists": {"nodes": lists}}}}})
+        else:
+            self.reply({"data": {"list0": {"issues": connection([4])}}})
+
+
+class TestGraphQL(TestCase):
+    """Test the GraphQL board snapshot against a local stub"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), StubGraphQL)
+        cls.url = f"http://127.0.0.1:{cls.server.server_address[1]}"
+        cls.thread = threading.Thread(target=cls.server.serve_forever, daemon=True)
+        cls.thread.start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self):
+        StubGraphQL.queries.clear()
+
+    def test_snapshot(self):
+        """It should read the board, its lists and all of their issues"""
+        with GitLab("1", "token", self.url) as gitlab:
+            snapshot = Board(gitlab).snapshot(5)
+        self.assertEqual(snapshot["name"], "Dev")
+        self.assertEqual(StubGraphQL.queries[0]["variables"]["fullPath"], "team/project")
+        self.assertEqual(StubGraphQL.queries[0]["variables"]["boardId"], "gid://gitlab/Board/5")
+        self.assertEqual(StubGraphQL.queries[1]["variables"]["list0After"], "cursor-1")
+        self.assertEqual(len(StubGraphQL.queries), 2)
+        in_progress = snapshot["lists"][1]
+        self.assertEqual([issue["iid"] for issue in in_progress["issues"]], ["2", "3", "4"])
+        self.assertEqual(in_progress["issues"][0]["assignees"], ["rofrano"])
+
+    def test_boards_show(self):
+        """It should print the board lists and issues"""
+        result = CliRunner().invoke(cli, ["-t=1", "-p=1", "-u", self.url, "boards", "show", "-b", "5"])
+        self.assertEqual(result.exit_code, 0, result.output)
+        self.assertIn("In Progress (3)", result.output)
+        self.assertIn("#4 Issue 4 [rofrano]", result.output)
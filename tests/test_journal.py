@@ -0,0 +1,77 @@
+######################################################################
+# Copyright 2022 John Rofrano. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the 'License');
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an 'AS IS' BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+######################################################################
+import os
+import shutil
+import tempfile
+from unittest import TestCase
+from unittest.mock import patch
+from click.testing import CliRunner
+from kanban.cli import cli
+from kanban.journal import Journal
+
+
+class TestJournal(TestCase):
+    """Test the checkpoint journal"""
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmpdir, "import.journal")
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def test_record(self):
+        """It should record the outcome of rows"""
+        with Journal(self.path) as journal:
+            journal.record({"name": "a"}, "done", 1)
+            journal.record({"name": "b"}, "failed", error="boom")
+            self.assertEqual(journal.status({"name": "a"}), "done")
+            self.assertIsNone(journal.status({"name": "c"}))
+            self.assertEqual(journal.counts(), {"done": 1, "failed": 1})
+
+    def test_resume(self):
+        """It should skip rows that were sent and retry the failures"""
+        calls = []
+
+        def send(row):
+            calls.append(row["name"])
+            return {"id": len(calls)} if row["name"] != "b" else {}
+
+        rows = [{"name": "a"}, {"name": "b"}, {"name": "c"}]
+        with Journal(self.path) as journal:
+            for row in rows:
+                journal.wrap(send)(row)
+        calls.clear()
+        with Journal(self.path) as journal:
+            for row in rows:
+                journal.wrap(send, resume=True)(row)
+            self.assertEqual(journal.skipped, 2)
+        self.assertEqual(calls, ["b"])
+
+    @patch("kanban.models.Label.create")
+    def test_labels_create_resume(self, create_mock):
+        """It should not send rows again when resuming an import"""
+        create_mock.return_value = {"id": 1}
+        infile = os.path.join(self.tmpdir, "labels.csv")
+        shutil.copy("tests/fixtures/test_board_labels.csv", infile)
+        runner = CliRunner()
+        args = ["-t=1", "-p=1", "labels", "create", "-i", infile, "--resume"]
+        self.assertEqual(runner.invoke(cli, args).exit_code, 0)
+        self.assertTrue(os.path.exists(f"{infile}.journal"))
+        result = runner.invoke(cli, args)
+        self.assertEqual(result.exit_code, 0)
+        self.assertIn("Skipped 4 rows", result.output)
+        self.assertEqual(create_mock.call_count, 4)
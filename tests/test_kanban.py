@@ -14,12 +14,14 @@
 # limitations under the License.
 ######################################################################
 
+import json
 import os
 import unittest
 from unittest.mock import patch
 from click.testing import CliRunner
 from kanban.cli import cli
-from kanban.cli import csv_to_dict
+from kanban.cli import csv_to_dict, iter_csv, count_csv_rows
+from benchmarks.mock_gitlab import MockGitLab
 
 class TestKanban(unittest.TestCase):
     """Test Cases for kanban commands"""
@@ -39,6 +41,54 @@ class TestKanban(unittest.TestCase):
         self.assertEqual(len(results), 4)
         self.assertIsInstance(results[0], dict)
 
+    def test_iter_csv(self):
+        """It should stream a CSV file as dictionaries"""
+        rows = iter_csv("tests/fixtures/test_board_labels.csv")
+        self.assertEqual(next(rows)["name"], "Product Backlog")
+        self.assertEqual(len(list(rows)), 3)
+
+    def test_count_csv_rows(self):
+        """It should count the data rows without parsing the file"""
+        self.assertEqual(count_csv_rows("tests/fixtures/test_board_labels.csv"), 4)
+        self.assertEqual(count_csv_rows("tests/fixtures/issues.csv"), 3)
+
+    @patch("kanban.models.Issue.create")
+    def test_issues_create_missing_title(self, create_mock):
+        """It should fail rows that are missing a title without sending them"""
+        create_mock.return_value = {"iid": 1}
+        with self.runner.isolated_filesystem():
+            with open("issues.csv", "w", encoding="utf-8") as csv_file:
+                csv_file.write('"title","description","labels"\n"One","",""\n"","No title",""\n')
+            result = self.runner.invoke(cli, ["-t=1", "-p=1", "issues", "create", "-i", "issues.csv", "--no-validate"])
+        self.assertEqual(result.exit_code, 1)
+        self.assertIn("row 2 (): missing title", result.output)
+        self.assertEqual(create_mock.call_count, 1)
+
+    def test_negative_limit(self):
+        """It should refuse a negative --limit"""
+        result = self.runner.invoke(cli, ["-t=1", "-p=1", "issues", "list", "--limit", "-1"])
+        self.assertEqual(result.exit_code, 2)
+        self.assertIn("-1 is not in the range x>=0", result.output)
+
+    @patch("kanban.models.Issue.create")
+    @patch("kanban.models.Label.name_index")
+    def test_issues_create_invalid(self, index_mock, create_mock):
+        """It should report every problem in the CSV file without sending any row"""
+        index_mock.return_value = {"Backlog": []}
+        with self.runner.isolated_filesystem():
+            with open("issues.csv", "w", encoding="utf-8") as csv_file:
+                csv_file.write(
+                    '"title","description","labels"\n"One","","Backlog"\n"","No title",""\n"One","","Bakclog"\n'
+                )
+            result = self.runner.invoke(cli, ["-t=1", "-p=1", "issues", "create", "-i", "issues.csv"])
+        self.assertEqual(result.exit_code, 1)
+        self.assertIn("Found 3 problems in issues.csv, nothing was sent to GitLab", result.output)
+        self.assertIn("row 2 (title): missing", result.output)
+        self.assertIn("row 3 (title): duplicate of row 1", result.output)
+        self.assertIn("row 3 (labels): label 'Bakclog' does not exist", result.output)
+        index_mock.assert_called_once()
+        create_mock.assert_not_called()
+
     ######################################################################
     # Boards test cases
     ######################################################################
@@ -90,6 +140,44 @@ class TestKanban(unittest.TestCase):
         self.assertEqual(result.exit_code, 0)
 
 
+    @patch("kanban.models.Board.find")
+    @patch("kanban.models.Board.order_lists")
+    @patch("kanban.models.Board.create_list")
+    @patch("kanban.models.Board.create")
+    @patch("kanban.models.Label.find_or_create")
+    @patch("kanban.models.Label.name_index")
+    def test_boards_create(self, index_mock, label_mock, board_mock, list_mock, order_mock, find_mock):
+        """It should create labels concurrently and lists in label order"""
+        # pylint: disable=too-many-arguments
+        index_mock.return_value = {}
+        label_mock.side_effect = lambda entry, index: {"id": len(entry["name"])}
+        board_mock.return_value = {"id": 9}
+        list_mock.return_value = {"id": 1}
+        order_mock.return_value = 0
+        find_mock.return_value = {"id": 9}
+        result = self.runner.invoke(
+            cli, ["-t=1", "-p=1", "boards", "create", "-n", "Dev", "-i", "tests/fixtures/test_board_labels.csv", "-w", "4"]
+        )
+        self.assertEqual(result.exit_code, 0, result.output)
+        label_ids = [len(name) for name in ("Product Backlog", "Sprint Backlog", "In Progress", "Done")]
+        order_mock.assert_called_once_with(9, label_ids)
+        self.assertEqual(list_mock.call_count, 4)
+
+    @patch("kanban.models.Board.create")
+    @patch("kanban.models.Label.find_or_create")
+    @patch("kanban.models.Label.name_index")
+    def test_boards_create_label_failed(self, index_mock, label_mock, board_mock):
+        """It should not create an empty board when a label fails"""
+        index_mock.return_value = {}
+        label_mock.side_effect = lambda entry, index: {} if entry["name"] == "Done" else {"id": 1}
+        result = self.runner.invoke(
+            cli, ["-t=1", "-p=1", "boards", "create", "-n", "Dev", "-i", "tests/fixtures/test_board_labels.csv", "-w", "4"]
+        )
+        self.assertEqual(result.exit_code, 1, result.output)
+        self.assertIn("Board was not created because some labels failed", result.output)
+        self.assertIn("(Done): GitLab request failed", result.output)
+        board_mock.assert_not_called()
+
     ######################################################################
     # Issues test cases
     ######################################################################
@@ -190,3 +278,159 @@ class TestKanban(unittest.TestCase):
         result = self.runner.invoke(cli, ["-t=1", "labels", "create", "--help"])
         self.assertEqual(result.exit_code, 0)
 
+    @patch("kanban.models.Label.create")
+    def test_labels_create_workers(self, create_mock):
+        """It should create labels on a worker pool"""
+        create_mock.return_value = {"id": 1}
+        result = self.runner.invoke(
+            cli, ["-t=1", "-p=1", "labels", "create", "-i", "tests/fixtures/test_board_labels.csv", "-w", "4"]
+        )
+        self.assertEqual(result.exit_code, 0)
+        self.assertEqual(create_mock.call_count, 4)
+        self.assertIn("4 succeeded, 0 failed", result.output)
+
+    @patch("kanban.models.Label.create")
+    def test_labels_create_invalid(self, create_mock):
+        """It should not send any label when a color is not valid"""
+        with self.runner.isolated_filesystem():
+            with open("labels.csv", "w", encoding="utf-8") as csv_file:
+                csv_file.write('"name","color"\n"Done","#0f0"\n"Doing","grene"\n')
+            result = self.runner.invoke(cli, ["-t=1", "-p=1", "labels", "create", "-i", "labels.csv"])
+        self.assertEqual(result.exit_code, 1)
+        self.assertIn("row 2 (color): 'grene' is not a hex color", result.output)
+        create_mock.assert_not_called()
+
+    @patch("kanban.models.Label.create")
+    def test_labels_create_failures(self, create_mock):
+        """It should summarize the rows that failed"""
+        create_mock.side_effect = [{"id": 1}, {}, {"id": 3}, {"id": 4}]
+        result = self.runner.invoke(
+            cli, ["-t=1", "-p=1", "labels", "create", "-i", "tests/fixtures/test_board_labels.csv"]
+        )
+        self.assertEqual(result.exit_code, 1)
+        self.assertIn("3 succeeded, 1 failed", result.output)
+        self.assertIn("row 2", result.output)
+
+    @patch("kanban.models.Label.create")
+    @patch("kanban.models.Label.update")
+    @patch("kanban.models.Label.all")
+    def test_labels_sync_dry_run(self, all_mock, update_mock, create_mock):
+        """It should print the sync plan without sending anything"""
+        all_mock.return_value = iter([
+            {"id": 1, "name": "Done", "color": "#F0F0F0", "text_color": "#333333", "description": "old"}
+        ])
+        result = self.runner.invoke(
+            cli, ["-t=1", "-p=1", "labels", "sync", "-i", "tests/fixtures/test_board_labels.csv", "--dry-run"]
+        )
+        self.assertEqual(result.exit_code, 0, result.output)
+        self.assertIn("3 to create, 1 to update, 0 to delete, 0 unchanged", result.output)
+        update_mock.assert_not_called()
+        create_mock.assert_not_called()
+
+    @patch("kanban.models.Issue.all")
+    def test_issues_export_csv(self, all_mock):
+        """It should export issues in the issues create CSV format"""
+        all_mock.return_value = iter([
+            {"iid": 1, "title": "What is TDD?", "description": None, "labels": ["Video", "TDD"]},
+        ])
+        with self.runner.isolated_filesystem():
+            result = self.runner.invoke(cli, ["-t=1", "-p=1", "issues", "export", "-o", "issues.csv"])
+            self.assertEqual(result.exit_code, 0, result.output)
+            rows = csv_to_dict("issues.csv")
+        self.assertEqual(rows, [{"title": "What is TDD?", "description": "", "labels": "Video,TDD"}])
+
+    @patch("kanban.models.Label.all")
+    def test_labels_sync_invalid(self, all_mock):
+        """It should report rows without a name and repeated names before planning"""
+        with self.runner.isolated_filesystem():
+            with open("labels.csv", "w", encoding="utf-8") as csv_file:
+                csv_file.write('"name","color"\n"Done","#0f0"\n"","#0f0"\n"Done","red"\n')
+            result = self.runner.invoke(cli, ["-t=1", "-p=1", "labels", "sync", "-i", "labels.csv"])
+            self.assertEqual(result.exit_code, 1, result.output)
+            self.assertIn("row 2 (name): missing", result.output)
+            self.assertIn("row 3 (name): duplicate of row 1", result.output)
+            with open("labels.csv", "w", encoding="utf-8") as csv_file:
+                csv_file.write('"title","color"\n"Done","#0f0"\n')
+            result = self.runner.invoke(cli, ["-t=1", "-p=1", "labels", "sync", "-i", "labels.csv"])
+            self.assertEqual(result.exit_code, 1, result.output)
+            self.assertIn("header (name): required column is missing", result.output)
+        all_mock.assert_not_called()
+
+    @patch("kanban.models.Label.all")
+    def test_labels_export_ndjson(self, all_mock):
+        """It should export the chosen label fields as NDJSON"""
+        all_mock.return_value = iter([{"id": 1, "name": "Done", "color": "#F0F0F0"}])
+        result = self.runner.invoke(
+            cli, ["-t=1", "-p=1", "labels", "export", "--format", "ndjson", "-f", "id,name", "-w", "4"]
+        )
+        self.assertEqual(result.exit_code, 0, result.output)
+        self.assertIn('{"id": 1, "name": "Done"}', result.output)
+        all_mock.assert_called_once_with(workers=4)
+
+    def test_issues_move(self):
+        """It should move the issues of one board list to another"""
+        with MockGitLab() as mock:
+            for number in range(25):
+                mock.create_issue({"title": f"Issue {number}", "labels": "Sprint Backlog" if number % 5 else "Done"})
+            result = self.runner.invoke(cli, [
+                "-t=1", "-p=1", "-u", mock.url, "issues", "move", "--from-label", "Sprint Backlog",
+                "--to-label", "Product Backlog", "-w", "4",
+            ])
+            self.assertEqual(result.exit_code, 0, result.output)
+            self.assertIn("Moved 20 issues", result.output)
+            labels = [issue["labels"] for issue in mock.issues.values()]
+        self.assertEqual(labels.count(["Product Backlog"]), 20)
+        self.assertEqual(labels.count(["Done"]), 5)
+
+    def test_issues_move_csv(self):
+        """It should move the issues named in a CSV file"""
+        with MockGitLab() as mock, self.runner.isolated_filesystem():
+            mock.create_issue({"title": "What is TDD?", "labels": "Video"})
+            mock.create_issue({"title": "Other", "labels": "Video"})
+            with open("move.csv", "w", encoding="utf-8") as csv_file:
+                csv_file.write("title,add_labels\nWhat is TDD?,Done\nMissing,Done\n")
+            result = self.runner.invoke(
+                cli, ["-t=1", "-p=1", "-u", mock.url, "issues", "move", "-i", "move.csv", "--remove-labels", "Video"]
+            )
+            self.assertEqual(result.exit_code, 1, result.output)
+            self.assertIn("Moved 1 issues", result.output)
+            self.assertIn("(Missing): No issue titled Missing", result.output)
+            self.assertEqual(mock.issues[1]["labels"], ["Done"])
+            self.assertEqual(mock.issues[2]["labels"], ["Video"])
+
+    def test_issues_move_needs_filter(self):
+        """It should not move every issue in the project by accident"""
+        result = self.runner.invoke(cli, ["-t=1", "-p=1", "issues", "move", "--to-label", "Done"])
+        self.assertEqual(result.exit_code, 2)
+        self.assertIn("--from-label", result.output)
+
+    def test_labels_purge(self):
+        """It should count with --dry-run and delete every label once confirmed"""
+        with MockGitLab() as mock:
+            for number in range(120):
+                mock.create_label({"name": f"Label {number}"})
+            args = ["-t=1", "-p=1", "-u", mock.url, "labels", "purge", "-w", "4"]
+            result = self.runner.invoke(cli, args + ["--dry-run"])
+            self.assertEqual(result.exit_code, 0, result.output)
+            self.assertIn("Found 120 labels", result.output)
+            result = self.runner.invoke(cli, args, input="n\n")
+            self.assertEqual(result.exit_code, 1, result.output)
+            self.assertEqual(len(mock.labels), 120)
+            result = self.runner.invoke(cli, args, input="y\n")
+            self.assertEqual(result.exit_code, 0, result.output)
+            self.assertIn("Deleted 120 labels", result.output)
+            self.assertEqual(mock.labels, {})
+
+    def test_issues_watch(self):
+        """It should write a snapshot of the issues as NDJSON"""
+        with MockGitLab() as mock:
+            board = mock.create_board({"name": "Development"})
+            mock.create_label({"name": "Doing"})
+            mock.create_list(board["id"], {"label_id": mock.find_label("Doing")["id"]})
+            mock.create_issue({"title": "One", "labels": "Doing"})
+            result = self.runner.invoke(
+                cli, ["-t=1", "-p=1", "-u", mock.url, "issues", "watch", "-b", str(board["id"]), "--polls", "1"]
+            )
+        self.assertEqual(result.exit_code, 0, result.output)
+        event = json.loads(result.stdout.splitlines()[-1])
+        self.assertEqual((event["event"], event["iid"], event["list"]), ("snapshot", 1, "Doing"))
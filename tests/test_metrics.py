@@ -0,0 +1,74 @@
+######################################################################
+# Copyright 2022 John Rofrano. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the 'License');
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an 'AS IS' BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+######################################################################
+from unittest import TestCase
+from unittest.mock import patch
+import requests
+from requests.structures import CaseInsensitiveDict
+from kanban.models import GitLab
+from kanban.models.metrics import Metrics, endpoint_template, percentile
+
+
+def make_response(method: str, url: str, status_code: int, body: bytes = b"", sent: bytes = None) -> requests.Response:
+    """Creates a real requests.Response with its request"""
+    result = requests.Response()
+    result.status_code = status_code
+    result.headers = CaseInsensitiveDict({"Retry-After": "0"} if status_code == 429 else {})
+    result._content = body  # pylint: disable=protected-access
+    result.request = requests.Request(method, url, data=sent).prepare()
+    return result
+
+
+class TestMetrics(TestCase):
+    """Test the request metrics"""
+
+    def test_endpoint_template(self):
+        """It should replace ids and names in endpoints"""
+        base = "https://gitlab.com/api/v4/projects/123"
+        self.assertEqual(endpoint_template(f"{base}/issues?per_page=100"), "issues")
+        self.assertEqual(endpoint_template(f"{base}/boards/7/lists"), "boards/:id/lists")
+        self.assertEqual(endpoint_template(f"{base}/labels/In%20Progress"), "labels/:id")
+        self.assertEqual(endpoint_template("https://gitlab.com/api/graphql"), "graphql")
+        self.assertEqual(endpoint_template("https://gitlab.com/api/v4/groups/4/projects"), "groups/:id/projects")
+
+    def test_percentile(self):
+        """It should return nearest rank percentiles"""
+        values = list(range(1, 101))
+        self.assertEqual(percentile(values, 0.5), 50)
+        self.assertEqual(percentile(values, 0.99), 99)
+        self.assertEqual(percentile([], 0.5), 0.0)
+
+    @patch("requests.Session.request")
+    def test_hooks(self, request_mock):
+        """It should record every request made by GitLab"""
+        base = "https://gitlab.example.com/api/v4/projects/1"
+        request_mock.side_effect = [
+            make_response("POST", f"{base}/boards/7/lists", 429, sent=b"{}"),
+            make_response("POST", f"{base}/boards/7/lists", 201, b'{"id": 1}', b'{"label_id": 2}'),
+            make_response("GET", f"{base}/labels", 200, b"[]"),
+        ]
+        metrics = Metrics()
+        with GitLab("1", "token", "https://gitlab.example.com") as gitlab:
+            gitlab.add_hook(metrics)
+            gitlab.post("boards/7/lists", {"label_id": 2})
+            gitlab.get("labels")
+        summary = metrics.summary()
+        self.assertEqual(summary["requests"], 3)
+        self.assertEqual(summary["endpoints"]["POST boards/:id/lists"]["count"], 2)
+        self.assertEqual(summary["status_codes"], {"200": 1, "201": 1, "429": 1})
+        self.assertEqual(summary["retries"], 1)
+        self.assertEqual(summary["bytes_in"], 11)
+        self.assertEqual(summary["bytes_out"], 17)
+        self.assertIn("POST boards/:id/lists", metrics.report())
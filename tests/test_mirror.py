@@ -0,0 +1,149 @@
+######################################################################
+# Copyright 2022 John Rofrano. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the 'License');
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an 'AS IS' BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+######################################################################
+import tempfile
+from unittest import TestCase
+from click.testing import CliRunner
+from kanban.cli import cli
+from kanban.models import GitLab, Board, Issue, Label
+from kanban.models.mirror import Mirror
+from benchmarks.mock_gitlab import MockGitLab
+
+
+class TestMirror(TestCase):
+    """Test the SQLite mirror of a project"""
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()  # pylint: disable=consider-using-with
+        self.mock = MockGitLab().start()
+        self.gitlab = GitLab("1", "token", self.mock.url)
+        for name in ("Backlog", "Doing", "Done"):
+            self.mock.create_label({"name": name})
+        self.mock.create_board({"name": "Development"})
+        for number in range(150):
+            issue = self.mock.create_issue({"title": f"Issue {number % 100}", "labels": "Backlog" if number % 3 else "Doing"})
+            # Distinct update times in the past so only later changes are newer
+            issue["updated_at"] = f"2022-01-01T{number // 60:02d}:{number % 60:02d}:00Z"
+        self.mirror = Mirror(self.directory.name, self.gitlab)
+
+    def tearDown(self):
+        self.mirror.close()
+        self.gitlab.close()
+        self.mock.stop()
+        self.directory.cleanup()
+
+    def test_lookups(self):
+        """It should answer the model lookups without calling GitLab"""
+        self.assertIsNone(self.mirror.synced)
+        self.assertEqual(self.mirror.sync(), {"labels": 3, "boards": 1, "issues": 150})
+        requests = self.mock.requests
+        issue = Issue(self.gitlab, self.mirror)
+        self.assertEqual(sorted(record.iid for record in issue.find_by_title("Issue 7")), [8, 108])
+        self.assertEqual(issue.find(8)["title"], "Issue 7")
+        self.assertEqual(len(self.mirror.issues(label="Doing")), 50)
+        self.assertEqual(len(list(issue.all(limit=10))), 10)
+        self.assertEqual(list(issue.all(limit=0)), [])
+        self.assertEqual(list(issue.all(limit=-1)), [])
+        self.assertEqual(len(issue.title_index()), 100)
+        self.assertEqual(Label(self.gitlab, self.mirror).find_by_name("Done")[0].name, "Done")
+        self.assertEqual(Board(self.gitlab, self.mirror).find_by_name("Development")[0].name, "Development")
+        self.assertEqual(self.mock.requests, requests)
+
+    def test_group_labels(self):
+        """It should mirror the same labels that Label.all lists"""
+        self.mock.create_group_label({"name": "Team"})
+        self.mirror.sync()
+        live = sorted(label["name"] for label in Label(self.gitlab).all())
+        self.assertEqual(sorted(label["name"] for label in self.mirror.labels()), live)
+        self.assertEqual(Label(self.gitlab, self.mirror).find_by_name("Team")[0].name, "Team")
+
+    def test_incremental_sync(self):
+        """It should only fetch the issues updated since the last sync"""
+        self.mirror.sync()
+        self.mock.update_issue(5, {"add_labels": "Done", "state_event": "close"})
+        self.mock.create_issue({"title": "New"})
+        counts = self.mirror.sync()
+        # updated_after is inclusive so the newest issue already mirrored comes back too
+        self.assertEqual(counts["issues"], 3)
+        self.assertEqual(self.mirror.issue(5)["state"], "closed")
+        self.assertEqual([issue["iid"] for issue in self.mirror.issues(label="Done")], [5])
+        self.assertEqual(self.mirror.issues(title="New")[0]["iid"], 151)
+        self.assertEqual(len(self.mirror.issues(state="closed")), 1)
+
+    def test_upsert(self):
+        """It should add or replace what kanban creates or changes"""
+        self.mirror.sync()
+        self.mirror.upsert("labels", {"id": 1, "name": "New"})
+        self.mirror.upsert("issues", {"iid": 8, "title": "Renamed", "state": "opened", "updated_at": "now", "labels": ["New"]})
+        self.assertEqual(self.mirror.label(1)["name"], "New")
+        self.assertEqual(self.mirror.issues(title="Issue 7")[0]["iid"], 108)
+        self.assertEqual(self.mirror.issues(label="New")[0]["title"], "Renamed")
+        self.assertRaises(ValueError, self.mirror.upsert, "lists", {})
+
+    def test_delete_discards(self):
+        """It should drop deleted issues from the mirror"""
+        self.mirror.sync()
+        issue = Issue(self.gitlab, self.mirror)
+        self.assertTrue(issue.delete({"title": "Issue 7"}))
+        self.assertEqual(issue.find_by_title("Issue 7"), [])
+        del self.mock.issues[9]
+        self.assertIsNotNone(self.mirror.issue(9))
+        self.mirror.sync(full=True)
+        self.assertIsNone(self.mirror.issue(9))
+
+    def test_cli(self):
+        """It should list from the mirror, syncing on first use and with --refresh"""
+        runner = CliRunner()
+        args = ["-t", "token", "-p", "1", "-u", self.mock.url, "--mirror-dir", self.directory.name]
+        result = runner.invoke(cli, args + ["labels", "list"])
+        self.assertEqual(result.exit_code, 0, result.output)
+        self.assertIn("Mirror synced: 3 labels, 1 boards, 150 changed issues", result.output)
+        self.mock.create_label({"name": "Review"})
+        result = runner.invoke(cli, args + ["labels", "list"])
+        self.assertNotIn("Review", result.output)
+        result = runner.invoke(cli, args + ["--refresh", "labels", "list"])
+        self.assertIn("Review", result.output)
+        self.assertIn("1 changed issues", result.output)
+
+    def test_cli_writes(self):
+        """It should keep the mirror up to date with what the commands create and delete"""
+        runner = CliRunner()
+        args = ["-t", "token", "-p", "1", "-u", self.mock.url, "--mirror-dir", self.directory.name]
+        self.assertEqual(runner.invoke(cli, args + ["labels", "list"]).exit_code, 0)
+        with runner.isolated_filesystem():
+            with open("labels.csv", "w", encoding="utf-8") as csv_file:
+                csv_file.write('"name","color"\n"Review","#F0F0F0"\n"Blocked","red"\n')
+            with open("issues.csv", "w", encoding="utf-8") as csv_file:
+                csv_file.write('"title","labels"\n"Fresh","Review,Blocked"\n')
+            result = runner.invoke(cli, args + ["labels", "create", "-i", "labels.csv"])
+            self.assertEqual(result.exit_code, 0, result.output)
+            result = runner.invoke(cli, args + ["issues", "create", "-i", "issues.csv"])
+            self.assertEqual(result.exit_code, 0, result.output)
+            result = runner.invoke(cli, args + ["boards", "create", "-n", "Review", "-i", "labels.csv"])
+            self.assertEqual(result.exit_code, 0, result.output)
+        self.assertEqual(len(self.mock.labels), 5)
+        board = next(board for board in self.mock.boards.values() if board["name"] == "Review")
+        self.assertEqual([item["label"]["name"] for item in board["lists"]], ["Review", "Blocked"])
+        self.assertEqual(self.mirror.issues(label="Review")[0]["title"], "Fresh")
+        self.assertEqual(len(self.mirror.board(board["id"])["lists"]), 2)
+
+        # Issues deleted outside kanban are only dropped by a full refresh
+        del self.mock.issues[9]
+        result = runner.invoke(cli, args + ["--refresh", "issues", "list"])
+        self.assertIsNotNone(self.mirror.issue(9))
+        result = runner.invoke(cli, args + ["--full-refresh", "issues", "list"])
+        self.assertEqual(result.exit_code, 0, result.output)
+        self.assertIsNone(self.mirror.issue(9))
+
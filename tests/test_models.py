@@ -0,0 +1,174 @@
+######################################################################
+# Copyright 2022 John Rofrano. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the 'License');
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an 'AS IS' BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+######################################################################
+import time
+from unittest import TestCase
+from unittest.mock import MagicMock
+from kanban.models import GitLab, Board, Label, Issue
+from benchmarks.mock_gitlab import MockGitLab
+
+ISSUES = [
+    {"iid": 1, "title": "What is TDD?"},
+    {"iid": 2, "title": "Benefits of TDD"},
+    {"iid": 3, "title": "What is TDD?"},
+]
+LABELS = [{"id": 10, "name": "Video"}, {"id": 11, "name": "Reading"}]
+
+
+class TestModels(TestCase):
+    """Test the Label, Board and Issue models"""
+
+    def setUp(self):
+        self.gitlab = MagicMock(spec=GitLab)
+        self.gitlab.delete.return_value = True
+
+    ######################################################################
+    # Issue test cases
+    ######################################################################
+
+    def test_title_index(self):
+        """It should index issue ids by title"""
+        self.gitlab.get_all.return_value = iter(ISSUES)
+        index = Issue(self.gitlab).title_index()
+        self.assertEqual(index, {"What is TDD?": [1, 3], "Benefits of TDD": [2]})
+
+    def test_delete_many(self):
+        """It should list the issues once and delete by id"""
+        self.gitlab.get_all.return_value = iter(ISSUES)
+        results = Issue(self.gitlab).delete_many(
+            [{"title": "What is TDD?"}, {"title": "Benefits of TDD"}, {"title": "Missing"}]
+        )
+        self.assertEqual(results, [True, True, False])
+        self.assertEqual(self.gitlab.get_all.call_count, 1)
+        deleted = [call.args[0] for call in self.gitlab.delete.call_args_list]
+        self.assertEqual(deleted, ["issues/1", "issues/3", "issues/2"])
+
+    def test_update_many(self):
+        """It should PUT each issue's changes and summarize the failures"""
+        self.gitlab.put.side_effect = lambda path, data: {} if path == "issues/3" else {"iid": int(path.split("/")[1])}
+        updates = [
+            {"iid": 1, "add_labels": "Doing", "remove_labels": ""},
+            {"iid": 2, "title": "Two", "add_labels": "Doing"},
+            {"iid": 3, "add_labels": "Doing"},
+            {"iid": None, "title": "Missing", "add_labels": "Doing"},
+            {"iid": 5, "title": "Empty", "add_labels": ""},
+        ]
+        progress = []
+        summary = Issue(self.gitlab).update_many(updates, workers=2, ordered=True, on_update=progress.append)
+        self.assertEqual(summary.succeeded, 2)
+        self.assertEqual(
+            [(failure.index, failure.error) for failure in summary.failures],
+            [(2, "GitLab request failed"), (3, "No issue titled Missing"), (4, "Nothing to update")],
+        )
+        self.assertEqual(len(progress), 5)
+        self.assertEqual(self.gitlab.put.call_count, 3)
+        self.gitlab.put.assert_any_call("issues/1", {"add_labels": "Doing"})
+
+    def test_watch(self):
+        """It should only fetch changed issues and report how they changed"""
+        with MockGitLab() as mock, GitLab("1", "token", mock.url) as gitlab:
+            for number in range(3):
+                mock.create_issue({"title": f"Issue {number}", "labels": "Backlog"})
+            steps = [
+                lambda: mock.update_issue(1, {"add_labels": "Doing", "remove_labels": "Backlog"}),
+                lambda: (mock.update_issue(2, {"state_event": "close"}), mock.create_issue({"title": "New"})),
+            ]
+
+            def sleep(_):
+                time.sleep(0.002)
+                steps.pop(0)()
+                time.sleep(0.002)
+
+            watch = Issue(gitlab).watch(list_labels=["Backlog", "Doing"], polls=3, sleep=sleep)
+            events = [(event["event"], event["iid"], event.get("to")) for event in watch]
+        self.assertEqual(events[:3], [("snapshot", 1, None), ("snapshot", 2, None), ("snapshot", 3, None)])
+        self.assertIn(("moved", 1, "Doing"), events[3:])
+        self.assertIn(("closed", 2, None), events[3:])
+        self.assertIn(("created", 4, None), events[3:])
+        self.assertEqual(len([event for event in events if event[1] == 3]), 1)
+
+    ######################################################################
+    # Label test cases
+    ######################################################################
+
+    def test_find_by_name_index(self):
+        """It should find labels in a name index without listing again"""
+        self.gitlab.get_all.return_value = iter(LABELS)
+        label = Label(self.gitlab)
+        index = label.name_index()
+        self.assertEqual(label.find_by_name("Video", index), [LABELS[0]])
+        self.assertEqual(label.find_by_name("Missing", index), [])
+        self.assertEqual(self.gitlab.get_all.call_count, 1)
+
+    def test_find_or_create(self):
+        """It should reuse an existing label instead of creating it"""
+        self.gitlab.get_all.return_value = iter(LABELS)
+        self.gitlab.post.return_value = {"id": 12, "name": "Lab"}
+        label = Label(self.gitlab)
+        index = label.name_index()
+        self.assertEqual(label.find_or_create({"name": "Video"}, index)["id"], 10)
+        self.assertEqual(label.find_or_create({"name": "Lab"}, index)["id"], 12)
+        self.assertEqual(self.gitlab.post.call_count, 1)
+
+    def test_plan_sync(self):
+        """It should only plan the changes between the CSV and GitLab"""
+        self.gitlab.get_all.return_value = iter([
+            {"id": 1, "name": "Same", "color": "#ff0000", "text_color": "#FFFFFF", "description": None},
+            {"id": 2, "name": "Changed", "color": "#F0F0F0", "text_color": "#333333", "description": "old"},
+            {"id": 3, "name": "Extra", "color": "#F0F0F0", "text_color": "#333333", "description": ""},
+        ])
+        rows = [
+            {"name": "Same", "color": "red", "text_color": "#ffffff", "description": ""},
+            {"name": "Changed", "color": "#F0F0F0", "text_color": "#333333", "description": "new"},
+            {"name": "New", "color": "#F0F0F0", "text_color": "#333333", "description": ""},
+        ]
+        plan = Label(self.gitlab).plan_sync(rows, prune=True)
+        self.assertEqual(plan["unchanged"], ["Same"])
+        self.assertEqual(plan["update"][0][1], {"description": "new"})
+        self.assertEqual([row["name"] for row in plan["create"]], ["New"])
+        self.assertEqual([label["id"] for label in plan["delete"]], [3])
+        # Group labels cannot be updated or deleted through the project so they are left out
+        self.assertEqual(self.gitlab.get_all.call_args.kwargs["params"], {"include_ancestor_groups": "false"})
+
+    def test_plan_sync_skips_bad_rows(self):
+        """It should skip rows without a name and repeated names instead of failing"""
+        self.gitlab.get_all.return_value = iter([])
+        rows = [{"name": "New"}, {"color": "red"}, {"name": " "}, {"name": "New", "color": "blue"}]
+        plan = Label(self.gitlab).plan_sync(rows)
+        self.assertEqual(plan["create"], [{"name": "New"}])
+
+    ######################################################################
+    # Board test cases
+    ######################################################################
+
+    def test_order_lists(self):
+        """It should only move the lists that are out of place"""
+        self.gitlab.get_all.return_value = iter([
+            {"id": 100 + label_id, "position": position, "label": {"id": label_id}}
+            for position, label_id in enumerate([2, 1, 3, 4])
+        ])
+        moves = Board(self.gitlab).order_lists(5, [1, 2, 3, 4])
+        self.assertEqual(moves, 1)
+        self.gitlab.put.assert_called_once_with("boards/5/lists/101", {"position": 0})
+
+    def test_order_lists_missing(self):
+        """It should skip labels that have no list on the board"""
+        self.gitlab.get_all.return_value = iter([
+            {"id": 100 + label_id, "position": position, "label": {"id": label_id}}
+            for position, label_id in enumerate([2, 1, 4])
+        ])
+        moves = Board(self.gitlab).order_lists(5, [1, 2, 3, 4])
+        self.assertEqual(moves, 1)
+        self.gitlab.put.assert_called_once_with("boards/5/lists/101", {"position": 0})
@@ -0,0 +1,107 @@
+######################################################################
+# Copyright 2022 John Rofrano. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the 'License');
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an 'AS IS' BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+######################################################################
+import json
+from unittest import TestCase
+from unittest.mock import patch
+from click.testing import CliRunner
+from kanban.cli import cli
+from kanban.planner import ManifestError, Operation, Plan
+from benchmarks.mock_gitlab import MockGitLab
+
+MANIFEST = {
+    "labels": [{"name": "Backlog", "color": "#F0F0F0"}, {"name": "Doing"}, {"name": "Done"}],
+    "boards": [{"name": "Development", "lists": ["Backlog", "Doing", "Done"]}],
+    "issues": [
+        {"title": "One", "labels": ["Backlog"]},
+        {"title": "Two", "labels": "Doing, Unknown"},
+        {"title": "Three"},
+    ],
+}
+
+
+class TestPlanner(TestCase):
+    """Test the manifest planner"""
+
+    def test_waves(self):
+        """It should group operations into waves behind their dependencies"""
+        plan = Plan.from_manifest(MANIFEST)
+        waves = [[str(operation) for operation in wave] for wave in plan.waves()]
+        self.assertEqual(
+            waves[0], ["label:Backlog", "label:Doing", "label:Done", "board:Development", "issue:3:Three"]
+        )
+        self.assertEqual(
+            waves[1],
+            ["list:Development:Backlog", "list:Development:Doing", "list:Development:Done", "issue:1:One", "issue:2:Two"],
+        )
+        self.assertEqual(waves[2], ["order:Development"])
+        path = [str(operation) for operation in plan.critical_path()]
+        self.assertEqual(path, ["board:Development", "list:Development:Backlog", "order:Development"])
+        self.assertEqual(plan.operations["issue:2:Two"].data["labels"], "Doing,Unknown")
+
+    def test_invalid_manifest(self):
+        """It should refuse manifests with broken references"""
+        self.assertRaises(ManifestError, Plan.from_manifest, {"boards": [{"name": "B", "lists": ["Missing"]}]})
+        self.assertRaises(ManifestError, Plan.from_manifest, {"labels": [{"name": "A"}, {"name": "A"}]})
+        self.assertRaises(ManifestError, Plan.from_manifest, {"issues": [{"description": "no title"}]})
+        cycle = Plan([Operation("a", "label", {}, ("b",)), Operation("b", "label", {}, ("a",))])
+        self.assertRaises(ManifestError, cycle.waves)
+
+    @patch("kanban.planner.Executor")
+    def test_failures_skip_dependents(self, executor_mock):
+        """It should not run operations whose dependencies failed"""
+        called = []
+
+        def call(operation):
+            called.append(operation.key)
+            return "boom" if operation.key == "label:Doing" else None
+
+        executor_mock.return_value.call.side_effect = call
+        summary = Plan.from_manifest(MANIFEST).run(None, workers=4)
+        failed = {str(failure.item): failure.error for failure in summary.failures}
+        self.assertEqual(failed["label:Doing"], "boom")
+        self.assertIn("skipped", failed["list:Development:Doing"])
+        self.assertIn("skipped", failed["order:Development"])
+        self.assertIn("skipped", failed["issue:2:Two"])
+        self.assertNotIn("issue:2:Two", called)
+        self.assertEqual(summary.succeeded, 7)
+
+    def test_apply(self):
+        """It should provision a project and be safe to run again"""
+        runner = CliRunner()
+        with MockGitLab() as mock, runner.isolated_filesystem():
+            with open("manifest.json", "w", encoding="utf-8") as manifest:
+                json.dump(MANIFEST, manifest)
+            args = ["-t", "token", "-p", "1", "-u", mock.url, "apply", "-m", "manifest.json"]
+            for _ in range(2):
+                result = runner.invoke(cli, args)
+                self.assertEqual(result.exit_code, 0, result.output)
+            self.assertIn("critical path length 3", result.output)
+            board = list(mock.boards.values())
+            self.assertEqual(len(board), 1)
+            self.assertEqual([item["label"]["name"] for item in board[0]["lists"]], ["Backlog", "Doing", "Done"])
+            self.assertEqual(len(mock.labels), 3)
+            self.assertEqual(len(mock.issues), 3)
+
+    def test_apply_dry_run(self):
+        """It should print the plan without calling GitLab"""
+        runner = CliRunner()
+        with runner.isolated_filesystem():
+            with open("manifest.json", "w", encoding="utf-8") as manifest:
+                json.dump(MANIFEST, manifest)
+            result = runner.invoke(cli, ["-t", "token", "-p", "1", "apply", "-m", "manifest.json", "--dry-run"])
+        self.assertEqual(result.exit_code, 0, result.output)
+        self.assertIn("Wave 3: 1 operations", result.output)
+        self.assertIn("  order:Development", result.output)
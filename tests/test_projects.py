@@ -0,0 +1,99 @@
+######################################################################
+# Copyright 2022 John Rofrano. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the 'License');
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an 'AS IS' BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+######################################################################
+import subprocess
+import sys
+from unittest import TestCase
+from unittest.mock import patch
+from click.testing import CliRunner
+from kanban.cli import cli
+from kanban.models import GitLab
+from kanban.projects import parse_projects
+from benchmarks.mock_gitlab import MockGitLab
+
+
+class TestProjects(TestCase):
+    """Test running commands across several projects"""
+
+    def setUp(self):
+        self.runner = CliRunner()
+
+    @patch("kanban.models.GitLab.group_projects")
+    def test_parse_projects(self, group_mock):
+        """It should expand lists, files and groups into project ids"""
+        group_mock.return_value = ["7", "8"]
+        gitlab = GitLab("1", "token")
+        with self.runner.isolated_filesystem():
+            with open("projects.txt", "w", encoding="utf-8") as project_file:
+                project_file.write("3\n# comment\n4\n\n1\n")
+            projects = parse_projects("1,2,@projects.txt,group:team", gitlab)
+        self.assertEqual(projects, ["1", "2", "3", "4", "7", "8"])
+        group_mock.assert_called_once_with("team")
+        gitlab.close()
+
+    def test_labels_create_many_projects(self):
+        """It should create the labels in every project and print a summary"""
+        projects = []
+
+        def create(label, data):
+            projects.append(label.gitlab.project)
+            return {} if label.gitlab.project == "2" and data["name"] == "Done" else {"id": 1}
+
+        with patch("kanban.models.Label.create", autospec=True, side_effect=create):
+            result = self.runner.invoke(
+                cli, ["-t=1", "-p", "1,2,3", "labels", "create", "-i", "tests/fixtures/test_board_labels.csv"]
+            )
+        self.assertEqual(result.exit_code, 1, result.output)
+        self.assertEqual(sorted(set(projects)), ["1", "2", "3"])
+        self.assertEqual(len(projects), 12)
+        self.assertIn("=== Project 2 ===", result.output)
+        self.assertRegex(result.output, r"2\s+FAILED\s+3\s+1")
+        self.assertIn("2 projects succeeded, 1 failed", result.output)
+
+    def test_boards_delete_many_projects(self):
+        """It should count single board commands in the summary table"""
+
+        def delete_by_id(board, board_id):
+            return board.gitlab.project != "2"
+
+        with patch("kanban.models.Board.delete_by_id", autospec=True, side_effect=delete_by_id):
+            result = self.runner.invoke(cli, ["-t=1", "-p", "1,2", "boards", "delete", "-b", "5"])
+        self.assertEqual(result.exit_code, 1, result.output)
+        self.assertIn("Board 5 was not deleted.", result.output)
+        self.assertRegex(result.output, r"1\s+ok\s+1\s+0")
+        self.assertRegex(result.output, r"2\s+FAILED\s+0\s+1")
+
+    def test_output_per_project(self):
+        """It should print each project's output under its own header"""
+        with MockGitLab() as mock:
+            mock.create_label({"name": "Backlog"})
+            # A real process so click writes to the real stdout and not the CliRunner's
+            result = subprocess.run(
+                [sys.executable, "-m", "kanban", "-t=1", "-p", "1,2", "-u", mock.url, "labels", "list"],
+                capture_output=True, text=True, check=False,
+            )
+        self.assertEqual(result.returncode, 0, result.stderr)
+        sections = result.stdout.split("=== Project ")
+        self.assertEqual(sections[0], "")
+        self.assertEqual(len(sections), 3, result.stdout)
+        for project, section in zip(("1", "2"), sections[1:]):
+            self.assertTrue(section.startswith(f"{project} ===\nGetting labels for project {project}..."), section)
+            self.assertIn("Backlog", section)
+
+    def test_issues_single_project(self):
+        """It should refuse to run issues commands across projects"""
+        result = self.runner.invoke(cli, ["-t=1", "-p", "1,2", "issues", "list"])
+        self.assertNotEqual(result.exit_code, 0)
+        self.assertIn("one project at a time", result.output)
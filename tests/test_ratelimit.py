@@ -0,0 +1,85 @@
+######################################################################
+# Copyright 2022 John Rofrano. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the 'License');
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an 'AS IS' BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+######################################################################
+import os
+import tempfile
+from unittest import TestCase
+from kanban.models.ratelimit import RateLimiter
+
+
+class FakeClock:
+    """A clock that only moves when something sleeps"""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float) -> None:
+        """Advances the clock"""
+        self.now += seconds
+
+
+class TestRateLimiter(TestCase):
+    """Test the token bucket rate limiter"""
+
+    def setUp(self):
+        self.clock = FakeClock()
+
+    def limiter(self, **kwargs) -> RateLimiter:
+        """Creates a rate limiter on the fake clock"""
+        return RateLimiter(clock=self.clock, sleep=self.clock.sleep, **kwargs)
+
+    def test_unlimited(self):
+        """It should never wait without a rate or headers"""
+        limiter = self.limiter()
+        self.assertEqual(sum(limiter.acquire() for _ in range(100)), 0)
+
+    def test_rate(self):
+        """It should send no more than rate requests per second"""
+        limiter = self.limiter(rate=10, burst=1)
+        for _ in range(11):
+            limiter.acquire()
+        self.assertAlmostEqual(self.clock.now, 1001.0)
+
+    def test_retry_after(self):
+        """It should wait for Retry-After after a 429"""
+        limiter = self.limiter()
+        limiter.update({"Retry-After": "3"}, 429)
+        self.assertAlmostEqual(limiter.acquire(), 3.0)
+
+    def test_remaining_exhausted(self):
+        """It should wait until RateLimit-Reset when nothing remains"""
+        limiter = self.limiter()
+        limiter.update({"RateLimit-Remaining": "0", "RateLimit-Reset": "1010"}, 200)
+        self.assertAlmostEqual(limiter.acquire(), 10.0)
+
+    def test_pace_ahead_of_limit(self):
+        """It should spread the remaining requests until the reset"""
+        limiter = self.limiter()
+        limiter.update({"RateLimit-Remaining": "5", "RateLimit-Reset": "1010"}, 200)
+        for _ in range(6):
+            limiter.acquire()
+        self.assertAlmostEqual(self.clock.now, 1010.0)
+
+    def test_lock_file(self):
+        """It should share the bucket between limiters through a lock file"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            lock_file = os.path.join(tmpdir, "rate.lock")
+            first = self.limiter(lock_file=lock_file)
+            second = self.limiter(lock_file=lock_file)
+            first.update({"Retry-After": "2"}, 429)
+            self.assertAlmostEqual(second.acquire(), 2.0)
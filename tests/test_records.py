@@ -0,0 +1,79 @@
+######################################################################
+# Copyright 2022 John Rofrano. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the 'License');
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an 'AS IS' BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+######################################################################
+import json
+import os
+from unittest import TestCase
+from unittest.mock import MagicMock
+from kanban.models import GitLab, Board, Issue, BoardRecord, IssueRecord, LabelRecord
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures")
+
+
+def load_fixture(name: str):
+    """Loads a JSON fixture"""
+    with open(os.path.join(FIXTURES, name), encoding="utf-8") as fixture:
+        return json.load(fixture)
+
+
+class TestRecords(TestCase):
+    """Test the compact record types"""
+
+    def setUp(self):
+        self.issue = load_fixture("issue.json")
+        self.board = load_fixture("board.json")
+
+    def test_issue_projection(self):
+        """It should only keep the projected issue fields"""
+        record = IssueRecord.from_json(self.issue)
+        self.assertEqual(record.keys(), ["iid", "title", "state", "labels"])
+        self.assertEqual(record["iid"], self.issue["iid"])
+        self.assertEqual(record.labels, tuple(self.issue["labels"]))
+        self.assertIsNone(record.get("author"))
+        self.assertNotIn("author", record)
+        self.assertRaises(KeyError, lambda: record["author"])
+        self.assertFalse(hasattr(record, "__dict__"))
+
+    def test_nested_fields(self):
+        """It should reduce nested objects to a single value"""
+        record = IssueRecord.from_json(self.issue, fields=("iid", "author", "assignees", "milestone"))
+        self.assertEqual(record.author, self.issue["author"]["username"])
+        self.assertEqual(record.assignees, tuple(user["username"] for user in self.issue["assignees"]))
+        self.assertIsNone(record.milestone)
+        board = BoardRecord.from_json(self.board, fields=("id", "lists"))
+        self.assertEqual(len(board.lists), len(self.board["lists"]))
+        self.assertEqual(board.lists[0][0], min(self.board["lists"], key=lambda item: item["position"])["id"])
+
+    def test_unknown_field(self):
+        """It should not project a field the record does not have"""
+        self.assertRaises(ValueError, LabelRecord.projection, ["name", "_links"])
+
+    def test_equality(self):
+        """It should compare equal to the dict of its fields"""
+        label = {"id": 1, "name": "Video", "color": "#FF0000"}
+        record = LabelRecord.from_json(dict(label, open_issues_count=3))
+        self.assertEqual(record, label)
+        self.assertEqual(record, LabelRecord.from_json(label))
+        self.assertEqual(record.to_dict(), label)
+        self.assertIn("Video", repr(record))
+
+    def test_model_records(self):
+        """It should list records from the models"""
+        gitlab = MagicMock(spec=GitLab)
+        gitlab.get_all.return_value = iter([self.issue])
+        records = list(Issue(gitlab).records(fields=("iid", "web_url")))
+        self.assertEqual(records[0].to_dict(), {"iid": self.issue["iid"], "web_url": self.issue["web_url"]})
+        gitlab.get_all.return_value = iter([self.board])
+        self.assertEqual(Board(gitlab).find_by_name(self.board["name"])[0].id, self.board["id"])
@@ -0,0 +1,64 @@
+######################################################################
+# Copyright 2022 John Rofrano. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the 'License');
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an 'AS IS' BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+######################################################################
+import subprocess
+import sys
+from unittest import TestCase
+
+# Cumulative microseconds that importing kanban.cli may take
+IMPORT_BUDGET = 150000
+HEAVY_MODULES = ("requests", "urllib3", "tqdm", "sqlite3", "kanban.models.gitlab")
+
+CHECK_MODULES = """
+import sys
+from kanban.cli import cli
+try:
+    cli({args!r}, standalone_mode=False)
+except Exception:  # pylint: disable=broad-except
+    pass
+print("LOADED:" + ",".join(name for name in {modules!r} if name in sys.modules))
+"""
+
+
+def python(*args: str) -> subprocess.CompletedProcess:
+    """Runs a fresh python interpreter"""
+    return subprocess.run([sys.executable] + list(args), capture_output=True, text=True, check=True)
+
+
+class TestStartup(TestCase):
+    """Test that the command line interface starts quickly"""
+
+    def loaded_modules(self, args: list) -> str:
+        """Returns the heavy modules loaded by running kanban with args"""
+        result = python("-c", CHECK_MODULES.format(args=args, modules=HEAVY_MODULES))
+        return result.stdout.rsplit("LOADED:", 1)[1].strip()
+
+    def test_import_time(self):
+        """It should import kanban.cli within the budget"""
+        result = python("-X", "importtime", "-c", "import kanban.cli")
+        timings = [line.split("|") for line in result.stderr.splitlines() if line.startswith("import time:")]
+        cumulative = {name.strip(): int(total) for _, total, name in timings if total.strip().isdigit()}
+        self.assertLess(cumulative["kanban.cli"], IMPORT_BUDGET)
+
+    def test_help_is_light(self):
+        """It should not load requests, tqdm or the models for --help"""
+        self.assertEqual(self.loaded_modules(["--help"]), "")
+        self.assertEqual(self.loaded_modules(["-t", "token", "-p", "1", "labels", "create", "--help"]), "")
+
+    def test_gitlab_built_on_use(self):
+        """It should only build the GitLab client when a command uses it"""
+        loaded = self.loaded_modules(["-t", "token", "-p", "1", "-u", "http://127.0.0.1:9", "--retries", "0",
+                                      "boards", "list", "--limit", "0"])
+        self.assertIn("kanban.models.gitlab", loaded)
@@ -0,0 +1,76 @@
+######################################################################
+# Copyright 2022 John Rofrano. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the 'License');
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an 'AS IS' BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+######################################################################
+from unittest import TestCase
+from kanban.cli import iter_csv
+from kanban.validation import is_color, validate_issues, validate_labels
+
+
+class TestValidation(TestCase):
+    """Test the checks of CSV rows before they are sent"""
+
+    def test_sample_files(self):
+        """It should find no problems in the sample files"""
+        self.assertEqual(validate_labels(iter_csv("tests/fixtures/test_board_labels.csv")), [])
+        self.assertEqual(validate_labels(iter_csv("samples/github_labels.csv")), [])
+        self.assertEqual(validate_issues(iter_csv("tests/fixtures/issues.csv")), [])
+
+    def test_colors(self):
+        """It should accept hex colors and the HTML color names"""
+        for color in ("#FFF", "#f0f0f0", "Teal", "black"):
+            self.assertTrue(is_color(color), color)
+        for color in ("FFFFFF", "#GGGGGG", "#FFFF", "orange"):
+            self.assertFalse(is_color(color), color)
+
+    def test_labels(self):
+        """It should report every bad label row"""
+        rows = [
+            {"name": "Done", "color": "#0F0", "text_color": "white"},
+            {"name": "Done", "color": "#0F0"},
+            {"name": "", "color": ""},
+            {"name": "a,b", "color": "#0F0", "text_color": "whte"},
+            {"name": "x" * 256, "color": "red"},
+        ]
+        problems = [str(problem) for problem in validate_labels(rows)]
+        self.assertEqual(
+            problems,
+            [
+                "row 2 (name): duplicate of row 1",
+                "row 3 (name): missing",
+                "row 3 (color): missing",
+                "row 4 (name): label names cannot contain commas",
+                "row 4 (text_color): 'whte' is not a hex color or one of the HTML color names",
+                "row 5 (name): longer than 255 characters",
+            ],
+        )
+
+    def test_missing_columns(self):
+        """It should report a missing column once"""
+        rows = [{"name": "Done"}, {"name": "Doing"}]
+        self.assertEqual([str(problem) for problem in validate_labels(rows)], ["header (color): required column is missing"])
+        self.assertEqual(validate_labels(rows, require_color=False), [])
+        problems = [str(problem) for problem in validate_issues([{"name": "x"}])]
+        self.assertEqual(problems, ["header (title): required column is missing"])
+
+    def test_issue_labels(self):
+        """It should resolve the labels of each issue against the label names"""
+        rows = [
+            {"title": "One", "labels": "Backlog, Doing"},
+            {"title": "Two", "labels": "Backlog,Dong,"},
+            {"title": "One", "labels": ""},
+        ]
+        self.assertEqual(len(validate_issues(rows)), 1)
+        problems = [str(problem) for problem in validate_issues(rows, ["Backlog", "Doing"])]
+        self.assertEqual(problems, ["row 2 (labels): label 'Dong' does not exist", "row 3 (title): duplicate of row 1"])
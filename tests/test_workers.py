@@ -0,0 +1,66 @@
+######################################################################
+# Copyright 2022 John Rofrano. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the 'License');
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an 'AS IS' BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+######################################################################
+import time
+from unittest import TestCase
+from kanban import workers
+
+
+def slow_square(value: int) -> int:
+    """Squares a value, taking longer for small values"""
+    time.sleep(0.01 * (5 - value))
+    return value * value
+
+
+def explode(value: int) -> int:
+    """Fails on odd values"""
+    if value % 2:
+        raise ValueError(f"odd {value}")
+    return value + 1
+
+
+class TestWorkers(TestCase):
+    """Test the bulk worker pool"""
+
+    def test_imap_ordered(self):
+        """It should return results in input order when ordered"""
+        results = list(workers.imap(slow_square, range(1, 5), workers=4, ordered=True))
+        self.assertEqual([result[2] for result in results], [1, 4, 9, 16])
+
+    def test_imap_unordered(self):
+        """It should return every result when unordered"""
+        results = list(workers.imap(slow_square, range(1, 5), workers=4))
+        self.assertEqual(sorted(result[2] for result in results), [1, 4, 9, 16])
+
+    def test_imap_lazy(self):
+        """It should only take a bounded number of items from the input"""
+        consumed = []
+
+        def source():
+            for value in range(100):
+                consumed.append(value)
+                yield value
+
+        stream = workers.imap(explode, source(), workers=2, ordered=True)
+        next(stream)
+        self.assertLessEqual(len(consumed), 5)
+
+    def test_run_summary(self):
+        """It should collect failures into the summary"""
+        summary = workers.run(explode, range(6), workers=3, total=6)
+        self.assertEqual(summary.succeeded, 3)
+        self.assertEqual(summary.failed, 3)
+        self.assertEqual(sorted(failure.index for failure in summary.failures), [1, 3, 5])
+        self.assertIn("odd", summary.failures[0].error)